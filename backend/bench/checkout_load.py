@@ -0,0 +1,109 @@
+# Eşzamanlı sipariş yük testi: stok aşımı (oversell) olmadığını doğrular ve saniyedeki siparişi ölçer.
+#
+#   cd backend && python -m bench.checkout_load --users 200 --threads 16
+#   cd backend && python -m bench.checkout_load --database-url postgresql://localhost/kitap_bench
+#
+# Az sayıda popüler kitap düşük stokla oluşturulur, her kullanıcının sepetine rastgele
+# kitaplar eklenir ve tüm siparişler aynı anda verilir. Sonunda stoklar, sipariş satırları
+# ve satıcı bakiyeleri karşılaştırılır; tutarsızlık varsa script 1 koduyla çıkar.
+import argparse
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import func
+
+from bench.common import auth_header, load_app
+
+
+def seed(main, args):
+    db = main.db
+    rng = random.Random(args.seed)
+    seller = main.User(name='Satıcı', email='seller@example.com', password='x', balance=0.0)
+    db.session.add(seller)
+    db.session.flush()
+
+    books = []
+    for i in range(args.books):
+        book = main.Book(title=f'Popüler Kitap {i}', author='Yazar', price=10.0 + i,
+                         stock=args.stock, seller_id=seller.id, category='Roman')
+        db.session.add(book)
+        books.append(book)
+
+    buyers = []
+    for i in range(args.users):
+        buyer = main.User(name=f'Alıcı {i}', email=f'buyer{i}@example.com', password='x')
+        db.session.add(buyer)
+        buyers.append(buyer)
+    db.session.flush()
+
+    for buyer in buyers:
+        for book in rng.sample(books, rng.randint(1, min(3, len(books)))):
+            db.session.add(main.CartItem(user_id=buyer.id, book_id=book.id, quantity=rng.randint(1, 2)))
+    db.session.commit()
+    return seller.id, [book.id for book in books], [buyer.id for buyer in buyers]
+
+
+def verify(main, seller_id, book_ids, initial_stock):
+    db = main.db
+    errors = []
+    sold = dict(db.session.query(main.OrderItem.book_id, func.sum(main.OrderItem.quantity))
+                .group_by(main.OrderItem.book_id))
+    revenue = db.session.query(func.sum(main.OrderItem.quantity * main.OrderItem.price)).scalar() or 0.0
+    for book in main.Book.query.filter(main.Book.id.in_(book_ids)):
+        if book.stock < 0:
+            errors.append(f'kitap {book.id}: negatif stok {book.stock}')
+        if book.stock + sold.get(book.id, 0) != initial_stock:
+            errors.append(f'kitap {book.id}: stok {book.stock} + satılan {sold.get(book.id, 0)} != {initial_stock}')
+    balance = db.session.get(main.User, seller_id).balance
+    if abs(balance - revenue) > 1e-6:
+        errors.append(f'satıcı bakiyesi {balance} != satış tutarı {revenue}')
+    return errors, sum(sold.values())
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--database-url')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--books', type=int, default=5)
+    parser.add_argument('--stock', type=int, default=50)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    args.threads = min(args.threads, args.users)
+
+    main = load_app(args.database_url)
+    with main.app.app_context():
+        seller_id, book_ids, buyer_ids = seed(main, args)
+    headers = {buyer_id: auth_header(main, buyer_id) for buyer_id in buyer_ids}
+
+    local = threading.local()
+    start_barrier = threading.Barrier(args.threads)
+
+    def checkout(buyer_id):
+        if not hasattr(local, 'client'):
+            local.client = main.app.test_client()
+            start_barrier.wait()
+        return local.client.post('/api/orders', headers=headers[buyer_id]).status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        statuses = Counter(pool.map(checkout, buyer_ids))
+    elapsed = time.perf_counter() - started
+
+    with main.app.app_context():
+        errors, units_sold = verify(main, seller_id, book_ids, args.stock)
+
+    print(f'{len(buyer_ids)} sipariş denemesi, {args.threads} thread, {elapsed:.2f} sn')
+    print(f'durum kodları: {dict(sorted(statuses.items()))}')
+    print(f'başarılı sipariş/sn: {statuses[200] / elapsed:.1f}, satılan adet: {units_sold} / {args.books * args.stock}')
+    for error in errors:
+        print('HATA:', error)
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(run())
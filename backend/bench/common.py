@@ -0,0 +1,51 @@
+# Benchmark ve kontrol scriptleri için ortak yardımcılar.
+# main modülü DATABASE_URL'i import anında okuduğu için veritabanı önce ayarlanmalı.
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_app(database_url=None):
+    if database_url is None:
+        path = os.path.join(tempfile.mkdtemp(prefix='kitap-bench-'), 'bench.db')
+        database_url = f'sqlite:///{path}'
+    os.environ['DATABASE_URL'] = database_url
+    # Erişim kayıtları ölçüm çıktısına karışmasın
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    import main
+    main.init_db()
+    return main
+
+
+def auth_header(main, user_id):
+    with main.app.app_context():
+        user = main.db.session.get(main.User, user_id)
+        return {'Authorization': f'Bearer {main.create_user_token(user)}'}
+
+
+# Blok içinde çalışan SQL ifadelerini sayar
+@contextmanager
+def count_queries(engine, with_parameters=False):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters) if with_parameters else statement)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+# Sıralı değerlerde en yakın sıra yöntemiyle yüzdelik (fraction: 0.5, 0.95, ...)
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
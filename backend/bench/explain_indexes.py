@@ -0,0 +1,123 @@
+# Endpoint'lerin çalıştırdığı sorguların indeks kullandığını EXPLAIN ile kontrol eder.
+#
+#   cd backend && python -m bench.explain_indexes
+#   cd backend && python -m bench.explain_indexes --database-url postgresql://... --verbose
+#
+# Her endpoint çağrılırken çalışan SELECT/UPDATE/DELETE ifadeleri aynı parametrelerle EXPLAIN
+# edilir (Postgres'te enable_seqscan kapalıyken, yani indeks varsa mutlaka seçilir). Tam tablo
+# taraması bulunursa script 1 koduyla çıkar. İstisnalar: ek sıralama gerektirmeyen LIMIT'li
+# taramalar (indeks sırasıyla okunup erken biter) ve tamamı listelenen küçük tablolar.
+# Arama endpoint'i bellekteki arama indeksini kullandığı için kontrol dışıdır.
+import argparse
+import re
+import sys
+
+from bench.common import auth_header, count_queries, load_app
+from bench.query_counts import endpoint_requests
+
+# Endpoint'in bütün satırları döndürmesi beklenen tablolar
+FULL_SCAN_TABLES = {'publisher', 'category'}
+
+SQLITE_SCAN_RE = re.compile(r'^SCAN (\w+)(?: AS \w+)?(?: USING (?:COVERING )?INDEX \w+)?$')
+POSTGRES_SCAN_RE = re.compile(r'Seq Scan on "?(\w+)"?')
+LIMIT_RE = re.compile(r'\bLIMIT\b', re.IGNORECASE)
+
+
+def catalog_requests(main, client, seller_id, book_id, publisher_id):
+    headers = auth_header(main, seller_id)
+    first_page = client.get('/api/books?limit=5')
+    cursor = first_page.headers.get('X-Next-Cursor')
+    requests = [
+        ('get_books', 'GET', '/api/books', None),
+        ('get_books_cursor', 'GET', f'/api/books?limit=5&cursor={cursor}', None),
+        ('get_books_price', 'GET', '/api/books?sort=price_asc', None),
+        ('get_books_title', 'GET', '/api/books?sort=title', None),
+        ('get_books_category', 'GET', '/api/books?category=Roman', None),
+        ('get_books_categories', 'GET', f'/api/books?category=Roman&category=Tarih&limit=5&cursor={cursor}', None),
+        ('get_books_category_price', 'GET', '/api/books?category=Roman&sort=price_asc', None),
+        ('get_books_author', 'GET', '/api/books?author=Yazar', None),
+        ('get_books_publisher', 'GET', f'/api/books?publisher_id={publisher_id}', None),
+        ('get_book', 'GET', f'/api/books/{book_id}', None),
+        ('get_new_books', 'GET', '/api/books/new', None),
+        ('get_trending_books', 'GET', '/api/books/trending', None),
+        ('get_bestseller_books', 'GET', '/api/books/bestsellers', None),
+        ('get_top_rated_books', 'GET', '/api/books/top-rated', None),
+        ('get_discounted_books', 'GET', '/api/books/discounted', None),
+        ('get_my_books', 'GET', '/api/my-books', headers),
+        ('get_user', 'GET', '/api/auth/user', headers),
+        ('get_cart_count', 'GET', '/api/cart/count', headers),
+    ]
+    return requests
+
+
+def explain(connection, statement, parameters):
+    if connection.dialect.name == 'postgresql':
+        with connection.begin():
+            connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+            rows = connection.exec_driver_sql('EXPLAIN ' + statement, parameters).fetchall()
+        return [row[0] for row in rows]
+    rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+    return [row[-1] for row in rows]
+
+
+def full_scans(dialect, statement, plan):
+    if dialect == 'postgresql':
+        tables = [match.group(1) for line in plan for match in [POSTGRES_SCAN_RE.search(line)] if match]
+    else:
+        tables = [match.group(1) for line in plan for match in [SQLITE_SCAN_RE.match(line.strip())] if match]
+        # LIMIT'li ve geçici sıralama yapmayan tarama indeks/rowid sırasıyla okunup erken biter
+        if LIMIT_RE.search(statement) and not any('TEMP B-TREE' in line for line in plan):
+            tables = []
+    return [table for table in tables if table not in FULL_SCAN_TABLES]
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--database-url')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    main = load_app(args.database_url)
+    client = main.app.test_client()
+    requests = endpoint_requests(main, 20)
+    with main.app.app_context():
+        book = main.Book.query.order_by(main.Book.id.desc()).first()
+        seller_id, book_id, publisher_id = book.seller_id, book.id, book.publisher_id
+        engine = main.db.engine
+    # create_order sepeti boşalttığı için en sona kalır
+    requests = catalog_requests(main, client, seller_id, book_id, publisher_id) + requests
+    main.response_cache.backend = None
+
+    failed = False
+    for name, method, url, headers in requests:
+        with count_queries(engine, with_parameters=True) as statements:
+            response = client.open(url, method=method, headers=headers)
+        if response.status_code >= 400:
+            raise RuntimeError(f'{name} {response.status_code}: {response.get_data(as_text=True)}')
+
+        problems = []
+        with engine.connect() as connection:
+            for statement, parameters in statements:
+                if not statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+                    continue
+                if isinstance(parameters, list):
+                    parameters = parameters[0]
+                plan = explain(connection, statement, parameters)
+                scans = full_scans(engine.dialect.name, statement, plan)
+                if scans:
+                    problems.append((statement, plan, scans))
+                elif args.verbose:
+                    print(f'     {name}: ' + ' | '.join(line.strip() for line in plan))
+
+        failed |= bool(problems)
+        print(f"{'FAIL' if problems else 'OK  '} {name:<22} {len(statements)} sorgu")
+        for statement, plan, scans in problems:
+            print(f"     tam tarama: {', '.join(scans)}")
+            print('     ' + ' '.join(statement.split()))
+            for line in plan:
+                print(f'       {line}')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(run())
@@ -0,0 +1,74 @@
+# Google ile giriş akışını ağ olmadan doğrular ve giriş başına doğrulama süresini ölçer.
+#
+#   cd backend && python -m bench.google_auth_offline --logins 200
+#
+# Yerel bir RSA anahtarı üretilir, Google formatında ID token'lar imzalanır ve doğrulayıcının
+# sertifika kaynağı bu anahtarı döndüren bir StaticCertSource ile değiştirilir. Geçerli token,
+# yanlış audience, yanlış yayıncı ve bilinmeyen anahtar durumları kontrol edilir.
+import argparse
+import sys
+import time
+
+import rsa
+from google.auth import crypt, jwt
+
+from bench.common import load_app
+from google_tokens import StaticCertSource
+
+KEY_ID = 'yerel-test-anahtari'
+
+
+def make_token(signer, audience, email, issuer='https://accounts.google.com'):
+    now = int(time.time())
+    return jwt.encode(signer, {
+        'iss': issuer,
+        'aud': audience,
+        'sub': f'google-{email}',
+        'email': email,
+        'name': email.split('@')[0],
+        'iat': now,
+        'exp': now + 3600,
+    }).decode()
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--logins', type=int, default=200)
+    args = parser.parse_args()
+
+    main = load_app()
+    client = main.app.test_client()
+    audience = main.app.config['GOOGLE_CLIENT_ID']
+
+    public_key, private_key = rsa.newkeys(2048)
+    signer = crypt.RSASigner.from_string(private_key.save_pkcs1(), key_id=KEY_ID)
+    main.google_verifier.cert_source = StaticCertSource({KEY_ID: public_key.save_pkcs1().decode()})
+
+    _, other_private = rsa.newkeys(1024)
+    other_signer = crypt.RSASigner.from_string(other_private.save_pkcs1(), key_id='baska-anahtar')
+
+    cases = [
+        ('geçerli token', make_token(signer, audience, 'google@example.com'), 200),
+        ('yanlış audience', make_token(signer, 'baska-uygulama', 'google@example.com'), 401),
+        ('yanlış yayıncı', make_token(signer, audience, 'google@example.com', issuer='evil.example.com'), 401),
+        ('bilinmeyen anahtar', make_token(other_signer, audience, 'google@example.com'), 401),
+    ]
+    failed = False
+    for name, token, expected in cases:
+        status = client.post('/api/auth/google', json={'token': token}).status_code
+        ok = status == expected
+        failed |= not ok
+        print(f"{'OK  ' if ok else 'FAIL'} {name:<20} {status}")
+
+    tokens = [make_token(signer, audience, f'user{i % 20}@example.com') for i in range(args.logins)]
+    started = time.perf_counter()
+    for token in tokens:
+        if client.post('/api/auth/google', json={'token': token}).status_code != 200:
+            failed = True
+    elapsed = time.perf_counter() - started
+    print(f'{args.logins} giriş, {elapsed:.2f} sn, giriş başına {elapsed / args.logins * 1000:.1f} ms')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(run())
@@ -0,0 +1,97 @@
+# Giriş (login) verimi: eşzamanlı girişlerde saniyedeki giriş ve gecikmeler, aynı anda
+# hafif bir endpoint'in gecikmesi ve eski parametreli hash'lerin girişte yenilenmesi ölçülür.
+#
+#   cd backend && python -m bench.login_throughput --logins 400 --threads 16
+#   cd backend && PASSWORD_HASH_METHOD=pbkdf2:sha256:600000 python -m bench.login_throughput
+#
+# Kullanıcılar --legacy-method ile hash'lenir; yapılandırılan yöntem farklıysa girişten sonra
+# tüm hash'lerin yeni yönteme geçmiş olması beklenir, aksi halde script 1 koduyla çıkar.
+import argparse
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash
+
+from bench.common import load_app, percentile
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--logins', type=int, default=400)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--legacy-method', default='pbkdf2:sha256:50000')
+    parser.add_argument('--database-url')
+    args = parser.parse_args()
+
+    main = load_app(args.database_url)
+    client = main.app.test_client()
+    print(f'yöntem: {main.password_hasher.method}, havuz: {main.app.config["PASSWORD_HASH_WORKERS"]} thread')
+
+    with main.app.app_context():
+        main.db.session.bulk_insert_mappings(main.User, [{
+            'name': f'Kullanıcı {i}', 'email': f'login{i}@example.com', 'username': f'login{i}',
+            'password': generate_password_hash('sifre123', args.legacy_method),
+            'role': 'user', 'balance': 0.0, 'token_version': 0
+        } for i in range(args.users)])
+        main.db.session.commit()
+
+    login_latencies = []
+    statuses = {}
+    lock = threading.Lock()
+
+    def login(i):
+        started = time.perf_counter()
+        response = client.post('/api/auth/login', json={
+            'email': f'login{i % args.users}@example.com', 'password': 'sifre123'})
+        with lock:
+            login_latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    # Girişler sürerken hafif bir endpoint'in gecikmesi (hash'ler worker'ları bloke ediyor mu)
+    probe_latencies = []
+    stop = threading.Event()
+
+    def probe():
+        while not stop.is_set():
+            started = time.perf_counter()
+            client.get('/api/publishers')
+            probe_latencies.append(time.perf_counter() - started)
+            time.sleep(0.01)
+
+    probe_thread = threading.Thread(target=probe)
+    probe_thread.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(login, range(args.logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    probe_thread.join()
+
+    print(f'{args.logins} giriş, {args.threads} thread, {elapsed:.2f} sn, {statuses.get(200, 0) / elapsed:.1f} giriş/sn')
+    print(f'durum kodları: {dict(sorted(statuses.items()))}')
+    print(f'giriş gecikmesi p50 {percentile(login_latencies, 0.5) * 1000:.0f} ms, p95 {percentile(login_latencies, 0.95) * 1000:.0f} ms')
+    if probe_latencies:
+        print(f'/api/publishers gecikmesi (girişler sırasında) ortalama '
+              f'{statistics.mean(probe_latencies) * 1000:.0f} ms, p95 {percentile(probe_latencies, 0.95) * 1000:.0f} ms')
+
+    # Arka plandaki yeniden hash'lemelerin bitmesini bekle
+    deadline = time.monotonic() + 30
+    with main.app.app_context():
+        while True:
+            methods = [password.split('$', 1)[0] for (password,) in main.db.session.query(main.User.password).filter(
+                main.User.email.like('login%'))]
+            stale = sum(method != main.password_hasher.method for method in methods)
+            if not stale or time.monotonic() > deadline:
+                break
+            main.db.session.remove()
+            time.sleep(0.2)
+    print(f'yenilenen hash: {len(methods) - stale} / {len(methods)}')
+    return 1 if stale or statuses.get(200, 0) != args.logins else 0
+
+
+if __name__ == '__main__':
+    sys.exit(run())
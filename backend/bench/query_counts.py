@@ -0,0 +1,111 @@
+# Liste endpoint'lerinin çalıştırdığı SQL sayısının veri boyutuyla artmadığını kontrol eder.
+#
+#   cd backend && python -m bench.query_counts
+#
+# Her endpoint küçük ve büyük veri setiyle çağrılır; sorgu sayısı farklıysa N+1 vardır
+# ve script 1 koduyla çıkar.
+import sys
+
+from bench.common import auth_header, count_queries, load_app
+
+SIZES = (2, 20)
+
+
+def seed_user(main, size):
+    db = main.db
+    buyer = main.User(name=f'Alıcı {size}', email=f'buyer{size}@example.com', password='x')
+    db.session.add(buyer)
+    publisher = main.Publisher(name=f'Yayınevi {size}')
+    db.session.add(publisher)
+    db.session.flush()
+
+    books = []
+    sellers = []
+    for i in range(size):
+        # Her kitap farklı satıcıya ait olsun ki satıcı ilişkisi de N kez yüklensin
+        seller = main.User(name=f'Satıcı {size}-{i}', email=f'seller{size}-{i}@example.com', password='x')
+        db.session.add(seller)
+        db.session.flush()
+        sellers.append(seller)
+        book = main.Book(title=f'Kitap {size}-{i}', author='Yazar', price=10.0, stock=1000,
+                         seller_id=seller.id, publisher_id=publisher.id, category='Roman')
+        db.session.add(book)
+        books.append(book)
+    db.session.flush()
+
+    for book in books:
+        order = main.Order(user_id=buyer.id, total_amount=10.0, status='completed')
+        db.session.add(order)
+        db.session.flush()
+        db.session.add(main.OrderItem(order_id=order.id, book_id=book.id, quantity=1, price=10.0))
+        db.session.add(main.Wishlist(user_id=buyer.id, book_id=book.id))
+        # Kullanıcı başına kitap başına tek yorum: alıcı her kitaba, satıcılar ilk kitaba yorum yazar
+        db.session.add(main.Review(user_id=buyer.id, book_id=book.id, rating=5, comment='Güzel'))
+    for seller in sellers[1:]:
+        db.session.add(main.Review(user_id=seller.id, book_id=books[0].id, rating=4, comment='İyi'))
+    db.session.commit()
+    return buyer.id, books[0].id, [book.id for book in books]
+
+
+def fill_cart(main, user_id, book_ids):
+    for book_id in book_ids:
+        main.db.session.add(main.CartItem(user_id=user_id, book_id=book_id, quantity=1))
+    main.db.session.commit()
+
+
+def endpoint_requests(main, size):
+    with main.app.app_context():
+        user_id, reviewed_book_id, book_ids = seed_user(main, size)
+        fill_cart(main, user_id, book_ids)
+    headers = auth_header(main, user_id)
+    admin_headers = auth_header(main, 1)
+
+    requests = [
+        ('view_cart', 'GET', '/api/cart', headers),
+        ('get_orders', 'GET', '/api/orders', headers),
+        ('get_wishlist', 'GET', '/api/wishlist', headers),
+        ('get_reviews', 'GET', f'/api/books/{reviewed_book_id}/reviews', None),
+        ('get_user_reviews', 'GET', '/api/user/reviews', headers),
+        ('admin_get_orders', 'GET', '/api/admin/orders', admin_headers),
+        ('admin_get_books', 'GET', '/api/admin/books', admin_headers),
+        ('admin_get_users', 'GET', '/api/admin/users', admin_headers),
+        ('get_publishers', 'GET', '/api/publishers', None),
+        ('create_order', 'POST', '/api/orders', headers),
+    ]
+    with main.app.app_context():
+        # Token iptal ve kategori tabloları periyodik yüklenir; ölçüme karışmasın diye önceden yükle
+        main.token_versions.get(user_id)
+        main.category_table.rows()
+    return requests
+
+
+def endpoint_counts(main, client, size):
+    requests = endpoint_requests(main, size)
+    counts = {}
+    with main.app.app_context():
+        engine = main.db.engine
+    for name, method, url, request_headers in requests:
+        with count_queries(engine) as statements:
+            response = client.open(url, method=method, headers=request_headers)
+        if response.status_code >= 400:
+            raise RuntimeError(f'{name} {response.status_code}: {response.get_data(as_text=True)}')
+        counts[name] = len(statements)
+    return counts
+
+
+def run():
+    main = load_app()
+    client = main.app.test_client()
+    results = {size: endpoint_counts(main, client, size) for size in SIZES}
+
+    failed = False
+    for name in results[SIZES[0]]:
+        counts = [results[size][name] for size in SIZES]
+        ok = len(set(counts)) == 1
+        failed |= not ok
+        print(f"{'OK  ' if ok else 'FAIL'} {name:<20} " + ' '.join(f'n={size}:{count}' for size, count in zip(SIZES, counts)))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(run())
@@ -0,0 +1,112 @@
+# Arama indeksinin oluşturma süresi ve sorgu gecikmesi (yaygın terimler, önekler, çok kelimeli sorgular).
+#
+#   cd backend && python -m bench.search_latency
+#   cd backend && python -m bench.search_latency --books 100000 --queries 200
+#
+# Kitaplar Zipf dağılımlı Türkçe bir kelime havuzundan üretilir; bu yüzden "roman", "tarih" gibi
+# terimler binlerce kitapta geçer. Sorgu türü başına p50/p95/p99 raporlanır. Sorgulardan herhangi
+# birinin p95'i --max-p95-ms değerini aşarsa script 1 koduyla çıkar.
+import argparse
+import itertools
+import random
+import sys
+import time
+
+from bench.common import percentile
+
+COMMON_WORDS = [
+    'roman', 'tarih', 'aşk', 'savaş', 'hayat', 'insan', 'dünya', 'zaman', 'şehir', 'gece', 'deniz', 'ev',
+    'yol', 'çocuk', 'kadın', 'adam', 'bilim', 'felsefe', 'sanat', 'ölüm', 'rüya', 'yalnızlık', 'kitap',
+    'hikaye', 'büyük', 'küçük', 'son', 'ilk', 'yeni', 'eski', 'kırmızı', 'mavi', 'beyaz', 'kara', 'güneş',
+    'ay', 'yıldız', 'orman', 'dağ', 'nehir', 'köy', 'istanbul', 'anadolu', 'osmanlı', 'cumhuriyet',
+    'ekonomi', 'siyaset', 'psikoloji', 'polisiye', 'macera', 'korku', 'mizah', 'şiir', 'öykü', 'günlük',
+    'mektup', 'anı', 'yolculuk', 'sır', 'cinayet', 'dedektif', 'kalp', 'ruh', 'akıl', 'bilgi', 'düşünce',
+]
+FIRST_NAMES = ['Can', 'Ayşe', 'Mehmet', 'Elif', 'Orhan', 'Zeynep', 'Ahmet', 'Sabahattin', 'Yaşar', 'Sait',
+               'Oğuz', 'Peyami', 'Halide', 'Reşat', 'İlhan', 'Tezer', 'Sevgi', 'Nazım', 'Cemal', 'Ece']
+LAST_NAMES = ['Yılmaz', 'Kaya', 'Demir', 'Şahin', 'Çelik', 'Öztürk', 'Aydın', 'Arslan', 'Doğan', 'Kılıç',
+              'Pamuk', 'Kemal', 'Ali', 'Atay', 'Safa', 'Edib', 'Nuri', 'Özlü', 'Soysal', 'Süreya']
+PUBLISHERS = ['Can Yayınları', 'Yapı Kredi Yayınları', 'İletişim Yayınları', 'Doğan Kitap', 'Everest Yayınları',
+              'Sel Yayıncılık', 'Metis Yayınları', 'Ayrıntı Yayınları', 'Kırmızı Kedi', 'Türkiye İş Bankası']
+CATEGORIES = ['Roman', 'Öykü', 'Şiir', 'Tarih', 'Bilim', 'Felsefe', 'Psikoloji', 'Polisiye', 'Korku', 'Mizah']
+
+QUERIES = {
+    'common_term': ['roman', 'tarih', 'aşk', 'hayat', 'insan'],
+    'prefix': ['ro', 'ta', 'ist', 'kar', 'ya'],
+    'two_words': ['can yay', 'kırmızı ked', 'aşk roman', 'istanbul tarih', 'orhan pam'],
+    'rare_term': ['dedektif cinayet sır', 'nehir köy', 'zeynep şahin', 'mektup anı'],
+}
+
+
+def vocabulary(rng, size=20000):
+    letters = 'abcçdefgğhıijklmnoöprsştuüvyz'
+    words = set(COMMON_WORDS)
+    while len(words) < size:
+        words.add(''.join(rng.choice(letters) for _ in range(rng.randint(4, 10))))
+    return COMMON_WORDS + sorted(words - set(COMMON_WORDS))
+
+
+def generate_books(count, seed=42):
+    rng = random.Random(seed)
+    words = vocabulary(rng)
+    # Zipf benzeri ağırlıklar: ilk kelimeler çok yaygın
+    cum_weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(words))))
+
+    def text(n):
+        return ' '.join(rng.choices(words, cum_weights=cum_weights, k=n))
+
+    for book_id in range(1, count + 1):
+        yield book_id, {
+            'title': text(rng.randint(2, 5)).title(),
+            'author': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+            'description': text(rng.randint(15, 40)),
+            'publisher': rng.choice(PUBLISHERS),
+            'category': rng.choice(CATEGORIES),
+        }
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--books', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=100, help='sorgu türü başına')
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--max-p95-ms', type=float, default=20.0)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    from search import BookSearchIndex
+
+    books = list(generate_books(args.books, args.seed))
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    index = BookSearchIndex()
+    index.bulk_load(books)
+    print(f"{len(index)} kitap indekslendi: {time.perf_counter() - started:.2f} sn "
+          f"({time.process_time() - cpu_started:.2f} sn CPU)")
+
+    # Artımlı güncelleme maliyeti
+    started = time.perf_counter()
+    for book_id, fields in books[:1000]:
+        index.add(book_id, fields)
+    print(f"1000 artımlı güncelleme: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    rng = random.Random(args.seed)
+    failed = False
+    print(f"\n{'sorgu türü':<14} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'sonuç':>6}")
+    for kind, queries in QUERIES.items():
+        latencies = []
+        results = 0
+        for _ in range(args.queries):
+            query = rng.choice(queries)
+            started = time.perf_counter()
+            results += len(index.search(query, limit=args.limit))
+            latencies.append(time.perf_counter() - started)
+        p95 = percentile(latencies, 0.95) * 1000
+        failed = failed or p95 > args.max_p95_ms
+        print(f"{kind:<14} {percentile(latencies, 0.50) * 1000:>8.2f} {p95:>8.2f} "
+              f"{percentile(latencies, 0.99) * 1000:>8.2f} {results / args.queries:>6.1f}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(run())
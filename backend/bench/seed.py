@@ -0,0 +1,128 @@
+# Sentetik veri seti: kullanıcılar, yayınevleri, kitaplar, siparişler ve yorumlar.
+#
+#   cd backend && python -m bench.seed --books 50000 --database-url postgresql://localhost/kitap_bench
+#
+# Satırlar toplu INSERT ile parça parça eklenir; kitap puanları, kategori sayıları ve sıralamalar
+# sonunda yeniden hesaplanır. Aynı --seed aynı veri setini üretir. Tüm kullanıcıların şifresi
+# PASSWORD'dür (yük testinde giriş için).
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from bench.common import load_app
+
+PASSWORD = 'sifre123'
+DEFAULT_SIZES = {'users': 1000, 'publishers': 50, 'books': 5000, 'orders': 5000, 'reviews': 10000}
+CHUNK_SIZE = 5000
+
+
+def add_size_arguments(parser):
+    for name, default in DEFAULT_SIZES.items():
+        parser.add_argument(f'--{name}', type=int, default=default)
+    parser.add_argument('--seed', type=int, default=42)
+
+
+def insert_rows(main, model, rows):
+    # Eklenen satırların id'leri: tek yazıcı olduğu için mevcut en büyük id'den sonrakiler
+    db = main.db
+    last_id = db.session.query(func.coalesce(func.max(model.id), 0)).scalar()
+    for start in range(0, len(rows), CHUNK_SIZE):
+        db.session.bulk_insert_mappings(model, rows[start:start + CHUNK_SIZE])
+    db.session.flush()
+    return [row_id for (row_id,) in db.session.query(model.id).filter(model.id > last_id).order_by(model.id)]
+
+
+def seed_dataset(main, users, publishers, books, orders, reviews, seed=42):
+    db = main.db
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+
+    def past(days):
+        return now - timedelta(seconds=rng.randint(0, days * 86400))
+
+    password = main.password_hasher.hash(PASSWORD)
+    user_ids = insert_rows(main, main.User, [{
+        'name': f'Kullanıcı {i}', 'email': f'bench{seed}-{i}@example.com', 'username': f'bench{seed}_{i}',
+        'password': password, 'role': 'user', 'balance': 0.0, 'token_version': 0, 'created_at': past(730)
+    } for i in range(users)])
+    publisher_ids = insert_rows(main, main.Publisher, [
+        {'name': f'Yayınevi {seed}-{i}'} for i in range(publishers)])
+
+    authors = [f'Yazar {i}' for i in range(max(books // 10, 1))]
+    category_ids = [row.id for row in main.category_table.rows()]
+    book_rows = []
+    book_categories = []
+    for i in range(books):
+        created_at = past(365)
+        category_id = rng.choice(category_ids)
+        book_categories.append(category_id)
+        book_rows.append({
+            'title': f'Kitap {i}', 'author': rng.choice(authors), 'price': round(rng.uniform(20, 300), 2),
+            'stock': rng.randint(200, 1000), 'publisher_id': rng.choice(publisher_ids),
+            'seller_id': rng.choice(user_ids), 'category_list': str(category_id),
+            'description': f'Kitap {i} açıklaması', 'has_image': False, 'image_variants': False,
+            'rating_sum': 0, 'review_count': 0, 'created_at': created_at, 'updated_at': created_at,
+        })
+    book_ids = insert_rows(main, main.Book, book_rows)
+    links = [{'book_id': book_id, 'category_id': category_id, 'position': 0}
+             for book_id, category_id in zip(book_ids, book_categories)]
+    for start in range(0, len(links), CHUNK_SIZE):
+        db.session.bulk_insert_mappings(main.BookCategory, links[start:start + CHUNK_SIZE])
+    prices = {book_id: row['price'] for book_id, row in zip(book_ids, book_rows)}
+
+    order_items = []
+    order_rows = []
+    for _ in range(orders):
+        items = {book_id: rng.randint(1, 3) for book_id in rng.sample(book_ids, min(rng.randint(1, 3), len(book_ids)))}
+        order_items.append(items)
+        order_rows.append({
+            'user_id': rng.choice(user_ids), 'status': 'completed', 'created_at': past(60),
+            'total_amount': round(sum(prices[book_id] * quantity for book_id, quantity in items.items()), 2),
+        })
+    order_ids = insert_rows(main, main.Order, order_rows)
+    insert_rows(main, main.OrderItem, [
+        {'order_id': order_id, 'book_id': book_id, 'quantity': quantity, 'price': prices[book_id]}
+        for order_id, items in zip(order_ids, order_items) for book_id, quantity in items.items()])
+
+    # Kullanıcı başına kitap başına tek yorum
+    reviews = min(reviews, len(user_ids) * len(book_ids))
+    pairs = set()
+    while len(pairs) < reviews:
+        pairs.add((rng.choice(user_ids), rng.choice(book_ids)))
+    review_rows = []
+    for user_id, book_id in sorted(pairs):
+        created_at = past(180)
+        review_rows.append({'user_id': user_id, 'book_id': book_id, 'rating': rng.randint(1, 5),
+                            'comment': 'Deneme yorumu', 'created_at': created_at, 'updated_at': created_at})
+    insert_rows(main, main.Review, review_rows)
+
+    main.bump_table_versions(db.session.connection(), ['publisher', 'review'])
+    db.session.commit()
+    main.backfill_book_ratings()
+    main.backfill_category_counts()
+    main.refresh_rankings()
+    return {'user_ids': user_ids, 'publisher_ids': publisher_ids, 'book_ids': book_ids}
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--database-url')
+    add_size_arguments(parser)
+    args = parser.parse_args()
+
+    main = load_app(args.database_url)
+    started = time.perf_counter()
+    with main.app.app_context():
+        dataset = seed_dataset(main, args.users, args.publishers, args.books, args.orders, args.reviews, args.seed)
+    print(f"{len(dataset['user_ids'])} kullanıcı, {len(dataset['publisher_ids'])} yayınevi, "
+          f"{len(dataset['book_ids'])} kitap, {args.orders} sipariş, {args.reviews} yorum "
+          f"{time.perf_counter() - started:.1f} sn'de eklendi ({main.app.config['SQLALCHEMY_DATABASE_URI']})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(run())
@@ -0,0 +1,88 @@
+# Kullanıcı adı çakışma testi: popüler bir ad için binlerce kayıt varken yeni kayıt
+# kaç sorgu ve ne kadar sürede tamamlanıyor, eşzamanlı kayıtlar benzersiz ad alıyor mu.
+#
+#   cd backend && python -m bench.username_collisions --existing 5000 --threads 8
+#
+# Eski yöntem (her çakışmada bir sorgu) karşılaştırma için aynı veri üzerinde ölçülür.
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.common import count_queries, load_app
+
+
+def seed(main, base, existing):
+    rows = [{'name': base, 'email': f'{base}{i}@seed.example.com', 'password': 'x',
+             'username': base if i == 0 else f'{base}{i}', 'role': 'user', 'balance': 0.0, 'token_version': 0}
+            for i in range(existing)]
+    # Önek olarak eşleşen ama sayı soneki olmayan adlar
+    rows += [{'name': base, 'email': f'{name}@seed.example.com', 'password': 'x', 'username': name,
+              'role': 'user', 'balance': 0.0, 'token_version': 0}
+             for name in (f'{base}_ali', f'{base}x', f'{base}{existing + 5}')]
+    main.db.session.bulk_insert_mappings(main.User, rows)
+    main.db.session.commit()
+
+
+def old_generate_username(main, base):
+    username = base
+    counter = 1
+    while main.User.query.filter_by(username=username).first():
+        username = f"{base}{counter}"
+        counter += 1
+    return username
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--existing', type=int, default=5000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--signups', type=int, default=40)
+    parser.add_argument('--database-url')
+    args = parser.parse_args()
+
+    main = load_app(args.database_url)
+    client = main.app.test_client()
+    base = 'ahmet'
+    failed = False
+
+    with main.app.app_context():
+        seed(main, base, args.existing)
+        engine = main.db.engine
+
+        started = time.perf_counter()
+        with count_queries(engine) as statements:
+            username = main.generate_username('x@example.com', base)
+        elapsed = time.perf_counter() - started
+        print(f'yeni yöntem: {username}, {len(statements)} sorgu, {elapsed * 1000:.1f} ms')
+        if username != f'{base}{args.existing}':
+            print(f'FAIL beklenen {base}{args.existing}')
+            failed = True
+
+        started = time.perf_counter()
+        with count_queries(engine) as statements:
+            username = old_generate_username(main, base)
+        elapsed = time.perf_counter() - started
+        print(f'eski yöntem: {username}, {len(statements)} sorgu, {elapsed * 1000:.1f} ms')
+
+    def signup(i):
+        response = client.post('/api/auth/register', json={
+            'email': f'yeni{i}@example.com', 'password': 'x', 'name': base})
+        return response.status_code, (response.get_json() or {}).get('user', {}).get('username')
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        results = list(pool.map(signup, range(args.signups)))
+    elapsed = time.perf_counter() - started
+
+    usernames = [username for status, username in results if status == 201]
+    print(f'{args.signups} eşzamanlı kayıt, {args.threads} thread, {elapsed:.2f} sn, '
+          f'başarılı: {len(usernames)}, benzersiz ad: {len(set(usernames))}')
+    if len(usernames) != args.signups or len(set(usernames)) != len(usernames):
+        print('FAIL eşzamanlı kayıtlarda hata veya tekrar eden ad')
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(run())
@@ -0,0 +1,283 @@
+# Karışık API yükü: kitap listeleme ve sayfalama, kitap detayı, yorumlar, sepete ekleme,
+# sipariş ve yorum yazma. Endpoint başına p50/p95/p99 gecikme ve saniyedeki istek raporlanır.
+#
+#   cd backend && python -m bench.workload
+#   cd backend && python -m bench.workload --books 20000 --requests 5000 --threads 8 --save-baseline sqlite
+#   cd backend && python -m bench.workload --books 20000 --requests 5000 --threads 8 --compare sqlite
+#   cd backend && python -m bench.workload --database-url postgresql://localhost/kitap_bench --compare postgres
+#   cd backend && python -m bench.workload --url http://127.0.0.1:8000 --database-url postgresql://...
+#
+# Varsayılan olarak uygulama süreç içinde (test client) çalıştırılır; --url verilirse aynı
+# veritabanına bağlı çalışan bir sunucuya (ör. gunicorn) HTTP ile istek atılır.
+# Baseline'lar bench/baselines/<ad>.json olarak saklanır; sqlite.json yukarıdaki --save-baseline
+# ayarlarıyla alınmıştır. --compare ile p95 gecikmesi veya toplam verim --tolerance oranından fazla
+# kötüleşen ya da 5xx veren endpoint varsa script 1 koduyla çıkar. Karşılaştırma aynı makinede ve
+# aynı ayarlarla anlamlıdır; ayarlar farklıysa uyarı verilir.
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from bench.common import load_app, percentile
+from bench.seed import add_size_arguments, seed_dataset
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+
+# İşlem ağırlıkları (gerçek trafikte okuma ağırlıklı)
+WORKLOAD = {
+    'list_books': 30,
+    'list_books_next_page': 8,
+    'get_book': 25,
+    'get_reviews': 10,
+    'add_to_cart': 12,
+    'view_cart': 5,
+    'checkout': 5,
+    'add_review': 5,
+}
+SORTS = ('newest', 'price_asc', 'price_desc', 'title')
+
+# Gecikmesi bu kadar küçük farklar (ms) gürültü sayılır
+MIN_REGRESSION_MS = 1.0
+
+
+class InProcessClient:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, headers=None, json=None):
+        response = self.client.open(path, method=method, headers=headers, json=json)
+        return response.status_code, response.headers
+
+
+class HttpClient:
+    def __init__(self, base_url):
+        import requests
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+
+    def request(self, method, path, headers=None, json=None):
+        response = self.session.request(method, self.base_url + path, headers=headers, json=json)
+        return response.status_code, response.headers
+
+
+class VirtualUser:
+    def __init__(self, client, rng, dataset, categories, token_for, record):
+        self.client = client
+        self.rng = rng
+        self.dataset = dataset
+        self.categories = categories
+        self.record = record
+        self.user_id = rng.choice(dataset['user_ids'])
+        self.headers = token_for(self.user_id)
+        self.cart = 0
+        self.next_cursor = None
+
+    def call(self, name, method, path, headers=None, json=None):
+        started = time.perf_counter()
+        status, response_headers = self.client.request(method, path, headers=headers, json=json)
+        self.record(name, time.perf_counter() - started, status)
+        return status, response_headers
+
+    def list_books(self):
+        query = f'sort={self.rng.choice(SORTS)}&limit=20'
+        if self.rng.random() < 0.3:
+            query += f'&category={self.rng.choice(self.categories)}'
+        _, headers = self.call('list_books', 'GET', f'/api/books?{query}')
+        self.next_cursor = (query, headers.get('X-Next-Cursor'))
+
+    def list_books_next_page(self):
+        if not self.next_cursor or not self.next_cursor[1]:
+            return self.list_books()
+        query, cursor = self.next_cursor
+        _, headers = self.call('list_books_next_page', 'GET', f'/api/books?{query}&cursor={cursor}')
+        self.next_cursor = (query, headers.get('X-Next-Cursor'))
+
+    def get_book(self):
+        self.call('get_book', 'GET', f"/api/books/{self.rng.choice(self.dataset['book_ids'])}")
+
+    def get_reviews(self):
+        self.call('get_reviews', 'GET', f"/api/books/{self.rng.choice(self.dataset['book_ids'])}/reviews")
+
+    def add_to_cart(self):
+        status, _ = self.call('add_to_cart', 'POST', '/api/cart', headers=self.headers, json={
+            'book_id': self.rng.choice(self.dataset['book_ids']), 'quantity': 1})
+        if status == 200:
+            self.cart += 1
+
+    def view_cart(self):
+        self.call('view_cart', 'GET', '/api/cart', headers=self.headers)
+
+    def checkout(self):
+        if not self.cart:
+            self.add_to_cart()
+        status, _ = self.call('checkout', 'POST', '/api/orders', headers=self.headers)
+        if status == 200:
+            self.cart = 0
+
+    def add_review(self):
+        self.call('add_review', 'POST', f"/api/books/{self.rng.choice(self.dataset['book_ids'])}/reviews",
+                  headers=self.headers, json={'rating': self.rng.randint(1, 5), 'comment': 'Yük testi'})
+
+    def step(self):
+        name = self.rng.choices(list(WORKLOAD), weights=list(WORKLOAD.values()))[0]
+        getattr(self, name)()
+
+
+def summarize(latencies, statuses, elapsed):
+    results = {}
+    for name in sorted(latencies):
+        values = latencies[name]
+        results[name] = {
+            'count': len(values),
+            'rps': round(len(values) / elapsed, 2),
+            'p50_ms': round(percentile(values, 0.50) * 1000, 2),
+            'p95_ms': round(percentile(values, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(values, 0.99) * 1000, 2),
+            'client_errors': sum(count for status, count in statuses[name].items() if 400 <= status < 500),
+            'server_errors': sum(count for status, count in statuses[name].items() if status >= 500),
+        }
+    every = [value for values in latencies.values() for value in values]
+    total = {
+        'count': len(every),
+        'rps': round(len(every) / elapsed, 2),
+        'p50_ms': round(percentile(every, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(every, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(every, 0.99) * 1000, 2),
+        'client_errors': sum(result['client_errors'] for result in results.values()),
+        'server_errors': sum(result['server_errors'] for result in results.values()),
+    }
+    return results, total
+
+
+def print_report(results, total):
+    print(f"{'işlem':<22} {'adet':>6} {'istek/sn':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'4xx':>5} {'5xx':>5}")
+    for name, result in list(results.items()) + [('TOPLAM', total)]:
+        print(f"{name:<22} {result['count']:>6} {result['rps']:>9.1f} {result['p50_ms']:>8.1f} "
+              f"{result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f} {result['client_errors']:>5} {result['server_errors']:>5}")
+
+
+def compare(baseline, results, total, config, tolerance):
+    if baseline['config'] != config:
+        changed = sorted(key for key in set(config) | set(baseline['config'])
+                         if config.get(key) != baseline['config'].get(key))
+        print(f"UYARI: baseline farklı ayarlarla alınmış ({', '.join(changed)})")
+    regressions = []
+    print(f"\n{'işlem':<22} {'baseline p95':>13} {'şimdi p95':>10} {'fark':>8}")
+    for name, base in sorted(baseline['results'].items()):
+        current = results.get(name)
+        if current is None:
+            continue
+        change = (current['p95_ms'] - base['p95_ms']) / base['p95_ms'] if base['p95_ms'] else 0.0
+        slower = change > tolerance and current['p95_ms'] - base['p95_ms'] > MIN_REGRESSION_MS
+        failing = current['server_errors'] > base['server_errors']
+        if slower or failing:
+            regressions.append(name)
+        flag = ' GERİLEME' if slower else (' 5xx' if failing else '')
+        print(f"{name:<22} {base['p95_ms']:>13.1f} {current['p95_ms']:>10.1f} {change:>+8.0%}{flag}")
+    base_rps = baseline['total']['rps']
+    rps_change = (total['rps'] - base_rps) / base_rps if base_rps else 0.0
+    if rps_change < -tolerance:
+        regressions.append('TOPLAM istek/sn')
+    print(f"toplam istek/sn: baseline {base_rps:.1f}, şimdi {total['rps']:.1f} ({rps_change:+.0%})")
+    return regressions
+
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--database-url')
+    parser.add_argument('--url', help='çalışan sunucu (verilmezse uygulama süreç içinde çalışır)')
+    add_size_arguments(parser)
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--warmup', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--save-baseline', metavar='AD')
+    parser.add_argument('--compare', metavar='AD')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='izin verilen kötüleşme oranı')
+    args = parser.parse_args()
+
+    main = load_app(args.database_url)
+    started = time.perf_counter()
+    with main.app.app_context():
+        dataset = seed_dataset(main, args.users, args.publishers, args.books, args.orders, args.reviews, args.seed)
+        categories = [row.name for row in main.category_table.rows()]
+    print(f"veri seti {time.perf_counter() - started:.1f} sn'de oluşturuldu: {args.users} kullanıcı, "
+          f"{args.books} kitap, {args.orders} sipariş, {args.reviews} yorum")
+
+    tokens = {}
+    tokens_lock = threading.Lock()
+
+    def token_for(user_id):
+        with tokens_lock:
+            if user_id not in tokens:
+                with main.app.app_context():
+                    token = main.create_user_token(main.db.session.get(main.User, user_id))
+                tokens[user_id] = {'Authorization': f'Bearer {token}'}
+            return tokens[user_id]
+
+    latencies = defaultdict(list)
+    statuses = defaultdict(Counter)
+    lock = threading.Lock()
+    recording = threading.Event()
+
+    def record(name, elapsed, status):
+        if not recording.is_set():
+            return
+        with lock:
+            latencies[name].append(elapsed)
+            statuses[name][status] += 1
+
+    def worker(index, count):
+        client = HttpClient(args.url) if args.url else InProcessClient(main.app)
+        user = VirtualUser(client, random.Random(args.seed * 1000 + index), dataset,
+                           categories, token_for, record)
+        for _ in range(count):
+            user.step()
+
+    def drive(total):
+        per_thread = [total // args.threads + (i < total % args.threads) for i in range(args.threads)]
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            list(pool.map(worker, range(args.threads), per_thread))
+
+    drive(args.warmup)
+    recording.set()
+    started = time.perf_counter()
+    drive(args.requests)
+    elapsed = time.perf_counter() - started
+
+    results, total = summarize(latencies, statuses, elapsed)
+    print(f"{total['count']} istek, {args.threads} thread, {elapsed:.2f} sn, "
+          f"veritabanı: {main.db.engine.dialect.name}, {'HTTP ' + args.url if args.url else 'süreç içi'}\n")
+    print_report(results, total)
+
+    config = {key: getattr(args, key) for key in (
+        'users', 'publishers', 'books', 'orders', 'reviews', 'seed', 'requests', 'threads')}
+    config['database'] = main.db.engine.dialect.name
+    config['target'] = 'http' if args.url else 'in-process'
+
+    failed = total['server_errors'] > 0
+    if args.compare:
+        with open(os.path.join(BASELINE_DIR, f'{args.compare}.json')) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, results, total, config, args.tolerance)
+        if regressions:
+            print(f"GERİLEME: {', '.join(regressions)}")
+            failed = True
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        path = os.path.join(BASELINE_DIR, f'{args.save_baseline}.json')
+        with open(path, 'w') as f:
+            json.dump({'created_at': datetime.utcnow().isoformat(timespec='seconds'), 'config': config,
+                       'results': results, 'total': total}, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        print(f"baseline kaydedildi: {path}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(run())
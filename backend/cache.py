@@ -0,0 +1,211 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, g, make_response, request
+
+
+# Worker içi LRU önbellek (TTL destekli). Etiket sürümleri LRU'dan ayrı tutulur ki
+# tahliye edilen bir sürüm sıfırlanıp eski kaydı geçerli göstermesin.
+class LocalBackend:
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_counters(self, keys):
+        with self._lock:
+            return [self._counters.get(key, 0) for key in keys]
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Tüm gunicorn worker'larının paylaştığı Redis önbelleği
+class RedisBackend:
+    def __init__(self, client, prefix='kitap:cache:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=max(int(ttl), 1))
+
+    def get_counters(self, keys):
+        return [int(value or 0) for value in self.client.mget([self.prefix + key for key in keys])]
+
+    def incr(self, key):
+        return self.client.incr(self.prefix + key)
+
+
+# Testler için Redis yerine kullanılan, aynı arayüze sahip bellek içi istemci
+class InMemoryRedis:
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _alive(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def get(self, key):
+        with self._lock:
+            return self._alive(key)
+
+    def mget(self, keys):
+        with self._lock:
+            return [self._alive(key) for key in keys]
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ex if ex else None)
+        return True
+
+    def incr(self, key):
+        with self._lock:
+            value = int(self._alive(key) or 0) + 1
+            self._data[key] = (str(value).encode(), None)
+            return value
+
+
+# Redis paketi kurulu değil veya sunucuya bağlanılamıyor
+class BackendUnavailable(RuntimeError):
+    pass
+
+
+def create_backend(name, redis_url=None, max_entries=1024):
+    if name == 'local':
+        return LocalBackend(max_entries=max_entries)
+    if name == 'memory':
+        return RedisBackend(InMemoryRedis())
+    if name == 'redis':
+        try:
+            import redis
+        except ImportError:
+            raise BackendUnavailable("CACHE_BACKEND=redis için 'redis' paketi kurulu olmalı")
+        client = redis.Redis.from_url(redis_url)
+        try:
+            client.ping()
+        except redis.RedisError as e:
+            raise BackendUnavailable(f"Redis'e bağlanılamadı ({redis_url}): {e}")
+        return RedisBackend(client)
+    if name == 'none':
+        return None
+    raise ValueError(f"Bilinmeyen önbellek tipi: {name}")
+
+
+# Etiketli yanıt önbelleği. Her kayıt, yazıldığı andaki etiket sürümleriyle saklanır;
+# invalidate() etiket sürümünü artırdığında o etiketi taşıyan tüm kayıtlar geçersiz olur.
+class ResponseCache:
+    def __init__(self, backend=None, default_ttl=60):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._stats_lock = threading.Lock()
+
+    def _count(self, field):
+        with self._stats_lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def _tag_versions(self, tags):
+        return self.backend.get_counters([f'tag:{tag}' for tag in tags])
+
+    def get(self, key, tags):
+        entry = self.backend.get(key)
+        if entry is None:
+            return None
+        versions, value = entry
+        if versions != self._tag_versions(tags):
+            return None
+        return value
+
+    def set(self, key, tags, value, ttl=None):
+        self.backend.set(key, (self._tag_versions(tags), value), ttl or self.default_ttl)
+
+    def invalidate(self, *tags):
+        if self.backend is None:
+            return
+        for tag in tags:
+            self.backend.incr(f'tag:{tag}')
+        self._count('invalidations')
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'backend': type(self.backend).__name__ if self.backend else None,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+            'invalidations': self.invalidations,
+        }
+
+    # Anonim GET endpoint'leri için dekoratör. tags bir liste ya da view argümanlarını
+    # alıp liste döndüren fonksiyon olabilir. Dıştaki koşullu GET'in hesapladığı ETag (g.etag)
+    # anahtara eklenir; veri sürümü değiştiyse eski gövde yeni ETag ile dönmez.
+    def cached(self, tags, ttl=None):
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if self.backend is None or request.method != 'GET':
+                    return fn(*args, **kwargs)
+
+                entry_tags = tags(**kwargs) if callable(tags) else tags
+                key = f'view:{request.full_path}'
+                if g.get('etag'):
+                    key += f'@{g.etag}'
+                cached_value = self.get(key, entry_tags)
+                if cached_value is not None:
+                    self._count('hits')
+                    body, status, headers = cached_value
+                    response = Response(body, status=status, headers=headers)
+                    response.headers['X-Cache'] = 'HIT'
+                    return response
+
+                self._count('misses')
+                response = make_response(fn(*args, **kwargs))
+                if response.status_code == 200:
+                    headers = [(name, value) for name, value in response.headers
+                               if name not in ('Content-Length', 'Set-Cookie')]
+                    self.set(key, entry_tags, (response.get_data(), response.status_code, headers), ttl)
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            return wrapper
+        return decorator
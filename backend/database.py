@@ -0,0 +1,110 @@
+import os
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+
+# Havuzdan bağlantı alma süreleri (yeni bağlantı açma dahil) ve zaman aşımları
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.timeouts = 0
+
+    def record(self, wait, timed_out=False):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self.timeouts += timed_out
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'avg_wait_ms': round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                'max_wait_ms': round(self.max_wait * 1000, 3),
+                'total_wait_seconds': round(self.total_wait, 3),
+                'timeouts': self.timeouts,
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class TimedQueuePool(QueuePool):
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.record(time.perf_counter() - started, timed_out=True)
+            raise
+        pool_metrics.record(time.perf_counter() - started)
+        return connection
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+# Postgres: her gunicorn worker'ı kendi havuzunu açar. Toplam bağlantı
+# WEB_CONCURRENCY x (DB_POOL_SIZE + DB_MAX_OVERFLOW) Postgres max_connections'ı aşmamalı.
+def postgres_options():
+    threads = _env_int('GUNICORN_THREADS', 1)
+    return {
+        'poolclass': TimedQueuePool,
+        # İstek thread'leri + arka plan thread'leri (arama indeksi, iş worker'ı, şifre havuzu)
+        'pool_size': _env_int('DB_POOL_SIZE', threads + 2),
+        'max_overflow': _env_int('DB_MAX_OVERFLOW', max(threads, 2)),
+        'pool_timeout': _env_int('DB_POOL_TIMEOUT', 10),
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': True,
+        'connect_args': {'connect_timeout': 5, 'application_name': 'kitap-market'},
+    }
+
+
+SQLITE_BUSY_TIMEOUT_MS = 5000
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+
+
+# SQLite: bağlantılar havuzda tutulur (SQLAlchemy 1.4 dosya veritabanlarında her seferinde yeniden açar)
+def sqlite_options():
+    return {
+        'poolclass': TimedQueuePool,
+        'pool_size': _env_int('DB_POOL_SIZE', 5),
+        'max_overflow': _env_int('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': _env_int('DB_POOL_TIMEOUT', 10),
+        'connect_args': {'check_same_thread': False, 'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000},
+    }
+
+
+def install_sqlite_pragmas(engine):
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        # WAL: okuyucular yazarı beklemez; NORMAL senkronizasyon WAL ile güvenli ve çok daha hızlı
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute(f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}')
+        cursor.execute(f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}')
+        cursor.close()
+
+
+# DB_PROFILE: auto (URL'den), postgres, sqlite veya default (SQLAlchemy varsayılanları)
+def engine_options(database_url, profile='auto'):
+    url = make_url(database_url)
+    if profile == 'auto':
+        profile = 'postgres' if url.get_backend_name() == 'postgresql' else url.get_backend_name()
+    if profile == 'postgres':
+        return profile, postgres_options()
+    if profile == 'sqlite':
+        if url.database in (None, '', ':memory:'):
+            return 'default', {}
+        return profile, sqlite_options()
+    return 'default', {}
@@ -0,0 +1,101 @@
+import base64
+import json
+import re
+import threading
+import time
+
+import requests as http
+from google.auth import exceptions, jwt
+from google.auth.transport.requests import Request
+
+GOOGLE_CERTS_URL = 'https://www.googleapis.com/oauth2/v1/certs'
+GOOGLE_ISSUERS = ('accounts.google.com', 'https://accounts.google.com')
+
+MAX_AGE_RE = re.compile(r'max-age=(\d+)')
+
+
+# Token başlığındaki anahtar kimliği (imza doğrulanmadan); okunamazsa None
+def token_kid(token):
+    try:
+        header = token.split('.', 1)[0]
+        return json.loads(base64.urlsafe_b64decode(header + '=' * (-len(header) % 4))).get('kid')
+    except (ValueError, AttributeError):
+        return None
+
+
+# Google'ın imza sertifikalarını indirir ve Cache-Control max-age süresince bellekte tutar.
+# Bağlantılar tek bir requests.Session üzerinden yeniden kullanılır. Google anahtarı max-age dolmadan
+# değiştirdiyse token'ın kid'i önbellekte bulunmaz; bu durumda sertifikalar zorla yenilenir, ama en fazla
+# force_refresh_interval saniyede bir (bilinmeyen kid'li token'larla Google'a istek yağdırılamasın).
+class GoogleCertSource:
+    def __init__(self, certs_url=GOOGLE_CERTS_URL, default_ttl=3600, timeout=5, force_refresh_interval=60):
+        self.certs_url = certs_url
+        self.default_ttl = default_ttl
+        self.timeout = timeout
+        self.force_refresh_interval = force_refresh_interval
+        self.request = Request(session=http.Session())
+        self._certs = None
+        self._expires_at = 0
+        self._forced_at = float('-inf')
+        self._lock = threading.Lock()
+        self.fetches = 0
+
+    def _ttl(self, headers):
+        match = MAX_AGE_RE.search(headers.get('cache-control', ''))
+        if not match:
+            return self.default_ttl
+        age = int(headers.get('age', 0) or 0)
+        return max(int(match.group(1)) - age, 0)
+
+    def _fresh(self, kid, now):
+        if self._certs is None or now >= self._expires_at:
+            return False
+        return kid is None or kid in self._certs or now - self._forced_at < self.force_refresh_interval
+
+    def get_certs(self, kid=None):
+        if self._fresh(kid, time.monotonic()):
+            return self._certs
+        with self._lock:
+            now = time.monotonic()
+            if self._fresh(kid, now):
+                return self._certs
+            if self._certs is not None and now < self._expires_at:
+                self._forced_at = now
+            try:
+                response = self.request(self.certs_url, method='GET', timeout=self.timeout)
+                if response.status != 200:
+                    raise exceptions.TransportError(f"Sertifikalar alınamadı: HTTP {response.status}")
+            except exceptions.TransportError:
+                # Google'a ulaşılamazsa süresi dolmuş sertifikalarla devam et
+                if self._certs is not None:
+                    return self._certs
+                raise
+            self.fetches += 1
+            self._certs = json.loads(response.data.decode('utf-8'))
+            self._expires_at = time.monotonic() + self._ttl(
+                {name.lower(): value for name, value in response.headers.items()})
+            return self._certs
+
+
+# Sabit anahtarlar - testlerde yerel üretilmiş anahtarlarla ağsız doğrulama için
+class StaticCertSource:
+    def __init__(self, certs):
+        self.certs = certs
+
+    def get_certs(self, kid=None):
+        return self.certs
+
+
+# Google ID token'ını doğrular; sertifikalar önbellekte olduğu sürece sadece yerel imza kontrolü yapılır
+class GoogleTokenVerifier:
+    def __init__(self, client_id, cert_source, clock_skew=10):
+        self.client_id = client_id
+        self.cert_source = cert_source
+        self.clock_skew = clock_skew
+
+    def verify(self, token):
+        idinfo = jwt.decode(token, certs=self.cert_source.get_certs(token_kid(token)), audience=self.client_id,
+                            clock_skew_in_seconds=self.clock_skew)
+        if idinfo.get('iss') not in GOOGLE_ISSUERS:
+            raise exceptions.GoogleAuthError("Geçersiz token yayıncısı")
+        return idinfo
@@ -0,0 +1,20 @@
+# gunicorn bu dosyayı çalışma klasöründen otomatik okur (gunicorn main:app)
+import os
+import tempfile
+
+from metrics import MultiProcessStore
+
+# Worker sayısı WEB_CONCURRENCY ile ayarlanır (gunicorn varsayılanı)
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+
+# Worker'lar metriklerini bu klasöre yazar, /metrics hepsini toplar
+os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'kitap-market-metrics'))
+
+
+def on_starting(server):
+    # Önceki çalıştırmadan kalan metrikleri temizle
+    MultiProcessStore(os.environ['METRICS_DIR']).clear()
+
+
+def child_exit(server, worker):
+    MultiProcessStore(os.environ['METRICS_DIR']).mark_dead(worker.pid)
@@ -0,0 +1,162 @@
+import hashlib
+import io
+import os
+import re
+import shutil
+import tempfile
+
+from PIL import Image, ImageOps
+
+# Liste ve detay sayfaları için üretilen genişlikler (piksel)
+THUMBNAIL_WIDTHS = (160, 320, 640)
+JPEG_QUALITY = 82
+WEBP_QUALITY = 78
+
+# Sıkıştırma bombalarına karşı en fazla piksel sayısı
+Image.MAX_IMAGE_PIXELS = 40_000_000
+
+# İçerik adresli dosya adı: <sha256>.<uzantı>
+CONTENT_ADDRESSED_RE = re.compile(r'^[0-9a-f]{64}\.(png|jpg|gif)$')
+
+# İçerik adresli orijinaller ve küçük boyutları (<sha256>_<genişlik>.<format>) hiç değişmez
+IMMUTABLE_NAME_RE = re.compile(r'^[0-9a-f]{64}(_\d+)?\.(png|jpg|gif|webp)$')
+
+# Dosya türü uzantıdan değil ilk baytlardan belirlenir
+MAGIC_NUMBERS = (
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+)
+SNIFF_BYTES = 8
+
+CHUNK_SIZE = 64 * 1024
+
+
+def sniff_image_type(head):
+    for magic, extension in MAGIC_NUMBERS:
+        if head.startswith(magic):
+            return extension
+    return None
+
+
+def is_content_addressed(filename):
+    return bool(filename and CONTENT_ADDRESSED_RE.match(filename))
+
+
+def is_immutable(filename):
+    return bool(IMMUTABLE_NAME_RE.match(filename))
+
+
+def variant_name(filename, width, fmt):
+    digest = filename.split('.', 1)[0]
+    return f'{digest}_{width}.{fmt}'
+
+
+def _write_atomic(folder, name, data):
+    _copy_atomic(folder, name, io.BytesIO(data))
+
+
+def _copy_atomic(folder, name, stream):
+    # Yarım yazılmış dosya hiçbir zaman son adıyla görünmesin
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            shutil.copyfileobj(stream, tmp, CHUNK_SIZE)
+        os.replace(tmp_path, os.path.join(folder, name))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _encode(image, fmt):
+    buffer = io.BytesIO()
+    if fmt == 'webp':
+        image.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=4)
+    else:
+        image.save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def _flatten(image):
+    # Şeffaf PNG/GIF'ler JPEG için beyaz zemine oturtulur
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def open_image(data):
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except (OSError, SyntaxError, Image.DecompressionBombError) as e:
+        raise ValueError(f"Geçersiz resim dosyası: {e}")
+    return image
+
+
+# Piksel verisini çözmeden dosya yapısını doğrular (istek içinde düşük bellek)
+def verify_image(stream):
+    try:
+        with Image.open(stream) as image:
+            image.verify()
+    except (OSError, SyntaxError, Image.DecompressionBombError) as e:
+        raise ValueError(f"Geçersiz resim dosyası: {e}")
+    finally:
+        stream.seek(0)
+
+
+def generate_variants(folder, filename, data):
+    image = _flatten(ImageOps.exif_transpose(open_image(data)))
+    for width in THUMBNAIL_WIDTHS:
+        resized = image.copy()
+        # thumbnail() küçük resimleri büyütmez, her genişlik için dosya yine de üretilir
+        resized.thumbnail((width, width * 4), Image.LANCZOS)
+        for fmt in ('webp', 'jpg'):
+            _write_atomic(folder, variant_name(filename, width, fmt), _encode(resized, fmt))
+
+
+# generate_variants en son 640 JPEG'i yazar; o varsa tüm küçük boyutlar hazırdır
+def variants_ready(folder, filename):
+    return os.path.exists(os.path.join(folder, variant_name(filename, THUMBNAIL_WIDTHS[-1], 'jpg')))
+
+
+# Yüklenen resmi içerik hash'i ile kaydeder. Aynı içerik daha önce yüklendiyse diske
+# tekrar yazılmaz. variants=False ise küçük boyutlar üretilmez (arka plan işine bırakılır).
+# Uzantı dosya adından değil içerikten belirlenir. Dosya parça parça okunur. Dosya adını döndürür.
+def store_image_stream(folder, stream, variants=True):
+    stream.seek(0)
+    head = stream.read(SNIFF_BYTES)
+    extension = sniff_image_type(head)
+    if extension is None:
+        raise ValueError("Geçersiz resim dosyası: desteklenmeyen tür")
+
+    digest = hashlib.sha256(head)
+    for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+        digest.update(chunk)
+    stream.seek(0)
+    filename = f'{digest.hexdigest()}.{extension}'
+
+    if os.path.exists(os.path.join(folder, filename)):
+        if variants and not variants_ready(folder, filename):
+            generate_variants(folder, filename, stream.read())
+        return filename
+
+    verify_image(stream)  # Resim değilse hiçbir şey yazmadan hata ver
+    if variants:
+        generate_variants(folder, filename, stream.read())
+        stream.seek(0)
+    _copy_atomic(folder, filename, stream)
+    return filename
+
+
+def store_image(folder, data, variants=True):
+    return store_image_stream(folder, io.BytesIO(data), variants)
+
+
+def srcset(base_url, filename, fmt='webp'):
+    return ', '.join(f'{base_url}/{variant_name(filename, width, fmt)} {width}w'
+                     for width in THUMBNAIL_WIDTHS)
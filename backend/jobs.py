@@ -0,0 +1,140 @@
+import json
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_
+
+
+# Veritabanında tutulan iş kuyruğu. İşler çağıranın transaction'ı ile birlikte commit edilir,
+# böylece kaydedilmemiş bir değişiklik için iş çalışmaz. Worker'lar işi koşullu UPDATE ile
+# sahiplenir; bu SKIP LOCKED gerektirmediği için SQLite ve Postgres'te aynı şekilde çalışır.
+class JobQueue:
+    def __init__(self, db, model, backoff_base=5, backoff_max=3600, lock_timeout=600):
+        self.db = db
+        self.model = model
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lock_timeout = lock_timeout
+        self.handlers = {}
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+
+    def handler(self, kind):
+        def decorator(fn):
+            self.handlers[kind] = fn
+            return fn
+        return decorator
+
+    # İşi oturuma ekler; commit çağırana aittir
+    def enqueue(self, kind, payload=None, delay=0, max_attempts=5):
+        if kind not in self.handlers:
+            raise ValueError(f"Tanımsız iş tipi: {kind}")
+        job = self.model(
+            kind=kind,
+            payload=json.dumps(payload or {}),
+            max_attempts=max_attempts,
+            run_at=datetime.utcnow() + timedelta(seconds=delay)
+        )
+        self.db.session.add(job)
+        return job
+
+    def has_pending(self, kind):
+        Job = self.model
+        return self.db.session.query(Job.id).filter(
+            Job.kind == kind, Job.status.in_(('pending', 'running'))
+        ).first() is not None
+
+    def backoff(self, attempts):
+        delay = min(self.backoff_base * 2 ** (attempts - 1), self.backoff_max)
+        return delay * random.uniform(0.8, 1.2)
+
+    def _claimable(self, now):
+        Job = self.model
+        return or_(
+            and_(Job.status == 'pending', Job.run_at <= now),
+            # Çalışırken ölen worker'ların işleri zaman aşımından sonra tekrar alınır
+            and_(Job.status == 'running', Job.locked_at < now - timedelta(seconds=self.lock_timeout))
+        )
+
+    def claim(self):
+        Job = self.model
+        session = self.db.session
+        now = datetime.utcnow()
+        candidates = session.query(Job.id).filter(self._claimable(now)).order_by(Job.run_at).limit(10).all()
+        for (job_id,) in candidates:
+            claimed = session.query(Job).filter(Job.id == job_id, self._claimable(now)).update({
+                'status': 'running',
+                'locked_at': now,
+                'locked_by': self.worker_id,
+                'attempts': Job.attempts + 1
+            }, synchronize_session=False)
+            session.commit()
+            if claimed:
+                return session.get(Job, job_id)
+        return None
+
+    def run_job(self, job):
+        session = self.db.session
+        try:
+            self.handlers[job.kind](**json.loads(job.payload))
+        except Exception:
+            session.rollback()
+            job = session.get(self.model, job.id)
+            job.last_error = traceback.format_exc()[-2000:]
+            if job.attempts >= job.max_attempts:
+                job.status = 'failed'
+                job.finished_at = datetime.utcnow()
+            else:
+                job.status = 'pending'
+                job.run_at = datetime.utcnow() + timedelta(seconds=self.backoff(job.attempts))
+            session.commit()
+            return False
+        job.status = 'done'
+        job.finished_at = datetime.utcnow()
+        job.last_error = None
+        session.commit()
+        return True
+
+    def run_once(self):
+        job = self.claim()
+        if job is None:
+            return False
+        self.run_job(job)
+        return True
+
+    def purge(self, older_than):
+        Job = self.model
+        deleted = self.db.session.query(Job).filter(
+            Job.status == 'done', Job.finished_at < datetime.utcnow() - older_than
+        ).delete(synchronize_session=False)
+        self.db.session.commit()
+        return deleted
+
+    # schedule: [(saniye, iş_tipi), ...] - bu aralıklarla iş kuyruğa eklenir (bekleyen yoksa)
+    def run_worker(self, app, poll_interval=1.0, schedule=(), stop_event=None):
+        stop_event = stop_event or threading.Event()
+        next_runs = {kind: time.monotonic() + interval * random.uniform(0.1, 1.0)
+                     for interval, kind in schedule if interval > 0}
+        intervals = {kind: interval for interval, kind in schedule}
+
+        while not stop_event.is_set():
+            try:
+                with app.app_context():
+                    now = time.monotonic()
+                    for kind, next_run in next_runs.items():
+                        if now >= next_run:
+                            if not self.has_pending(kind):
+                                self.enqueue(kind)
+                                self.db.session.commit()
+                            next_runs[kind] = now + intervals[kind]
+                    processed = self.run_once()
+                    self.db.session.remove()
+            except Exception:
+                app.logger.exception("İş kuyruğu hatası")
+                processed = False
+            if not processed:
+                stop_event.wait(poll_interval)
@@ -0,0 +1,140 @@
+import atexit
+import json
+import logging
+import queue
+import random
+import re
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, has_request_context, request
+
+# İstemcinin gönderdiği X-Request-ID sadece bu biçimdeyse kullanılır (log satırına enjeksiyon olmasın)
+REQUEST_ID_RE = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+# LogRecord'un kendi alanları; bunların dışındaki alanlar (extra=...) loga eklenir
+RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'request_id'}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in RECORD_FIELDS)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+# Geliştirme için okunabilir biçim; extra alanlar satır sonuna key=value olarak eklenir
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s')
+
+    def formatMessage(self, record):
+        if getattr(record, 'request_id', None) is None:
+            record.request_id = '-'
+        extras = ' '.join(f'{key}={value}' for key, value in vars(record).items() if key not in RECORD_FIELDS)
+        line = super().formatMessage(record)
+        return f'{line} {extras}' if extras else line
+
+
+# İstek kimliğini kayda ekler; örneklemeye girmeyen isteklerin INFO ve altı kayıtları atılır.
+# WARNING ve üstü her zaman yazılır.
+class RequestContextFilter(logging.Filter):
+    def filter(self, record):
+        if not has_request_context():
+            return True
+        record.request_id = g.get('request_id')
+        return record.levelno >= logging.WARNING or g.get('log_sampled', True)
+
+
+# Kayıtlar istek thread'inde sadece kuyruğa konur; yazma işini QueueListener thread'i yapar.
+# Kuyruk doluysa istek beklemez, kayıt atılır ve sayılır.
+class NonBlockingQueueHandler(QueueHandler):
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record):
+        # Mesaj ve traceback bu thread'de metne çevrilir (argümanlar sonradan değişebilir)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+# "get_books=0.01,get_book=0.1" -> {'get_books': 0.01, 'get_book': 0.1}
+def parse_sample_rates(value):
+    rates = {}
+    for item in filter(None, (part.strip() for part in (value or '').split(','))):
+        endpoint, rate = item.split('=')
+        rates[endpoint.strip()] = float(rate)
+    return rates
+
+
+# Kök logger'ı kuyruk üzerinden stdout'a yazacak şekilde ayarlar, istek kimliği ve
+# erişim kaydını (access log) uygulamaya ekler. Handler ve listener döndürülür.
+def setup_logging(app, level='INFO', fmt='json', sample_rates=None, queue_size=10000,
+                  payloads=False, stream=None):
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if fmt == 'json' else TextFormatter())
+    handler = NonBlockingQueueHandler(queue.Queue(queue_size))
+    handler.addFilter(RequestContextFilter())
+    listener = QueueListener(handler.queue, output)
+    listener.start()
+    atexit.register(listener.stop)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+    # Yanıt içeriği dökümleri sadece açıkça istenirse yazılır
+    logging.getLogger('payload').setLevel(logging.DEBUG if payloads else logging.CRITICAL + 1)
+
+    sample_rates = sample_rates or {}
+    access_logger = logging.getLogger('access')
+
+    @app.before_request
+    def assign_request_id():
+        request_id = request.headers.get('X-Request-ID', '')
+        g.request_id = request_id if REQUEST_ID_RE.match(request_id) else uuid.uuid4().hex
+        g.request_started = time.perf_counter()
+        rate = sample_rates.get(request.endpoint, sample_rates.get('*', 1.0))
+        g.log_sampled = rate >= 1.0 or random.random() < rate
+
+    @app.after_request
+    def log_request(response):
+        request_id = g.get('request_id')
+        if request_id:
+            response.headers['X-Request-ID'] = request_id
+        if access_logger.isEnabledFor(logging.INFO) and 'request_started' in g:
+            access_logger.info('%s %s %s', request.method, request.path, response.status_code, extra={
+                'method': request.method,
+                'path': request.path,
+                'endpoint': request.endpoint,
+                'status': response.status_code,
+                'duration_ms': round((time.perf_counter() - g.request_started) * 1000, 2),
+            })
+        return response
+
+    return handler, listener
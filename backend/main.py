@@ -1,34 +1,91 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, g, request, jsonify, send_from_directory, make_response
 from flask_cors import CORS
+import click
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 import os
-from werkzeug.utils import secure_filename
-from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask_jwt_extended import JWTManager, create_access_token, jwt_required, current_user, get_jwt, verify_jwt_in_request
+from werkzeug.utils import safe_join
+from werkzeug.exceptions import HTTPException, NotFound
 from datetime import timedelta
-from google.oauth2 import id_token
-from google.auth.transport import requests
+from google.auth.exceptions import GoogleAuthError
+from google_tokens import GoogleCertSource, GoogleTokenVerifier
 from flask_mail import Mail, Message
 import secrets
 from functools import wraps
 from sqlalchemy.sql import func
+from sqlalchemy import and_, or_, case, event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.pool import QueuePool
 import time
+import json
+import base64
+import threading
+import hashlib
+import hmac
+import random
+import mimetypes
+import tempfile
+import logging
+from collections import defaultdict
+from search import BookSearchIndex
+from cache import BackendUnavailable, ResponseCache, create_backend
+from images import (store_image_stream, sniff_image_type, SNIFF_BYTES, generate_variants, variants_ready,
+                    is_content_addressed, is_immutable, variant_name, srcset)
+from jobs import JobQueue
+from logs import parse_sample_rates, setup_logging
+from metrics import MetricsRegistry, MultiProcessStore, collect, instrument_app, instrument_engine
+from profiling import RequestProfiler
+from migrations import MigrationRunner, create_index_online
+from database import engine_options, install_sqlite_pragmas, pool_metrics
+from passwords import PasswordHasher, PasswordHasherBusy
+from uploads import StreamingUploadRequest, streamed_upload
 
 app = Flask(__name__)
+# Yüklenen dosyalar ayrıştırılırken kontrol edilir (uploads.py)
+app.request_class = StreamingUploadRequest
+
+# Loglar kuyruğa yazılır, arka plandaki thread stdout'a basar (logs.py).
+# LOG_SAMPLE_RATES: yoğun endpoint'lerin INFO kayıtları için örnekleme, örn. "get_books=0.01,*=0.5"
+# LOG_PAYLOADS=1: yanıt içerikleri de loglanır (sadece hata ayıklarken)
+app.config['LOG_LEVEL'] = os.environ.get('LOG_LEVEL', 'INFO').upper()
+app.config['LOG_FORMAT'] = os.environ.get('LOG_FORMAT', 'json')
+app.config['LOG_SAMPLE_RATES'] = parse_sample_rates(os.environ.get('LOG_SAMPLE_RATES'))
+app.config['LOG_PAYLOADS'] = os.environ.get('LOG_PAYLOADS', '').lower() in ('1', 'true')
+log_handler, log_listener = setup_logging(
+    app, level=app.config['LOG_LEVEL'], fmt=app.config['LOG_FORMAT'],
+    sample_rates=app.config['LOG_SAMPLE_RATES'], payloads=app.config['LOG_PAYLOADS'],
+    queue_size=int(os.environ.get('LOG_QUEUE_SIZE', 10000)))
+payload_logger = logging.getLogger('payload')
+
+# Prometheus metrikleri (metrics.py), GET /metrics ile okunur. METRICS_DIR ayarlıysa her süreç
+# metriklerini oraya yazar ve /metrics tüm gunicorn worker'larının toplamını döndürür
+# (gunicorn.conf.py ayarlar). METRICS_TOKEN ayarlıysa "Authorization: Bearer <token>" gerekir.
+app.config['METRICS_DIR'] = os.environ.get('METRICS_DIR')
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+app.config['METRICS_FLUSH_INTERVAL'] = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+metrics = MetricsRegistry()
+instrument_app(app, metrics)
+metrics_store = MultiProcessStore(app.config['METRICS_DIR']) if app.config['METRICS_DIR'] else None
+if metrics_store:
+    metrics.start_flushing(metrics_store, app.config['METRICS_FLUSH_INTERVAL'])
 
 # CORS ayarlarını güncelle
 CORS(app, 
      resources={r"/*": {"origins": ["http://localhost:3000", "https://kitap-market.vercel.app"]}},
      supports_credentials=False,
-     allow_headers=["Content-Type", "Authorization"],
+     allow_headers=["Content-Type", "Authorization", "X-Request-ID", "X-Profile"],
      methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-     expose_headers=["Content-Type", "Authorization"])
+     expose_headers=["Content-Type", "Authorization", "X-Next-Cursor", "X-Request-ID", "X-Profile-Id"])
 
 # Hata yakalama
 @app.errorhandler(Exception)
 def handle_error(error):
-    print("Hata:", str(error))
+    if isinstance(error, HTTPException):
+        app.logger.warning("HTTP hatası: %s", error)
+    else:
+        app.logger.error("İşlenmeyen hata: %s", error, exc_info=error)
     return jsonify({"error": str(error)}), 500
 
 # OPTIONS isteklerini handle et
@@ -38,8 +95,14 @@ def handle_options(path):
     return '', 200
 
 # Dosya yükleme ayarları
-UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
+# Resim küçük boyutları worker sürecinde üretildiği için web ve worker süreçleri bu klasörü ortak görmeli
+# (aynı makine veya ortak disk). Her sürecin ayrı diski olan ortamlarda (ör. Heroku dyno'ları) ya ortak bir
+# disk UPLOAD_FOLDER ile verilir ya da JOBS_RUN_IN_PROCESS=true ile işler web sürecinde çalıştırılır.
+UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+# Dosya başına sınırlar (istek gövdesinin tamamı için MAX_CONTENT_LENGTH)
+BOOK_IMAGE_MAX_SIZE = 10 * 1024 * 1024
+AVATAR_MAX_SIZE = 5 * 1024 * 1024
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
@@ -50,8 +113,40 @@ if database_url and database_url.startswith("postgres://"):
 
 app.config['SQLALCHEMY_DATABASE_URI'] = database_url or 'sqlite:///bookstore.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+# Bağlantı havuzu ve motor ayarları (database.py): auto, postgres, sqlite veya default
+app.config['DB_PROFILE'], app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(
+    app.config['SQLALCHEMY_DATABASE_URI'], os.environ.get('DB_PROFILE', 'auto'))
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # max 16MB
 
+# Arama indeksi en fazla bu sıklıkta (saniye) 'book' tablo sürümüne bakar; sürüm değiştiyse
+# updated_at'i değişen kitaplar arka planda yeniden indekslenir. Diğer worker'larda yapılan
+# değişiklikler bu sayede en geç bu süre sonunda görünür. Geç commit edilen transaction'lar ve
+# worker saat farkları için updated_at penceresi SEARCH_INDEX_SYNC_OVERLAP saniye geriden başlar.
+app.config['SEARCH_INDEX_SYNC_INTERVAL'] = float(os.environ.get('SEARCH_INDEX_SYNC_INTERVAL', 5))
+app.config['SEARCH_INDEX_SYNC_OVERLAP'] = int(os.environ.get('SEARCH_INDEX_SYNC_OVERLAP', 60))
+
+# Yanıt önbelleği: local (worker içi LRU), redis (worker'lar arası ortak),
+# memory (testlerde Redis yerine bellek içi taklit) veya none (kapalı)
+app.config['CACHE_BACKEND'] = os.environ.get('CACHE_BACKEND', 'local')
+app.config['CACHE_REDIS_URL'] = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+app.config['CACHE_DEFAULT_TTL'] = int(os.environ.get('CACHE_DEFAULT_TTL', 30))
+app.config['CACHE_MAX_ENTRIES'] = int(os.environ.get('CACHE_MAX_ENTRIES', 1024))
+
+# Redis kullanılamıyorsa uygulama açılmaya devam eder, worker içi önbelleğe düşülür (uyarı loglanır).
+# Bu durumda bir worker'daki invalidate diğerlerine ulaşmaz, eski yanıtlar en fazla TTL kadar görülebilir.
+def create_cache_backend(name):
+    try:
+        return create_backend(name, app.config['CACHE_REDIS_URL'], app.config['CACHE_MAX_ENTRIES'])
+    except BackendUnavailable as e:
+        app.logger.warning("%s - worker içi önbellek (local) kullanılıyor", e)
+        return create_backend('local', max_entries=app.config['CACHE_MAX_ENTRIES'])
+
+response_cache = ResponseCache(
+    create_cache_backend(app.config['CACHE_BACKEND']),
+    default_ttl=app.config['CACHE_DEFAULT_TTL']
+)
+
 # JWT konfigürasyonu
 app.config['JWT_SECRET_KEY'] = 'your-secret-key'  # Güvenli bir key kullanın
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(days=1)
@@ -61,56 +156,177 @@ app.config['JWT_HEADER_TYPE'] = 'Bearer'
 
 jwt = JWTManager(app)
 
+# İstek profili (profiling.py). Admin token'ıyla "X-Profile: sample" (yığın örnekleme; speedscope ve
+# flamegraph dosyası) veya "X-Profile: cprofile" başlığı gönderilen istekler ve PROFILE_SAMPLE_RATE
+# oranında rastgele istekler profillenir. Dosyalar PROFILE_DIR'e yazılır, /api/admin/profiles ile listelenir.
+app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'kitap-market-profiles'))
+app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+app.config['PROFILE_INTERVAL'] = float(os.environ.get('PROFILE_INTERVAL', 0.001))
+app.config['PROFILE_MAX_FILES'] = int(os.environ.get('PROFILE_MAX_FILES', 200))
+profiler = RequestProfiler(
+    app.config['PROFILE_DIR'], sample_rate=app.config['PROFILE_SAMPLE_RATE'],
+    interval=app.config['PROFILE_INTERVAL'], max_profiles=app.config['PROFILE_MAX_FILES'])
+
+# Profil başlığı sadece admin token'ıyla geçerli (rol token claim'inden okunur)
+def profile_authorized():
+    try:
+        verify_jwt_in_request(optional=True)
+        return get_jwt().get('role') == 'admin'
+    except Exception:
+        return False
+
+profiler.init_app(app, authorize=profile_authorized)
+
+# Şifre hash ayarları. Yöntem değiştirildiğinde (ör. iterasyon artırıldığında) eski hash'ler
+# kullanıcı bir sonraki girişinde arka planda yeni yöntemle güncellenir.
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:260000')
+app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 2))
+app.config['PASSWORD_HASH_MAX_PENDING'] = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 64))
+
+password_hasher = PasswordHasher(
+    app.config['PASSWORD_HASH_METHOD'],
+    max_workers=app.config['PASSWORD_HASH_WORKERS'],
+    max_pending=app.config['PASSWORD_HASH_MAX_PENDING']
+)
+
+def server_busy_response():
+    response = jsonify({"error": "Sunucu yoğun, lütfen tekrar deneyin"})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
 # Uploads klasörü kontrolü
 if not os.path.exists(UPLOAD_FOLDER):
     try:
         os.makedirs(UPLOAD_FOLDER, mode=0o755)
-        print(f"Uploads klasörü oluşturuldu: {UPLOAD_FOLDER}")
+        app.logger.info("Uploads klasörü oluşturuldu: %s", UPLOAD_FOLDER)
     except Exception as e:
-        print(f"Uploads klasörü oluşturma hatası: {str(e)}")
+        app.logger.error("Uploads klasörü oluşturma hatası: %s", e)
 
 # Klasör yetkilerini kontrol et
 try:
     os.chmod(UPLOAD_FOLDER, 0o755)
-    print("Uploads klasörü yetkileri güncellendi")
 except Exception as e:
-    print(f"Uploads klasörü yetki güncelleme hatası: {str(e)}")
+    app.logger.warning("Uploads klasörü yetki güncelleme hatası: %s", e)
 
 db = SQLAlchemy(app)
 
+with app.app_context():
+    if app.config['DB_PROFILE'] == 'sqlite':
+        install_sqlite_pragmas(db.engine)
+    instrument_engine(db.engine, metrics)
+    profiler.instrument_engine(db.engine)
+
 # Mail ayarları
 app.config['MAIL_SERVER'] = os.environ.get('MAIL_SERVER', 'smtp.yandex.com')
 app.config['MAIL_PORT'] = int(os.environ.get('MAIL_PORT', 465))
 app.config['MAIL_USE_SSL'] = os.environ.get('MAIL_USE_SSL', 'True').lower() == 'true'
 app.config['MAIL_USERNAME'] = os.environ.get('MAIL_USERNAME')
 app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD')
+# true ise SMTP'ye bağlanılmaz, gönderilen mailler mail.record_messages() ile yakalanabilir
+app.config['MAIL_SUPPRESS_SEND'] = os.environ.get('MAIL_SUPPRESS_SEND', 'False').lower() == 'true'
 mail = Mail(app)
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+# Ortalama puan, yorumlarda tutulan toplamlardan hesaplanır (ek sorgu yok)
+def book_rating(book):
+    return round(book.rating_sum / book.review_count, 2) if book.review_count else 0
+
+UPLOADS_BASE_URL = 'http://localhost:5000/uploads'
+
+# Kitap resmi URL'i - dosya varlığı yükleme anında has_image ile kaydedilir, listelemede diske bakılmaz
+def book_image_url(book):
+    return f'{UPLOADS_BASE_URL}/{book.image_url}' if book.image_url and book.has_image else None
+
+# Küçük resim ve srcset URL'leri - sadece içerik adresli resimlerde, arka plan işi bunları ürettikten sonra
+def book_image_variants(book):
+    if not (book.has_image and book.image_variants and is_content_addressed(book.image_url)):
+        return {'thumbnail_url': book_image_url(book), 'image_srcset': None}
+    return {
+        'thumbnail_url': f'{UPLOADS_BASE_URL}/{variant_name(book.image_url, 320, "jpg")}',
+        'image_srcset': srcset(UPLOADS_BASE_URL, book.image_url)
+    }
+
 # Yayınevi modeli
 class Publisher(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False, unique=True)
     description = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     books = db.relationship('Book', backref='publisher', lazy=True)
 
+# Kategori modeli - kitap sayısı kitap eklenip silindikçe atomik olarak güncellenir
+class Category(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False, unique=True)
+    book_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Bu kategorideki kitap sayısı
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 # Kitap modeli
 class Book(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
-    author = db.Column(db.String(100), nullable=False)
-    publisher_id = db.Column(db.Integer, db.ForeignKey('publisher.id'))  # Yayınevi ilişkisi
+    author = db.Column(db.String(100), nullable=False, index=True)
+    publisher_id = db.Column(db.Integer, db.ForeignKey('publisher.id'), index=True)  # Yayınevi ilişkisi
     price = db.Column(db.Float, nullable=False)
     stock = db.Column(db.Integer, nullable=False)
     image_url = db.Column(db.String(500))
+    has_image = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())  # Resim dosyası diskte var mı
+    image_variants = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())  # Küçük boyutlar üretildi mi
     description = db.Column(db.Text)  # Kitap açıklaması
-    category = db.Column(db.String(100))  # Kitap kategorisi
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    seller_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)  # Kitabı satan kullanıcı
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)  # Arama indeksi senkronu
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Yorum puanları toplamı
+    review_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    seller_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)  # Kitabı satan kullanıcı
     seller = db.relationship('User', backref='books')  # Kullanıcının kitapları
+    # Kategori id'leri form sırasıyla ("3,7"). Filtre ve sayılar book_category'den gelir; bu kopya kitap
+    # okunurken ek sorgu gerekmesin diye tutulur ve category setter'ında bağlantılarla birlikte yazılır.
+    category_list = db.Column(db.String(200))
+
+    # Sayfalama sıralamaları için (sıralama kolonu, id) indeksleri
+    __table_args__ = (
+        db.Index('ix_book_created_at_id', 'created_at', 'id'),
+        db.Index('ix_book_price_id', 'price', 'id'),
+        db.Index('ix_book_title_id', 'title', 'id'),
+    )
+
+    category_links = db.relationship('BookCategory', order_by='BookCategory.position', cascade='all, delete-orphan')
+
+    # Adlar worker içindeki kategori tablosundan okunur (ek sorgu yok)
+    @property
+    def category_ids(self):
+        return parse_category_list(self.category_list)
+
+    # API'de kategoriler formdaki gibi virgülle ayrılmış tek metin olarak döner ("Roman, Tarih")
+    @property
+    def category(self):
+        names = [category_table.name(category_id) for category_id in self.category_ids]
+        return ', '.join(name for name in names if name) or None
+
+    @category.setter
+    def category(self, value):
+        links = {link.category_id: link for link in self.category_links}
+        category_ids = [category_table.id_for(name) for name in split_categories(value)]
+        category_ids = [category_id for category_id in category_ids if category_id is not None]
+        self.category_links = [links.get(category_id) or BookCategory(category_id=category_id)
+                               for category_id in category_ids]
+        for position, link in enumerate(self.category_links):
+            link.position = position
+        self.category_list = ','.join(map(str, category_ids)) or None
+
+# Kitap-kategori ilişkisi: bir kitap birden çok kategoride olabilir, position formdaki sırayı korur
+class BookCategory(db.Model):
+    book_id = db.Column(db.Integer, db.ForeignKey('book.id', ondelete='CASCADE'), primary_key=True)
+    category_id = db.Column(db.Integer, db.ForeignKey('category.id', ondelete='CASCADE'), primary_key=True)
+    position = db.Column(db.Integer, nullable=False, default=0)
+
+    # Kategori filtresi için (kategori -> kitaplar)
+    __table_args__ = (
+        db.Index('ix_book_category_category_id_book_id', 'category_id', 'book_id'),
+    )
 
 # Sepet modeli
 class CartItem(db.Model):
@@ -122,24 +338,67 @@ class CartItem(db.Model):
     user = db.relationship('User', backref='cart_items')
     book = db.relationship('Book')
 
+    __table_args__ = (
+        db.Index('uq_cart_item_user_book', 'user_id', 'book_id', unique=True),
+    )
+
 # Sipariş modeli
 class Order(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     total_amount = db.Column(db.Float, nullable=False)
     status = db.Column(db.String(50), default='pending')  # pending, completed, cancelled
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     user = db.relationship('User', backref='orders')
     items = db.relationship('OrderItem', backref='order')
 
+    __table_args__ = (
+        db.Index('ix_order_user_created_at', 'user_id', 'created_at'),
+    )
+
 class OrderItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False)
-    book_id = db.Column(db.Integer, db.ForeignKey('book.id'), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False, index=True)
+    book_id = db.Column(db.Integer, db.ForeignKey('book.id'), nullable=False, index=True)
     quantity = db.Column(db.Integer, nullable=False)
     price = db.Column(db.Float, nullable=False)  # Sipariş anındaki fiyat
     book = db.relationship('Book')
 
+# Önceden hesaplanmış sıralamalar (çok satanlar, trend, en beğenilenler)
+class BookRanking(db.Model):
+    kind = db.Column(db.String(30), primary_key=True)  # trending_24h, trending_7d, bestseller_30d, top_rated
+    rank = db.Column(db.Integer, primary_key=True)
+    book_id = db.Column(db.Integer, db.ForeignKey('book.id', ondelete='CASCADE'), nullable=False)
+    score = db.Column(db.Float, nullable=False)  # satış adedi veya ortalama puan
+    volume = db.Column(db.Integer, nullable=False, default=0)  # sipariş veya yorum sayısı
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    book = db.relationship('Book')
+
+# Arka plan işleri - worker.py tarafından istek dışında çalıştırılır
+class Job(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False, index=True)  # send_email, generate_image_variants, ...
+    payload = db.Column(db.Text, nullable=False, default='{}')  # JSON
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, done, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # Bu zamandan önce çalıştırılmaz
+    locked_at = db.Column(db.DateTime)
+    locked_by = db.Column(db.String(100))
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_job_status_run_at', 'status', 'run_at'),
+    )
+
+job_queue = JobQueue(
+    db, Job,
+    backoff_base=int(os.environ.get('JOBS_BACKOFF_BASE', 5)),
+    lock_timeout=int(os.environ.get('JOBS_LOCK_TIMEOUT', 600))
+)
+
 # Kullanıcı modeli
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -152,22 +411,72 @@ class User(db.Model):
     google_id = db.Column(db.String(100), unique=True, nullable=True)
     balance = db.Column(db.Float, default=0.0)
     avatar = db.Column(db.String(200), nullable=True)
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Artırılınca eski token'lar geçersiz olur
 
     def __init__(self, **kwargs):
         super(User, self).__init__(**kwargs)
         if not self.username:
-            base = self.email.split('@')[0]
-            username = base
-            counter = 1
-            while User.query.filter_by(username=username).first():
-                username = f"{base}{counter}"
-                counter += 1
-            self.username = username
+            self.username = generate_username(self.email)
+
+# Tablo sürüm sayaçları - ETag'ler bu sayaçlardan üretilir, yanıt gövdesi hash'lenmez
+class TableVersion(db.Model):
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+# 'user': kitap detayı (satıcı adı) ve yorumlar (kullanıcı adı, avatar) kullanıcı alanlarını içerir
+VERSIONED_TABLES = ('book', 'publisher', 'review', 'category', 'user')
+
+def bump_table_versions(connection, names):
+    table = TableVersion.__table__
+    for name in sorted(names):
+        result = connection.execute(
+            table.update().where(table.c.name == name).values(version=table.c.version + 1))
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(name=name, version=1))
+
+# ORM üzerinden yapılan her değişiklikte ilgili tablonun sürümünü aynı transaction içinde artır.
+# Toplu (Core) UPDATE'ler bu olaydan geçmez, onlar bump_table_versions'ı kendisi çağırır.
+@event.listens_for(db.session, 'after_flush')
+def bump_versions_after_flush(session, flush_context):
+    changed = {
+        obj.__table__.name
+        for obj in list(session.new) + list(session.deleted) + [
+            obj for obj in session.dirty if session.is_modified(obj)]
+        if getattr(obj, '__table__', None) is not None and obj.__table__.name in VERSIONED_TABLES
+    }
+    if changed:
+        bump_table_versions(session.connection(), changed)
+
+def current_etag(tables):
+    versions = dict(db.session.query(TableVersion.name, TableVersion.version).filter(
+        TableVersion.name.in_(tables)))
+    path_hash = hashlib.sha1(request.full_path.encode()).hexdigest()[:16]
+    return '-'.join(str(versions.get(name, 0)) for name in tables) + '-' + path_hash
+
+# Koşullu GET: If-None-Match eşleşirse view hiç çalışmadan 304 döner.
+# Veritabanında tutulmayan veriler için etag_func ile ETag ayrıca hesaplanabilir.
+def conditional_get(*tables, etag_func=None):
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            etag = etag_func() if etag_func else current_etag(tables)
+            # response_cache.cached önbellek anahtarına ekler
+            g.etag = etag
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+                response.set_etag(etag)
+                return response
+            response = make_response(fn(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag)
+            return response
+        return decorator
+    return wrapper
 
 # JWT hata yönetimi
 @jwt.invalid_token_loader
 def invalid_token_callback(error):
-    print("Invalid token:", error)
+    app.logger.info("Geçersiz token: %s", error)
     return jsonify({
         "error": "Invalid token",
         "message": "Token geçersiz"
@@ -175,7 +484,7 @@ def invalid_token_callback(error):
 
 @jwt.unauthorized_loader
 def unauthorized_callback(error):
-    print("No token:", error)
+    app.logger.info("Token bulunamadı: %s", error)
     return jsonify({
         "error": "No token provided",
         "message": "Token bulunamadı"
@@ -183,30 +492,93 @@ def unauthorized_callback(error):
 
 @jwt.expired_token_loader
 def expired_token_callback(jwt_header, jwt_payload):
-    print("Token expired")
     return jsonify({
         "error": "Token expired",
         "message": "Token süresi dolmuş"
     }), 401
 
+# Token geçerli ama kullanıcı satırı yok (silinmiş kullanıcı)
+def user_not_found_response():
+    return jsonify({
+        "error": "User not found",
+        "message": "Kullanıcı bulunamadı"
+    }), 401
+
+@jwt.user_lookup_error_loader
+def user_lookup_error_callback(jwt_header, jwt_payload):
+    return user_not_found_response()
+
+@jwt.revoked_token_loader
+def revoked_token_callback(jwt_header, jwt_payload):
+    return jsonify({
+        "error": "Token revoked",
+        "message": "Token iptal edilmiş"
+    }), 401
+
+# Token'lara rol ve sürüm claim'leri eklenir; yetki kontrolü veritabanına gitmeden yapılır
+def create_user_token(user):
+    return create_access_token(identity=user.id, additional_claims={
+        'role': user.role or 'user',
+        'ver': user.token_version or 0
+    })
+
+# İptal tablosu: sadece token_version'ı 0'dan büyük kullanıcılar bellekte tutulur ve
+# TOKEN_VERSION_REFRESH saniyede bir veritabanından yenilenir. Diğer worker'larda yapılan
+# iptaller en geç bu süre sonunda geçerli olur.
+app.config['TOKEN_VERSION_REFRESH'] = int(os.environ.get('TOKEN_VERSION_REFRESH', 30))
+
+class TokenVersionTable:
+    def __init__(self, refresh_interval):
+        self.refresh_interval = refresh_interval
+        self._versions = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _stale(self):
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_interval
+
+    def get(self, user_id):
+        if self._stale():
+            with self._lock:
+                if self._stale():
+                    self._versions = dict(db.session.query(User.id, User.token_version).filter(
+                        User.token_version > 0).all())
+                    self._loaded_at = time.monotonic()
+        return self._versions.get(user_id, 0)
+
+    def set(self, user_id, version):
+        self._versions[user_id] = version
+
+token_versions = TokenVersionTable(app.config['TOKEN_VERSION_REFRESH'])
+
+@jwt.token_in_blocklist_loader
+def check_token_version(jwt_header, jwt_payload):
+    try:
+        user_id = int(jwt_payload['sub'])
+    except (ValueError, TypeError):
+        return True
+    # Sürüm claim'i olmayan eski token'lar 0 kabul edilir
+    return jwt_payload.get('ver', 0) < token_versions.get(user_id)
+
+# Kullanıcının tüm token'larını iptal eder (rol değişikliği, şifre sıfırlama, hesap ele geçirilmesi)
+def revoke_user_tokens(user):
+    user.token_version = User.token_version + 1
+    db.session.commit()
+    token_versions.set(user.id, user.token_version)
+
 # Admin yetkisi kontrolü için decorator
 def admin_required():
     def wrapper(fn):
         @wraps(fn)
         def decorator(*args, **kwargs):
             try:
-                current_user_id = get_jwt_identity()
-                user = User.query.get(int(current_user_id))  # String'i int'e çevir
-                
-                if not user:
-                    return jsonify({"error": "Kullanıcı bulunamadı"}), 404
-                    
-                if user.role != 'admin':
+                # Rol token'daki claim'den gelir (user_lookup_callback), sorgu yapılmaz
+                if current_user.role != 'admin':
                     return jsonify({"error": "Bu işlem için admin yetkisi gerekli"}), 403
                     
                 return fn(*args, **kwargs)
-            except Exception as e:
-                print("Admin yetki kontrolü hatası:", str(e))
+            except Exception:
+                app.logger.exception("Admin yetki kontrolü hatası")
                 return jsonify({"error": "Yetkilendirme hatası"}), 401
                 
         return decorator
@@ -219,17 +591,22 @@ def home():
 
 # Yayınevlerini listele
 @app.route('/api/publishers', methods=['GET'])
+@conditional_get('publisher', 'book')
+@response_cache.cached(tags=['publishers', 'books'])
 def get_publishers():
     try:
-        publishers = Publisher.query.all()
+        # Kitap sayıları tek GROUP BY sorgusuyla hesaplanır
+        publishers = db.session.query(Publisher, func.count(Book.id)).outerjoin(
+            Book, Book.publisher_id == Publisher.id
+        ).group_by(Publisher.id).all()
         return jsonify([{
             'id': pub.id,
             'name': pub.name,
             'description': pub.description,
-            'book_count': len(pub.books)
-        } for pub in publishers])
+            'book_count': book_count
+        } for pub, book_count in publishers])
     except Exception as e:
-        print("Yayınevleri listelenemedi:", str(e))
+        app.logger.exception("Yayınevleri listelenemedi")
         return jsonify({"error": str(e)}), 500
 
 # Yayınevi ekle (admin için)
@@ -245,6 +622,7 @@ def add_publisher():
         )
         db.session.add(publisher)
         db.session.commit()
+        response_cache.invalidate('publishers')
         return jsonify({
             'id': publisher.id,
             'name': publisher.name,
@@ -254,32 +632,271 @@ def add_publisher():
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
-# Kitapları listele - image_url kontrolü ekle
+# Kitap listesi sayfalama ayarları
+BOOKS_PAGE_SIZE = 24
+BOOKS_MAX_PAGE_SIZE = 100
+
+# Sıralama seçenekleri: (kolon, azalan mı)
+BOOK_SORTS = {
+    'newest': (Book.created_at, True),
+    'oldest': (Book.created_at, False),
+    'price_asc': (Book.price, False),
+    'price_desc': (Book.price, True),
+    'title': (Book.title, False),
+}
+
+# Kitap listelerinde kullanılan ortak alanlar
+def book_list_item(book):
+    return {
+        'id': book.id,
+        'title': book.title,
+        'author': book.author,
+        'price': book.price,
+        'stock': book.stock,
+        'image_url': book_image_url(book),
+        **book_image_variants(book),
+        'description': book.description,
+        'category': book.category,
+        'rating': book_rating(book),
+        'review_count': book.review_count
+    }
+
+def encode_cursor(value, last_id):
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([value, last_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor, column):
+    raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+    value, last_id = json.loads(raw)
+    if column is Book.created_at:
+        value = datetime.fromisoformat(value)
+    return value, int(last_id)
+
+# Admin listeleri için id'ye göre (yeniden eskiye) imleçli sayfalama
+ADMIN_PAGE_SIZE = 50
+
+def paginate_by_id(query, model):
+    limit = min(max(int(request.args.get('limit', ADMIN_PAGE_SIZE)), 1), BOOKS_MAX_PAGE_SIZE)
+    if request.args.get('cursor'):
+        _, last_id = decode_cursor(request.args['cursor'], model.id)
+        query = query.filter(model.id < last_id)
+    items = query.order_by(model.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_cursor(None, items[limit - 1].id) if len(items) > limit else None
+    return items[:limit], next_cursor
+
+def paginated_response(data, next_cursor):
+    response = jsonify(data)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+# (kolon, id) ikilisine göre keyset koşulu
+def keyset_condition(column, descending, value, last_id):
+    if descending:
+        return or_(column < value, and_(column == value, Book.id < last_id))
+    return or_(column > value, and_(column == value, Book.id > last_id))
+
+# Kitapları listele - filtreli, sıralı ve imleç (cursor) ile sayfalı
 @app.route('/api/books', methods=['GET'])
+@conditional_get('book')
+@response_cache.cached(tags=['books'])
 def get_books():
     try:
-        books = Book.query.all()
-        return jsonify([{
-            'id': book.id,
+        args = request.args
+        sort = args.get('sort', 'newest')
+        if sort not in BOOK_SORTS:
+            return jsonify({"error": "Geçersiz sıralama"}), 400
+        column, descending = BOOK_SORTS[sort]
+
+        try:
+            limit = min(max(int(args.get('limit', BOOKS_PAGE_SIZE)), 1), BOOKS_MAX_PAGE_SIZE)
+            min_price = float(args['min_price']) if args.get('min_price') else None
+            max_price = float(args['max_price']) if args.get('max_price') else None
+            publisher_id = int(args['publisher_id']) if args.get('publisher_id') else None
+        except ValueError:
+            return jsonify({"error": "Geçersiz filtre değeri"}), 400
+
+        query = Book.query
+        categories = args.getlist('category')
+        if categories:
+            # Kitap seçilen kategorilerden herhangi birindeyse eşleşir; bilinmeyen adlar sonuç döndürmez
+            category_ids = [category_table.id_for(name) for name in categories]
+            query = query.filter(Book.id.in_(db.select(BookCategory.book_id).where(BookCategory.category_id.in_(
+                [category_id for category_id in category_ids if category_id is not None]))))
+        if args.get('author'):
+            query = query.filter(Book.author == args['author'])
+        if publisher_id is not None:
+            query = query.filter(Book.publisher_id == publisher_id)
+        if min_price is not None:
+            query = query.filter(Book.price >= min_price)
+        if max_price is not None:
+            query = query.filter(Book.price <= max_price)
+        if args.get('in_stock', '').lower() in ('1', 'true'):
+            query = query.filter(Book.stock > 0)
+
+        if args.get('cursor'):
+            try:
+                value, last_id = decode_cursor(args['cursor'], column)
+            except (ValueError, TypeError):
+                return jsonify({"error": "Geçersiz sayfa imleci"}), 400
+            query = query.filter(keyset_condition(column, descending, value, last_id))
+
+        if descending:
+            query = query.order_by(column.desc(), Book.id.desc())
+        else:
+            query = query.order_by(column.asc(), Book.id.asc())
+
+        # Sonraki sayfa olup olmadığını anlamak için bir fazla kayıt çek
+        books = query.limit(limit + 1).all()
+        has_more = len(books) > limit
+        books = books[:limit]
+
+        response = jsonify([book_list_item(book) for book in books])
+        if has_more:
+            last = books[-1]
+            response.headers['X-Next-Cursor'] = encode_cursor(getattr(last, column.key), last.id)
+        return response
+    except Exception as e:
+        app.logger.exception("Kitap listeleme hatası")
+        return jsonify({"error": str(e)}), 500
+
+# Arama indeksi (worker başına bellekte tutulur). İlk arama indeksi arka planda oluşturmaya başlar,
+# hazır olana kadar aramalar SQL ile yapılır. Sonrasında tam yeniden oluşturma yapılmaz, değişiklikler
+# sync_search_index ile artımlı uygulanır.
+SEARCH_INDEX = {'index': None, 'version': None, 'synced_from': None, 'checked_at': 0.0, 'busy': False}
+search_index_lock = threading.Lock()
+
+def book_table_version():
+    return db.session.query(TableVersion.version).filter_by(name='book').scalar() or 0
+
+def search_documents(*criteria):
+    rows = db.session.query(
+        Book.id, Book.title, Book.author, Book.description, Book.category_list, Publisher.name
+    ).outerjoin(Publisher, Book.publisher_id == Publisher.id).filter(*criteria).yield_per(1000)
+    for book_id, title, author, description, category_list, publisher_name in rows:
+        yield book_id, {
+            'title': title,
+            'author': author,
+            'description': description,
+            'category': ' '.join(category_table.name(category_id) or '' for category_id in parse_category_list(category_list)),
+            'publisher': publisher_name
+        }
+
+# since'ten (eksi örtüşme payı) sonra değişen kitapları yeniden indeksle, silinenleri çıkar.
+# Okunan sürüm ve başlangıç zamanı döner; bir sonraki senkron buradan devam eder.
+def sync_search_index(index, since):
+    started = datetime.utcnow()
+    version = book_table_version()
+    window = since - timedelta(seconds=app.config['SEARCH_INDEX_SYNC_OVERLAP'])
+    for book_id, fields in search_documents(Book.updated_at >= window):
+        index.add(book_id, fields)
+    # İndeksin kopyası sorgudan önce alınır; arada bu worker'da eklenen kitaplar silinmiş sayılmasın
+    indexed = index.ids()
+    existing = {book_id for (book_id,) in db.session.query(Book.id)}
+    for book_id in indexed - existing:
+        index.remove(book_id)
+    return version, started
+
+def build_search_index():
+    started = datetime.utcnow()
+    index = BookSearchIndex()
+    index.bulk_load(search_documents())
+    # Oluşturma sürerken commit edilen yazılar kaybolmasın
+    version, synced_from = sync_search_index(index, started)
+    return index, version, synced_from
+
+def refresh_search_index_in_background():
+    def run():
+        try:
+            with app.app_context():
+                if SEARCH_INDEX['index'] is None:
+                    index, version, synced_from = build_search_index()
+                    SEARCH_INDEX['index'] = index
+                else:
+                    version, synced_from = sync_search_index(SEARCH_INDEX['index'], SEARCH_INDEX['synced_from'])
+                SEARCH_INDEX['version'] = version
+                SEARCH_INDEX['synced_from'] = synced_from
+        except Exception:
+            app.logger.exception("Arama indeksi güncelleme hatası")
+        finally:
+            SEARCH_INDEX['busy'] = False
+
+    threading.Thread(target=run, daemon=True).start()
+
+# İndeks henüz hazır değilse None döner
+def get_search_index():
+    with search_index_lock:
+        if SEARCH_INDEX['busy']:
+            return SEARCH_INDEX['index']
+        if SEARCH_INDEX['index'] is None:
+            SEARCH_INDEX['busy'] = True
+            refresh_search_index_in_background()
+        elif time.time() - SEARCH_INDEX['checked_at'] >= app.config['SEARCH_INDEX_SYNC_INTERVAL']:
+            SEARCH_INDEX['checked_at'] = time.time()
+            if book_table_version() != SEARCH_INDEX['version']:
+                SEARCH_INDEX['busy'] = True
+                refresh_search_index_in_background()
+    return SEARCH_INDEX['index']
+
+# Commit sonrası indeksi artımlı güncelle
+def index_book(book):
+    if SEARCH_INDEX['index'] is not None:
+        SEARCH_INDEX['index'].add(book.id, {
             'title': book.title,
             'author': book.author,
-            'price': book.price,
-            'stock': book.stock,
-            'image_url': f'http://localhost:5000/uploads/{book.image_url}' if book.image_url and os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], book.image_url)) else None,
             'description': book.description,
-            'category': book.category
-        } for book in books])
+            'category': book.category,
+            'publisher': book.publisher.name if book.publisher else None
+        })
+
+def unindex_book(book_id):
+    if SEARCH_INDEX['index'] is not None:
+        SEARCH_INDEX['index'].remove(book_id)
+
+# Kitap arama (başlık, yazar, açıklama, yayınevi ve kategoride)
+@app.route('/api/books/search', methods=['GET'])
+def search_books():
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify([])
+        try:
+            limit = min(max(int(request.args.get('limit', 20)), 1), BOOKS_MAX_PAGE_SIZE)
+        except ValueError:
+            return jsonify({"error": "Geçersiz filtre değeri"}), 400
+        prefix = request.args.get('prefix', 'true').lower() in ('1', 'true')
+
+        index = get_search_index()
+        if index is None:
+            # İndeks arka planda hazırlanıyor: başlık ve yazarda basit arama, puan yok
+            pattern = '%' + query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            books = Book.query.filter(or_(
+                Book.title.ilike(pattern, escape='\\'), Book.author.ilike(pattern, escape='\\')
+            )).order_by(Book.id.desc()).limit(limit).all()
+            return jsonify([dict(book_list_item(book), score=None) for book in books])
+
+        ranked = index.search(query, limit=limit, prefix=prefix)
+        if not ranked:
+            return jsonify([])
+
+        books = {book.id: book for book in Book.query.filter(Book.id.in_([book_id for book_id, _ in ranked]))}
+        return jsonify([
+            dict(book_list_item(books[book_id]), score=round(score, 4))
+            for book_id, score in ranked if book_id in books
+        ])
     except Exception as e:
-        print("Kitap listeleme hatası:", str(e))
+        app.logger.exception("Kitap arama hatası")
         return jsonify({"error": str(e)}), 500
 
 # Kitap ekleme endpoint'i
 @app.route('/api/books', methods=['POST'])
 @jwt_required()
+@streamed_upload(BOOK_IMAGE_MAX_SIZE, ALLOWED_EXTENSIONS, sniff_image_type, SNIFF_BYTES)
 def add_book():
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = current_user
 
         # Form verilerini al
         title = request.form.get('title')
@@ -294,6 +911,8 @@ def add_book():
         # Zorunlu alanları kontrol et
         if not all([title, author, price, stock]):
             return jsonify({"error": "Eksik bilgi"}), 400
+        if any(category_table.id_for(name) is None for name in split_categories(category)):
+            return jsonify({"error": "Geçersiz kategori"}), 400
 
         # Yayınevi kontrolü
         if publisher_id:
@@ -307,7 +926,8 @@ def add_book():
                 description=f"{new_publisher} yayınevi"
             )
             db.session.add(publisher)
-            db.session.commit()
+            # Sadece id için flush; resim geçersizse rollback ile yayınevi de geri alınır, tek commit aşağıda
+            db.session.flush()
         else:
             return jsonify({"error": "Yayınevi bilgisi gerekli"}), 400
 
@@ -327,13 +947,19 @@ def add_book():
         if 'image' in request.files:
             file = request.files['image']
             if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                unique_filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{filename}"
-                file.save(os.path.join(app.config['UPLOAD_FOLDER'], unique_filename))
-                book.image_url = unique_filename
+                try:
+                    book.image_url, book.image_variants = save_upload(file)
+                except ValueError:
+                    db.session.rollback()
+                    return jsonify({"error": "Geçersiz resim dosyası"}), 400
+                book.has_image = True
 
         db.session.add(book)
+        adjust_category_counts(book.category_ids, 1)
         db.session.commit()
+        category_table.invalidate()
+        index_book(book)
+        response_cache.invalidate('books', 'publishers')
 
         return jsonify({
             'id': book.id,
@@ -344,12 +970,12 @@ def add_book():
             'stock': book.stock,
             'category': book.category,
             'description': book.description,
-            'image_url': f'http://localhost:5000/uploads/{book.image_url}' if book.image_url else None
+            'image_url': book_image_url(book)
         }), 201
 
     except Exception as e:
         db.session.rollback()
-        print("Kitap ekleme hatası:", str(e))
+        app.logger.exception("Kitap ekleme hatası")
         return jsonify({"error": str(e)}), 500
 
 # Kitap silme endpoint'i
@@ -358,7 +984,11 @@ def delete_book(id):
     try:
         book = Book.query.get_or_404(id)
         db.session.delete(book)
+        adjust_category_counts(book.category_ids, -1)
         db.session.commit()
+        category_table.invalidate()
+        unindex_book(id)
+        response_cache.invalidate('books', f'book:{id}')
         return jsonify({"message": "Kitap başarıyla silindi"}), 200
     except Exception as e:
         db.session.rollback()
@@ -366,6 +996,7 @@ def delete_book(id):
 
 # Resim yükleme endpoint'i
 @app.route('/api/upload', methods=['POST'])
+@streamed_upload(BOOK_IMAGE_MAX_SIZE, ALLOWED_EXTENSIONS, sniff_image_type, SNIFF_BYTES)
 def upload_file():
     try:
         if 'file' not in request.files:
@@ -376,56 +1007,93 @@ def upload_file():
             return jsonify({"error": "Dosya seçilmedi"}), 400
         
         if file and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(file_path)
+            try:
+                filename, variants = save_upload(file)
+            except ValueError:
+                return jsonify({"error": "Geçersiz resim dosyası"}), 400
+            db.session.commit()
             return jsonify({
                 "message": "Dosya başarıyla yüklendi",
-                "image_url": f"/uploads/{filename}"
+                "image_url": f"/uploads/{filename}",
+                # Küçük boyutlar henüz üretilmediyse srcset verilmez
+                "image_srcset": srcset('/uploads', filename) if variants else None
             }), 200
         return jsonify({"error": "Geçersiz dosya tipi"}), 400
     except Exception as e:
+        db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
-# Yüklenen resimleri serve et
-@app.route('/uploads/<filename>')
-def uploaded_file(filename):
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+# Yüklenen resmi sadece orijinaliyle kaydeder, küçük boyutlar hazır değilse üretimlerini kuyruğa ekler.
+# İş çağıranın commit'i ile birlikte kaydedilir. (dosya adı, küçük boyutlar hazır mı) döndürür.
+def save_upload(file):
+    folder = app.config['UPLOAD_FOLDER']
+    filename = store_image_stream(folder, file.stream, variants=False)
+    ready = variants_ready(folder, filename)
+    if not ready:
+        job_queue.enqueue('generate_image_variants', {'filename': filename})
+    return filename, ready
+
+@job_queue.handler('generate_image_variants')
+def generate_image_variants_job(filename):
+    folder = app.config['UPLOAD_FOLDER']
+    path = os.path.join(folder, filename)
+    if not os.path.exists(path):
+        # Sessizce geçilmez: iş tekrar denenir, sonunda hata mesajıyla 'failed' olarak kalır
+        raise FileNotFoundError(f"Yüklenen dosya bulunamadı: {path} (UPLOAD_FOLDER web süreciyle ortak mı?)")
+    if not variants_ready(folder, filename):
+        with open(path, 'rb') as f:
+            generate_variants(folder, filename, f.read())
+
+    book_ids = [book_id for (book_id,) in db.session.query(Book.id).filter(
+        Book.image_url == filename, Book.image_variants == db.false())]
+    if not book_ids:
+        return
+    Book.query.filter(Book.id.in_(book_ids)).update({'image_variants': True}, synchronize_session=False)
+    bump_table_versions(db.session.connection(), ['book'])
+    db.session.commit()
+    response_cache.invalidate('books', *[f'book:{book_id}' for book_id in book_ids])
+
+# Yüklenen dosyaların servisi. Önde nginx varsa UPLOADS_ACCEL_PREFIX (ör. /protected-uploads/, nginx'te
+# "internal" location) verilir ve dosyayı nginx gönderir; Apache/lighttpd için UPLOADS_X_SENDFILE=true.
+# İkisi de yoksa Flask range ve If-Modified-Since/ETag destekli olarak kendisi gönderir.
+app.config['UPLOADS_ACCEL_PREFIX'] = os.environ.get('UPLOADS_ACCEL_PREFIX')
+app.config['USE_X_SENDFILE'] = os.environ.get('UPLOADS_X_SENDFILE', 'False').lower() == 'true'
+UPLOAD_MAX_AGE = 86400  # İçerik adresli olmayan (eski) dosyalar için
 
-# Resim servis etme endpoint'i
 @app.route('/uploads/<path:filename>')
-def serve_image(filename):
-    try:
-        # Dosyanın tam yolunu al
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        
-        # Dosyanın varlığını kontrol et
-        if not os.path.exists(file_path):
-            print(f"Dosya bulunamadı: {file_path}")
+def uploaded_file(filename):
+    if is_immutable(filename):
+        cache_control = 'public, max-age=31536000, immutable'
+    else:
+        cache_control = f'public, max-age={UPLOAD_MAX_AGE}'
+
+    accel_prefix = app.config['UPLOADS_ACCEL_PREFIX']
+    if accel_prefix:
+        # Klasör dışına çıkan yolları reddet, varlık kontrolünü nginx yapar
+        if safe_join(app.config['UPLOAD_FOLDER'], filename) is None:
+            return '', 404
+        response = Response(status=200, mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response.headers['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + filename
+    else:
+        try:
+            response = send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+        except NotFound:
+            # Genel hata yakalayıcı 500'e çevirmesin
             return '', 404
 
-        # CORS header'larını ekle ve dosyayı gönder
-        response = send_from_directory(
-            app.config['UPLOAD_FOLDER'],
-            filename,
-            as_attachment=False
-        )
-        response.headers['Access-Control-Allow-Origin'] = '*'
-        response.headers['Cache-Control'] = 'public, max-age=31536000'
-        return response
-    except Exception as e:
-        print(f"Resim servis hatası ({filename}): {str(e)}")
-        return '', 404
+    response.headers['Cache-Control'] = cache_control
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    return response
+
+# Mail gönderimi arka plan işinde yapılır; SMTP hatasında iş artan bekleme süresiyle tekrar denenir
+@job_queue.handler('send_email')
+def send_email_job(subject, recipients, body):
+    mail.send(Message(subject, sender=app.config['MAIL_USERNAME'], recipients=recipients, body=body))
 
+# Doğrulama mailini kuyruğa ekler, SMTP'yi beklemez. İş çağıranın commit'i ile birlikte kaydedilir.
 def send_verification_email(user_email, token):
-    try:
-        verify_url = f"http://localhost:3000/verify-email/{token}"
-        msg = Message(
-            'Email Adresinizi Doğrulayın',
-            sender=app.config['MAIL_USERNAME'],
-            recipients=[user_email]
-        )
-        msg.body = f'''Merhaba,
+    verify_url = f"http://localhost:3000/verify-email/{token}"
+    body = f'''Merhaba,
         
 Email adresinizi doğrulamak için aşağıdaki linke tıklayın:
 {verify_url}
@@ -437,25 +1105,55 @@ Eğer bu kaydı siz yapmadıysanız, bu emaili görmezden gelebilirsiniz.
 Saygılarımızla,
 Kitap Marketi
 '''
-        print(f"Email gönderiliyor: {user_email}")  # Debug için
-        mail.send(msg)
-        print("Email başarıyla gönderildi")  # Debug için
-        return True
-    except Exception as e:
-        print("Email gönderme hatası:", str(e))  # Hata detayı
-        return False
-
-# Otomatik kullanıcı adı oluşturma fonksiyonu
-def generate_username(email, name=None):
-    base = name.lower().replace(' ', '') if name else email.split('@')[0]
-    username = base
+    job_queue.enqueue('send_email', {
+        'subject': 'Email Adresinizi Doğrulayın',
+        'recipients': [user_email],
+        'body': body
+    })
+    return True
+
+# Otomatik kullanıcı adı oluşturma fonksiyonu. base ile başlayan mevcut adlar tek bir indeks
+# aralık taramasıyla alınır, ilk boş "base", "base1", "base2"... bellekte bulunur.
+# skip > 0 ise ilk skip boş ad atlanır (eşzamanlı kayıtlar aynı adda yarışmasın diye).
+def generate_username(email, name=None, skip=0):
+    base = (name.lower().replace(' ', '') if name else '') or email.split('@')[0] or 'kullanici'
+    # [base, base'in son harfi bir artırılmış hali) aralığı base ile başlayan tüm adları kapsar
+    upper = base[:-1] + chr(ord(base[-1]) + 1)
+    taken = {
+        username for (username,) in db.session.query(User.username).filter(
+            User.username >= base, User.username < upper)
+        if username.startswith(base)
+    }
+    if base not in taken:
+        if skip == 0:
+            return base
+        skip -= 1
+    suffixes = {int(username[len(base):]) for username in taken if username[len(base):].isdigit()}
     counter = 1
-    
-    while User.query.filter_by(username=username).first():
-        username = f"{base}{counter}"
+    while True:
+        if counter not in suffixes:
+            if skip == 0:
+                return f"{base}{counter}"
+            skip -= 1
         counter += 1
-    
-    return username
+
+USERNAME_RETRIES = 5
+
+# Yeni kullanıcıyı kaydeder. Aynı anda aynı adı alan başka bir kayıt olursa unique kısıtı
+# hata verir; kullanıcı adı yeniden üretilip tekrar denenir (önceden kontrol sorgusu yok).
+def save_new_user(user, name=None):
+    for attempt in range(USERNAME_RETRIES):
+        db.session.add(user)
+        try:
+            db.session.commit()
+            return user
+        except IntegrityError:
+            db.session.rollback()
+            # Çakışma kullanıcı adında değilse (ör. email) tekrar denemenin anlamı yok
+            if attempt == USERNAME_RETRIES - 1 or not User.query.filter_by(username=user.username).first():
+                raise
+            # Yarışan diğer kayıtlarla aynı adı tekrar seçmemek için rastgele sayıda boş adı atla
+            user.username = generate_username(user.email, name, skip=random.randrange(2 ** (attempt + 1)))
 
 # Register endpoint'ini güncelle
 @app.route('/api/auth/register', methods=['POST'])
@@ -466,31 +1164,22 @@ def register():
         # Email kontrolü
         if User.query.filter_by(email=data['email']).first():
             return jsonify({"error": "Bu email zaten kullanımda"}), 400
+        # Hash hesaplanırken veritabanı bağlantısını tutma
+        db.session.close()
+        password = password_hasher.hash(data['password'])
             
-        # Otomatik kullanıcı adı oluştur
-        base_username = data.get('name', '').lower().replace(' ', '') or data['email'].split('@')[0]
-        username = base_username
-        counter = 1
-        
-        # Benzersiz kullanıcı adı oluştur
-        while User.query.filter_by(username=username).first():
-            username = f"{base_username}{counter}"
-            counter += 1
-        
         # Yeni kullanıcı oluştur
         user = User(
             email=data['email'],
-            username=username,
+            username=generate_username(data['email'], data.get('name')),
             name=data.get('name', ''),
-            password=generate_password_hash(data['password']),
+            password=password,
             balance=0.0
         )
-        
-        db.session.add(user)
-        db.session.commit()
+        save_new_user(user, data.get('name'))
         
         # Token oluştur ve döndür
-        access_token = create_access_token(identity=user.id)
+        access_token = create_user_token(user)
         
         return jsonify({
             "message": "Kayıt başarılı",
@@ -504,20 +1193,38 @@ def register():
             }
         }), 201
         
+    except PasswordHasherBusy:
+        db.session.rollback()
+        return server_busy_response()
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
+# Yeni hash sadece şifre bu arada değişmediyse yazılır
+def save_rehashed_password(user_id, old_hash):
+    def save(new_hash):
+        try:
+            with app.app_context():
+                User.query.filter_by(id=user_id, password=old_hash).update(
+                    {'password': new_hash}, synchronize_session=False)
+                db.session.commit()
+        except Exception:
+            app.logger.exception("Şifre yenileme hatası")
+    return save
+
 # Login endpoint'i
 @app.route('/api/auth/login', methods=['POST'])
 def login():
     try:
         data = request.get_json()
         user = User.query.filter_by(email=data['email']).first()
+        # Hash hesaplanırken veritabanı bağlantısını tutma; bağlantı havuza geri döner
+        db.session.close()
         
-        if user and check_password_hash(user.password, data['password']):
-            # Token oluştururken ID'yi string'e çevir
-            access_token = create_access_token(identity=str(user.id))
+        if user and password_hasher.verify(user.password, data['password']):
+            if password_hasher.needs_rehash(user.password):
+                password_hasher.rehash_later(data['password'], save_rehashed_password(user.id, user.password))
+            access_token = create_user_token(user)
             return jsonify({
                 "token": access_token,
                 "user": {
@@ -531,10 +1238,17 @@ def login():
         else:
             return jsonify({"error": "Geçersiz email veya şifre"}), 401
             
+    except PasswordHasherBusy:
+        return server_busy_response()
     except Exception as e:
-        print("Login hatası:", str(e))
+        app.logger.exception("Login hatası")
         return jsonify({"error": str(e)}), 500
 
+# Google ID token doğrulayıcı. Testlerde cert_source yerel anahtarlı bir StaticCertSource ile değiştirilebilir.
+app.config['GOOGLE_CLIENT_ID'] = os.environ.get(
+    'GOOGLE_CLIENT_ID', '790404761945-jsoqpoadlcv6ilhrt63vgmi0eu6aq5si.apps.googleusercontent.com')
+google_verifier = GoogleTokenVerifier(app.config['GOOGLE_CLIENT_ID'], GoogleCertSource())
+
 # Google ile giriş
 @app.route('/api/auth/google', methods=['POST'])
 def google_auth():
@@ -542,12 +1256,11 @@ def google_auth():
         data = request.get_json()
         token = data['token']
         
-        # Google token'ı doğrula
-        idinfo = id_token.verify_oauth2_token(
-            token, 
-            requests.Request(), 
-            "790404761945-jsoqpoadlcv6ilhrt63vgmi0eu6aq5si.apps.googleusercontent.com"
-        )
+        # Google token'ı doğrula (sertifikalar önbellekten, ağ isteği yok)
+        try:
+            idinfo = google_verifier.verify(token)
+        except (ValueError, GoogleAuthError):
+            return jsonify({"error": "Geçersiz Google token'ı"}), 401
         
         email = idinfo['email']
         name = idinfo['name']
@@ -556,22 +1269,29 @@ def google_auth():
         # Kullanıcıyı bul veya oluştur
         user = User.query.filter_by(email=email).first()
         if not user:
+            # Hash hesaplanırken veritabanı bağlantısını tutma
+            db.session.close()
+            # Şifre kolonu zorunlu; Google kullanıcıları için kullanılamaz rastgele bir şifre
+            password = password_hasher.hash(secrets.token_hex(32))
             user = User(
                 email=email,
                 name=name,
-                google_id=google_id
+                google_id=google_id,
+                password=password
             )
-            db.session.add(user)
-            db.session.commit()
+            save_new_user(user)
             
-        access_token = create_access_token(identity=user.id)
+        access_token = create_user_token(user)
         return jsonify({
             "token": access_token,
             "user": {"id": user.id, "email": user.email, "name": user.name}
         })
         
+    except PasswordHasherBusy:
+        db.session.rollback()
+        return server_busy_response()
     except Exception as e:
-        print("Google auth error:", str(e))
+        app.logger.exception("Google ile giriş hatası")
         return jsonify({"error": str(e)}), 500
 
 # Kullanıcı bilgilerini getir
@@ -579,8 +1299,9 @@ def google_auth():
 @jwt_required()
 def get_user():
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = current_user.user
+        if user is None:
+            return user_not_found_response()
         return jsonify({
             "id": user.id,
             "email": user.email,
@@ -594,7 +1315,7 @@ def get_user():
 @jwt_required()
 def get_my_books():
     try:
-        user_id = get_jwt_identity()
+        user_id = current_user.id
         books = Book.query.filter_by(seller_id=user_id).all()
         return jsonify([{
             'id': book.id,
@@ -602,19 +1323,20 @@ def get_my_books():
             'author': book.author,
             'price': book.price,
             'stock': book.stock,
-            'image_url': f'http://localhost:5000/uploads/{book.image_url}' if book.image_url else None,
+            'image_url': book_image_url(book),
+            **book_image_variants(book),
             'description': book.description,
             'category': book.category
         } for book in books])
     except Exception as e:
-        print("Kitaplar getirilirken hata:", str(e))
+        app.logger.exception("Kitaplar getirilirken hata")
         return jsonify({"error": str(e)}), 500
 
 # Sepete kitap ekle
 @app.route('/api/cart', methods=['POST'])
 @jwt_required()
 def add_to_cart():
-    user_id = get_jwt_identity()
+    user_id = current_user.id
     data = request.get_json()
     
     # Kendi kitabını sepete ekleyemez
@@ -644,8 +1366,8 @@ def add_to_cart():
 @app.route('/api/cart', methods=['GET'])
 @jwt_required()
 def view_cart():
-    user_id = get_jwt_identity()
-    cart_items = CartItem.query.filter_by(user_id=user_id).all()
+    user_id = current_user.id
+    cart_items = CartItem.query.options(joinedload(CartItem.book)).filter_by(user_id=user_id).all()
     return jsonify([{
         'id': item.id,
         'book': {
@@ -663,46 +1385,79 @@ def view_cart():
 @jwt_required()
 def create_order():
     try:
-        user_id = get_jwt_identity()
-        cart_items = CartItem.query.filter_by(user_id=user_id).all()
+        user_id = current_user.id
+
+        # Sepet satırlarını kitap fiyatı ve satıcısıyla birlikte tek sorguda al
+        cart_rows = db.session.query(
+            CartItem.id, CartItem.book_id, CartItem.quantity, Book.price, Book.seller_id
+        ).join(Book, CartItem.book_id == Book.id).filter(CartItem.user_id == user_id).all()
         
-        if not cart_items:
+        if not cart_rows:
             return jsonify({"error": "Sepetiniz boş"}), 400
-            
-        total_amount = 0
-        order = Order(user_id=user_id, total_amount=0, status='completed')
+
+        quantities = defaultdict(int)
+        prices = {}
+        seller_amounts = defaultdict(float)
+        for _, book_id, quantity, price, seller_id in cart_rows:
+            quantities[book_id] += quantity
+            prices[book_id] = price
+            seller_amounts[seller_id] += price * quantity
+        total_amount = sum(seller_amounts.values())
+
+        # Sepet satırlarını önce sil: aynı sepet için eşzamanlı ikinci sipariş 0 satır siler ve geri döner
+        cart_ids = [row[0] for row in cart_rows]
+        deleted = CartItem.query.filter(
+            CartItem.user_id == user_id, CartItem.id.in_(cart_ids)
+        ).delete(synchronize_session=False)
+        if deleted != len(cart_ids):
+            db.session.rollback()
+            return jsonify({"error": "Sepet başka bir işlemde değişti, lütfen tekrar deneyin"}), 409
+
+        # Koşullu stok düşümü: tek UPDATE, stok yetmeyen kitap satırı güncellenmez
+        ordered = case(quantities, value=Book.id)
+        updated = db.session.execute(
+            Book.__table__.update()
+            .where(Book.id.in_(list(quantities)))
+            .where(Book.stock >= ordered)
+            .values(stock=Book.stock - ordered)
+        ).rowcount
+        if updated != len(quantities):
+            db.session.rollback()
+            short = Book.query.filter(Book.id.in_(list(quantities))).all()
+            titles = [book.title for book in short if book.stock < quantities[book.id]]
+            return jsonify({"error": f"{', '.join(titles)} için yeterli stok yok"}), 400
+
+        # 'book' sürümü her siparişte artırılmaz: table_version satırı her checkout'ta kilitlenir ve bütün
+        # katalog ETag'leri/önbelleği boşa gider. Listeler sadece stokta olup olmadığını gösterir, sürüm bir
+        # kitap tükendiğinde artar. Detaydaki adet, önbellekten düşürülen book:<id> yeniden üretilince güncellenir.
+        sold_out = [book_id for (book_id,) in db.session.query(Book.id).filter(
+            Book.id.in_(list(quantities)), Book.stock <= 0)]
+        if sold_out:
+            bump_table_versions(db.session.connection(), ['book'])
+
+        # Satıcı bakiyelerini toplanmış tutarlarla tek UPDATE ile artır
+        db.session.execute(
+            User.__table__.update()
+            .where(User.id.in_(list(seller_amounts)))
+            .values(balance=func.coalesce(User.balance, 0.0) + case(seller_amounts, value=User.id))
+        )
+
+        order = Order(user_id=user_id, total_amount=total_amount, status='completed')
         db.session.add(order)
-        
-        for item in cart_items:
-            # Stok kontrolü
-            if item.quantity > item.book.stock:
-                db.session.rollback()
-                return jsonify({"error": f"{item.book.title} için yeterli stok yok"}), 400
-            
-            # Sipariş detayı oluştur
-            order_item = OrderItem(
-                order_id=order.id,
-                book_id=item.book_id,
-                quantity=item.quantity,
-                price=item.book.price
-            )
-            db.session.add(order_item)
-            
-            # Toplam tutarı güncelle
-            total_amount += item.book.price * item.quantity
-            
-            # Stok güncelleme
-            item.book.stock -= item.quantity
-            
-            # Satıcının bakiyesini güncelle
-            seller = item.book.seller
-            seller.balance = seller.balance + (item.book.price * item.quantity)
-            
-            # Sepetten kaldır
-            db.session.delete(item)
-        
-        order.total_amount = total_amount
+        db.session.flush()  # order.id için
+
+        # Sipariş detaylarını tek seferde ekle
+        db.session.bulk_insert_mappings(OrderItem, [{
+            'order_id': order.id,
+            'book_id': book_id,
+            'quantity': quantity,
+            'price': prices[book_id]
+        } for book_id, quantity in quantities.items()])
         db.session.commit()
+        # Stoklar değişti
+        response_cache.invalidate(*[f'book:{book_id}' for book_id in quantities])
+        if sold_out:
+            response_cache.invalidate('books')
         
         return jsonify({
             "message": "Sipariş başarıyla oluşturuldu",
@@ -718,8 +1473,10 @@ def create_order():
 @app.route('/api/orders', methods=['GET'])
 @jwt_required()
 def get_orders():
-    user_id = get_jwt_identity()
-    orders = Order.query.filter_by(user_id=user_id).all()
+    user_id = current_user.id
+    orders = Order.query.options(
+        selectinload(Order.items).joinedload(OrderItem.book)
+    ).filter_by(user_id=user_id).order_by(Order.created_at.desc()).all()
     return jsonify([{
         'id': order.id,
         'total_amount': order.total_amount,
@@ -737,7 +1494,7 @@ def get_orders():
 @jwt_required()
 def remove_from_cart(item_id):
     try:
-        user_id = get_jwt_identity()
+        user_id = current_user.id
         cart_item = CartItem.query.filter_by(id=item_id, user_id=user_id).first()
         
         if not cart_item:
@@ -756,7 +1513,7 @@ def remove_from_cart(item_id):
 @jwt_required()
 def update_cart_item(item_id):
     try:
-        user_id = get_jwt_identity()
+        user_id = current_user.id
         data = request.get_json()
         
         cart_item = CartItem.query.filter_by(id=item_id, user_id=user_id).first()
@@ -781,10 +1538,13 @@ def update_cart_item(item_id):
 
 # Kitap detaylarını getir
 @app.route('/api/books/<int:id>', methods=['GET'])
+@conditional_get('book', 'publisher', 'user')
+@response_cache.cached(tags=lambda id: [f'book:{id}', 'publishers', 'users'])
 def get_book(id):
     try:
-        print(f"Getting book details for ID: {id}")  # Debug log
-        book = Book.query.get_or_404(id)
+        book = Book.query.options(
+            joinedload(Book.publisher), joinedload(Book.seller)
+        ).filter_by(id=id).first_or_404()
         
         response_data = {
             'id': book.id,
@@ -792,9 +1552,12 @@ def get_book(id):
             'author': book.author,
             'price': book.price,
             'stock': book.stock,
-            'image_url': f'http://localhost:5000/uploads/{book.image_url}' if book.image_url else None,
+            'image_url': book_image_url(book),
+            **book_image_variants(book),
             'description': book.description,
             'category': book.category,
+            'rating': book_rating(book),
+            'review_count': book.review_count,
             'publisher': {
                 'id': book.publisher.id if book.publisher else None,
                 'name': book.publisher.name if book.publisher else None
@@ -805,11 +1568,11 @@ def get_book(id):
             }
         }
         
-        print("Response data:", response_data)  # Debug log
+        payload_logger.debug("Kitap detayı", extra={'payload': response_data})
         return jsonify(response_data)
         
     except Exception as e:
-        print("Error getting book details:", str(e))  # Debug log
+        app.logger.exception("Kitap detayı hatası")
         return jsonify({"error": str(e)}), 500
 
 # Kitap güncelleme endpoint'i
@@ -817,7 +1580,7 @@ def get_book(id):
 @jwt_required()
 def update_book(id):
     try:
-        user_id = get_jwt_identity()
+        user_id = current_user.id
         book = Book.query.get_or_404(id)
         
         # Sadece kitabın sahibi güncelleyebilir
@@ -825,16 +1588,29 @@ def update_book(id):
             return jsonify({"error": "Bu işlem için yetkiniz yok"}), 403
             
         data = request.get_json()
+        if 'category' in data and any(category_table.id_for(name) is None for name in split_categories(data['category'])):
+            return jsonify({"error": "Geçersiz kategori"}), 400
         
         book.title = data.get('title', book.title)
         book.author = data.get('author', book.author)
         book.price = data.get('price', book.price)
         book.stock = data.get('stock', book.stock)
         book.description = data.get('description', book.description)
-        book.category = data.get('category', book.category)
-        book.image_url = data.get('image_url', book.image_url)
+        if 'category' in data:
+            old_ids = set(book.category_ids)
+            book.category = data['category']
+            adjust_category_counts(old_ids - set(book.category_ids), -1)
+            adjust_category_counts(set(book.category_ids) - old_ids, 1)
+        if 'image_url' in data and data['image_url'] != book.image_url:
+            book.image_url = data['image_url']
+            book.has_image = bool(book.image_url) and os.path.exists(
+                os.path.join(app.config['UPLOAD_FOLDER'], book.image_url))
+            book.image_variants = book.has_image and variants_ready(app.config['UPLOAD_FOLDER'], book.image_url)
         
         db.session.commit()
+        category_table.invalidate()
+        index_book(book)
+        response_cache.invalidate('books', f'book:{id}')
         return jsonify({"message": "Kitap başarıyla güncellendi"})
         
     except Exception as e:
@@ -847,8 +1623,11 @@ def update_book(id):
 @admin_required()
 def admin_get_books():
     try:
-        books = Book.query.all()
-        return jsonify([{
+        try:
+            books, next_cursor = paginate_by_id(Book.query.options(joinedload(Book.publisher)), Book)
+        except (ValueError, TypeError):
+            return jsonify({"error": "Geçersiz sayfa imleci"}), 400
+        return paginated_response([{
             'id': book.id,
             'title': book.title,
             'author': book.author,
@@ -861,35 +1640,145 @@ def admin_get_books():
                 'name': book.publisher.name if book.publisher else None
             } if book.publisher else None,
             'image_url': book.image_url
-        } for book in books])
+        } for book in books], next_cursor)
     except Exception as e:
-        print("Admin kitap listeleme hatası:", str(e))
+        app.logger.exception("Admin kitap listeleme hatası")
         return jsonify({"error": str(e)}), 500
 
+# Önbellek isabet/ıskalama istatistikleri (bu worker için)
+@app.route('/api/admin/cache/stats', methods=['GET'])
+@jwt_required()
+@admin_required()
+def admin_cache_stats():
+    return jsonify(response_cache.stats())
+
+@app.route('/api/admin/db/pool', methods=['GET'])
+@jwt_required()
+@admin_required()
+def admin_db_pool_stats():
+    pool = db.engine.pool
+    return jsonify({
+        'profile': app.config['DB_PROFILE'],
+        'pool_class': type(pool).__name__,
+        'status': pool.status(),
+        **pool_metrics.snapshot()
+    })
+
+cache_requests = metrics.counter('cache_requests_total', 'Yanıt önbelleği istekleri', ('result',))
+cache_invalidations = metrics.counter('cache_invalidations_total', 'Önbellek etiket geçersizleştirmeleri')
+pool_checkouts = metrics.counter('db_pool_checkouts_total', 'Havuzdan alınan bağlantılar')
+pool_wait = metrics.counter('db_pool_checkout_wait_seconds_total', 'Havuzdan bağlantı beklerken geçen süre (saniye)')
+pool_timeouts = metrics.counter('db_pool_timeouts_total', 'Havuzdan bağlantı alınamayan (zaman aşımı) istekler')
+pool_checked_out = metrics.gauge('db_pool_checked_out', 'Kullanımdaki veritabanı bağlantıları')
+pool_size = metrics.gauge('db_pool_size', 'Veritabanı havuzu boyutu')
+logs_dropped = metrics.counter('logs_dropped_total', 'Kuyruk dolduğu için atılan log kayıtları')
+
+@metrics.collector
+def collect_runtime_metrics():
+    cache = response_cache.stats()
+    cache_requests.set(cache['hits'], result='hit')
+    cache_requests.set(cache['misses'], result='miss')
+    cache_invalidations.set(cache['invalidations'])
+    pool = pool_metrics.snapshot()
+    pool_checkouts.set(pool['checkouts'])
+    pool_wait.set(pool['total_wait_seconds'])
+    pool_timeouts.set(pool['timeouts'])
+    with app.app_context():
+        engine_pool = db.engine.pool
+    if isinstance(engine_pool, QueuePool):
+        pool_checked_out.set(engine_pool.checkedout())
+        pool_size.set(engine_pool.size())
+    logs_dropped.set(log_handler.dropped)
+
+@app.route('/api/admin/profiles', methods=['GET'])
+@jwt_required()
+@admin_required()
+def admin_list_profiles():
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), app.config['PROFILE_MAX_FILES'])
+    except ValueError:
+        return jsonify({"error": "Geçersiz filtre değeri"}), 400
+    return jsonify(profiler.list(limit))
+
+@app.route('/api/admin/profiles/<profile_id>', methods=['GET'])
+@jwt_required()
+@admin_required()
+def admin_get_profile(profile_id):
+    profile = profiler.get(profile_id)
+    if profile is None:
+        return jsonify({"error": "Profil bulunamadı"}), 404
+    return jsonify(profile)
+
+# Profil dosyasını indir: speedscope (https://www.speedscope.app), folded (flamegraph.pl), pstats, txt
+@app.route('/api/admin/profiles/<profile_id>/<kind>', methods=['GET'])
+@jwt_required()
+@admin_required()
+def admin_download_profile(profile_id, kind):
+    path, mimetype = profiler.file_path(profile_id, kind)
+    if path is None:
+        return jsonify({"error": "Profil dosyası bulunamadı"}), 404
+    return send_from_directory(os.path.dirname(path), os.path.basename(path), mimetype=mimetype,
+                               as_attachment=True)
+
+# Prometheus metin biçiminde metrikler (tüm worker'ların toplamı)
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    token = app.config['METRICS_TOKEN']
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return jsonify({"error": "Yetkisiz erişim"}), 401
+    return Response(collect(metrics, metrics_store), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/api/admin/users', methods=['GET'])
 @jwt_required()
 @admin_required()
 def admin_get_users():
     try:
-        users = User.query.all()
-        return jsonify([{
+        try:
+            users, next_cursor = paginate_by_id(User.query, User)
+        except (ValueError, TypeError):
+            return jsonify({"error": "Geçersiz sayfa imleci"}), 400
+
+        # Sadece bu sayfadaki kullanıcılar için gruplanmış sayımlar
+        user_ids = [user.id for user in users]
+        book_counts = dict(db.session.query(Book.seller_id, func.count(Book.id)).filter(
+            Book.seller_id.in_(user_ids)).group_by(Book.seller_id))
+        order_counts = dict(db.session.query(Order.user_id, func.count(Order.id)).filter(
+            Order.user_id.in_(user_ids)).group_by(Order.user_id))
+
+        return paginated_response([{
             'id': user.id,
             'name': user.name,
             'email': user.email,
             'created_at': user.created_at,
-            'book_count': len(user.books),
-            'order_count': len(user.orders)
-        } for user in users])
+            'book_count': book_counts.get(user.id, 0),
+            'order_count': order_counts.get(user.id, 0)
+        } for user in users], next_cursor)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Kullanıcının tüm oturumlarını kapat
+@app.route('/api/admin/users/<int:user_id>/revoke-tokens', methods=['POST'])
+@jwt_required()
+@admin_required()
+def admin_revoke_user_tokens(user_id):
+    try:
+        user = User.query.get_or_404(user_id)
+        revoke_user_tokens(user)
+        return jsonify({"message": "Kullanıcının oturumları sonlandırıldı"})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/admin/orders', methods=['GET'])
 @jwt_required()
 @admin_required()
 def admin_get_orders():
     try:
-        orders = Order.query.all()
-        return jsonify([{
+        try:
+            orders, next_cursor = paginate_by_id(Order.query.options(joinedload(Order.user)), Order)
+        except (ValueError, TypeError):
+            return jsonify({"error": "Geçersiz sayfa imleci"}), 400
+        return paginated_response([{
             'id': order.id,
             'user': {
                 'id': order.user.id,
@@ -898,7 +1787,7 @@ def admin_get_orders():
             'total_amount': order.total_amount,
             'status': order.status,
             'created_at': order.created_at
-        } for order in orders])
+        } for order in orders], next_cursor)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -921,8 +1810,9 @@ def admin_update_order(order_id):
 @jwt_required()
 def get_user_info():
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = current_user.user
+        if user is None:
+            return user_not_found_response()
         return jsonify({
             'id': user.id,
             'email': user.email,
@@ -939,8 +1829,9 @@ def get_user_info():
 @jwt_required()
 def update_profile():
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = current_user.user
+        if user is None:
+            return user_not_found_response()
         data = request.get_json()
         
         if 'username' in data and data['username'] != user.username:
@@ -952,6 +1843,7 @@ def update_profile():
             user.name = data['name']
             
         db.session.commit()
+        response_cache.invalidate('users')
         
         return jsonify({
             "message": "Profil güncellendi",
@@ -974,11 +1866,11 @@ def update_profile():
 def get_cart_count():
     try:
         # String ID'yi int'e çevir
-        user_id = int(get_jwt_identity())
+        user_id = current_user.id
         count = CartItem.query.filter_by(user_id=user_id).count()
         return jsonify({"count": count})
     except Exception as e:
-        print("Sepet sayısı getirme hatası:", str(e))
+        app.logger.exception("Sepet sayısı getirme hatası")
         return jsonify({"error": str(e)}), 500
 
 # JWT ile korunan endpoint'lerde ID'yi int'e çevirme
@@ -986,21 +1878,63 @@ def get_cart_count():
 def user_identity_lookup(user):
     return str(user)
 
+# İstek boyunca geçerli kullanıcı. Yetki kontrolleri için id ve rol yeterli; bakiye, avatar gibi
+# alanlar veya güncelleme gerektiğinde User satırı .user ile (en fazla bir kez) yüklenir.
+class CurrentUser:
+    __slots__ = ('id', 'role', '_user')
+
+    def __init__(self, id, role, user=None):
+        self.id = id
+        self.role = role
+        self._user = user
+
+    # Rol claim'li token'larda satır kontrol edilmez; kullanıcı silinmişse None döner
+    @property
+    def user(self):
+        if self._user is None:
+            self._user = db.session.get(User, self.id)
+        return self._user
+
+# Token sub'ına göre (id, rol) önbelleği - USER_CACHE_TTL saniye (0 ise kapalı).
+# Açıkken rol değişiklikleri ve silinen kullanıcılar en geç bu süre sonunda fark edilir.
+app.config['USER_CACHE_TTL'] = int(os.environ.get('USER_CACHE_TTL', 0))
+user_cache = create_cache_backend(app.config['CACHE_BACKEND'] if app.config['USER_CACHE_TTL'] > 0 else 'none')
+
+# flask_jwt_extended her korunan istekte bir kez çağırır, sonuç current_user olarak istek boyunca saklanır
 @jwt.user_lookup_loader
 def user_lookup_callback(_jwt_header, jwt_data):
     identity = jwt_data["sub"]
+    if 'role' in jwt_data:
+        # Rol claim'i olan token'larda sorgu yok; token iptali check_token_version ile yapılır
+        try:
+            return CurrentUser(int(identity), jwt_data['role'])
+        except (ValueError, TypeError):
+            return None
+    # Rol claim'i olmayan eski token'lar
+    if user_cache is not None:
+        cached = user_cache.get(f'user:{identity}')
+        if cached is not None:
+            return CurrentUser(*cached)
     try:
         # String ID'yi int'e çevir
-        user_id = int(identity)
-        return User.query.filter_by(id=user_id).one_or_none()
+        user = db.session.get(User, int(identity))
     except (ValueError, TypeError):
         return None
+    if user is None:
+        return None
+    if user_cache is not None:
+        user_cache.set(f'user:{identity}', (user.id, user.role), app.config['USER_CACHE_TTL'])
+    return CurrentUser(user.id, user.role, user)
 
 # Avatar yükleme endpoint'i
 @app.route('/api/user/avatar', methods=['POST'])
 @jwt_required()
+@streamed_upload(AVATAR_MAX_SIZE, ALLOWED_EXTENSIONS, sniff_image_type, SNIFF_BYTES)
 def upload_avatar():
     try:
+        if current_user.user is None:
+            return user_not_found_response()
+
         if 'avatar' not in request.files:
             return jsonify({"error": "Dosya bulunamadı"}), 400
             
@@ -1008,25 +1942,27 @@ def upload_avatar():
         if file.filename == '':
             return jsonify({"error": "Dosya seçilmedi"}), 400
             
-        if file:
-            # Güvenli dosya adı oluştur
-            filename = secure_filename(file.filename)
-            # Benzersiz dosya adı oluştur
-            unique_filename = f"avatar_{get_jwt_identity()}_{int(time.time())}_{filename}"
+        if not allowed_file(file.filename):
+            return jsonify({"error": "Geçersiz dosya tipi"}), 400
             
-            # Dosyayı kaydet
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-            file.save(file_path)
+        if file:
+            # İçerik hash'i ile kaydet (aynı resim tekrar yazılmaz)
+            try:
+                unique_filename, _ = save_upload(file)
+            except ValueError:
+                return jsonify({"error": "Geçersiz resim dosyası"}), 400
             
             # Kullanıcının avatar'ını güncelle
-            user = User.query.get(get_jwt_identity())
+            user = current_user.user
             
-            # Eski avatar'ı sil
-            if user.avatar and os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], user.avatar)):
+            # Eski avatar'ı sil - içerik adresli dosyalar başkalarıyla paylaşılıyor olabilir, onlara dokunma
+            if (user.avatar and not is_content_addressed(user.avatar)
+                    and os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], user.avatar))):
                 os.remove(os.path.join(app.config['UPLOAD_FOLDER'], user.avatar))
             
             user.avatar = unique_filename
             db.session.commit()
+            response_cache.invalidate('users')
             
             return jsonify({
                 "message": "Avatar güncellendi",
@@ -1034,11 +1970,14 @@ def upload_avatar():
             })
             
     except Exception as e:
-        print("Avatar yükleme hatası:", str(e))
+        db.session.rollback()
+        app.logger.exception("Avatar yükleme hatası")
         return jsonify({"error": str(e)}), 500
 
 # Yeni kitapları getir (son eklenenler)
 @app.route('/api/books/new', methods=['GET'])
+@conditional_get('book')
+@response_cache.cached(tags=['books'])
 def get_new_books():
     try:
         books = Book.query.order_by(Book.created_at.desc()).limit(8).all()
@@ -1048,31 +1987,164 @@ def get_new_books():
             'author': book.author,
             'price': book.price,
             'stock': book.stock,
-            'image_url': f'http://localhost:5000/uploads/{book.image_url}' if book.image_url else None,
+            'image_url': book_image_url(book),
+            **book_image_variants(book),
             'category': book.category,
-            'rating': 4.5,  # Örnek değer
-            'review_count': 128  # Örnek değer
+            'rating': book_rating(book),
+            'review_count': book.review_count
         } for book in books])
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-# Çok satan kitapları getir
+# Sıralama ayarları
+RANKING_SIZE = 50
+RANKING_WINDOWS = {
+    'trending_24h': timedelta(hours=24),
+    'trending_7d': timedelta(days=7),
+    'bestseller_30d': timedelta(days=30),
+}
+TOP_RATED_MIN_REVIEWS = 3
+
+# Sıralamalar bu aralıkla (saniye) worker tarafından yenilenir, 0 ise sadece `flask refresh-rankings` ile
+app.config['RANKING_REFRESH_INTERVAL'] = int(os.environ.get('RANKING_REFRESH_INTERVAL', 600))
+
+def replace_ranking(kind, rows, computed_at):
+    BookRanking.query.filter_by(kind=kind).delete(synchronize_session=False)
+    db.session.bulk_insert_mappings(BookRanking, [{
+        'kind': kind,
+        'rank': rank,
+        'book_id': book_id,
+        'score': float(score),
+        'volume': int(volume),
+        'computed_at': computed_at
+    } for rank, (book_id, score, volume) in enumerate(rows, start=1)])
+
+# Her pencere sadece kendi zaman aralığındaki siparişleri tarar (order.created_at indeksi)
+def refresh_rankings():
+    now = datetime.utcnow()
+    for kind, window in RANKING_WINDOWS.items():
+        sold = func.sum(OrderItem.quantity)
+        rows = db.session.query(
+            OrderItem.book_id, sold, func.count(func.distinct(OrderItem.order_id))
+        ).join(Order, OrderItem.order_id == Order.id).filter(
+            Order.created_at >= now - window, Order.status != 'cancelled'
+        ).group_by(OrderItem.book_id).order_by(sold.desc(), OrderItem.book_id).limit(RANKING_SIZE).all()
+        replace_ranking(kind, rows, now)
+
+    # Ortalama puanlar kitap satırında hazır, yorum tablosu taranmaz
+    average = Book.rating_sum * 1.0 / Book.review_count
+    rows = db.session.query(Book.id, average, Book.review_count).filter(
+        Book.review_count >= TOP_RATED_MIN_REVIEWS
+    ).order_by(average.desc(), Book.review_count.desc()).limit(RANKING_SIZE).all()
+    replace_ranking('top_rated', rows, now)
+    db.session.commit()
+
+@app.cli.command('refresh-rankings')
+def refresh_rankings_command():
+    """Trend, çok satan ve en beğenilen kitap sıralamalarını yeniden hesaplar."""
+    refresh_rankings()
+    print("Sıralamalar güncellendi")
+
+@job_queue.handler('refresh_rankings')
+def refresh_rankings_job():
+    refresh_rankings()
+
+# Tamamlanmış işler bir hafta saklanır
+@job_queue.handler('purge_jobs')
+def purge_jobs_job():
+    job_queue.purge(timedelta(days=7))
+
+# Worker ayarları - JOBS_RUN_IN_PROCESS=true ise ayrı worker yerine web süreci içinde bir thread çalışır (geliştirme için)
+app.config['JOBS_POLL_INTERVAL'] = float(os.environ.get('JOBS_POLL_INTERVAL', 1.0))
+app.config['JOBS_RUN_IN_PROCESS'] = os.environ.get('JOBS_RUN_IN_PROCESS', 'False').lower() == 'true'
+
+# Ayrı worker, web sürecinin yüklediği son resmi göremiyorsa klasör paylaşılmıyor demektir
+def check_shared_uploads():
+    image_url = db.session.query(Book.image_url).filter(Book.has_image == db.true()).order_by(
+        Book.updated_at.desc()).limit(1).scalar()
+    if image_url and not os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], image_url)):
+        app.logger.error("UPLOAD_FOLDER (%s) web süreciyle paylaşılmıyor: %s bulunamadı",
+                         app.config['UPLOAD_FOLDER'], image_url)
+        return False
+    return True
+
+def run_job_worker(stop_event=None):
+    job_queue.run_worker(
+        app,
+        poll_interval=app.config['JOBS_POLL_INTERVAL'],
+        schedule=[(app.config['RANKING_REFRESH_INTERVAL'], 'refresh_rankings'), (3600, 'purge_jobs')],
+        stop_event=stop_event
+    )
+
+@app.before_first_request
+def start_in_process_worker():
+    if app.config['JOBS_RUN_IN_PROCESS']:
+        threading.Thread(target=run_job_worker, daemon=True).start()
+
+def ranked_books(kind, limit):
+    return db.session.query(Book, BookRanking.score, BookRanking.volume).join(
+        BookRanking, BookRanking.book_id == Book.id
+    ).filter(BookRanking.kind == kind).order_by(BookRanking.rank).limit(limit).all()
+
+def parse_limit(default=8):
+    return min(max(int(request.args.get('limit', default)), 1), RANKING_SIZE)
+
+# Trend kitaplar (son 24 saat / 7 gün / 30 gün satışlarına göre)
 @app.route('/api/books/trending', methods=['GET'])
 def get_trending_books():
     try:
-        # Örnek olarak rastgele 8 kitap döndürüyoruz
-        books = Book.query.order_by(func.random()).limit(8).all()
+        window = request.args.get('window', '7d')
+        kind = 'bestseller_30d' if window == '30d' else f'trending_{window}'
+        if kind not in RANKING_WINDOWS:
+            return jsonify({"error": "Geçersiz zaman aralığı"}), 400
+        try:
+            limit = parse_limit()
+        except ValueError:
+            return jsonify({"error": "Geçersiz filtre değeri"}), 400
+
+        rows = ranked_books(kind, limit)
+        if not rows:
+            # Henüz satış yoksa en yeni kitapları göster
+            rows = [(book, 0, 0) for book in Book.query.order_by(Book.created_at.desc()).limit(limit)]
         return jsonify([{
             'id': book.id,
             'title': book.title,
             'author': book.author,
             'price': book.price,
             'stock': book.stock,
-            'image_url': f'http://localhost:5000/uploads/{book.image_url}' if book.image_url else None,
+            'image_url': book_image_url(book),
+            **book_image_variants(book),
             'category': book.category,
-            'rating': 4.5,  # Örnek değer
-            'review_count': 128  # Örnek değer
-        } for book in books])
+            'sold': int(sold),
+            'rating': book_rating(book),
+            'review_count': book.review_count
+        } for book, sold, _ in rows])
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Çok satan kitapları getir (son 30 gün)
+@app.route('/api/books/bestsellers', methods=['GET'])
+def get_bestseller_books():
+    try:
+        try:
+            limit = parse_limit()
+        except ValueError:
+            return jsonify({"error": "Geçersiz filtre değeri"}), 400
+        return jsonify([dict(book_list_item(book), sold=int(sold), order_count=order_count)
+                        for book, sold, order_count in ranked_books('bestseller_30d', limit)])
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# En yüksek puanlı kitaplar
+@app.route('/api/books/top-rated', methods=['GET'])
+def get_top_rated_books():
+    try:
+        try:
+            limit = parse_limit()
+        except ValueError:
+            return jsonify({"error": "Geçersiz filtre değeri"}), 400
+        return jsonify([dict(book_list_item(book), rating=round(rating, 2), review_count=review_count)
+                        for book, rating, review_count in ranked_books('top_rated', limit)])
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -1080,8 +2152,15 @@ def get_trending_books():
 @app.route('/api/books/discounted', methods=['GET'])
 def get_discounted_books():
     try:
-        # Örnek olarak rastgele 8 kitap döndürüyoruz
-        books = Book.query.order_by(func.random()).limit(8).all()
+        # Rastgele bir id'den başlayıp birincil anahtar indeksi üzerinden 8 kitap al
+        # (ORDER BY random() tüm tabloyu tarayıp sıralıyordu)
+        max_id = db.session.query(func.max(Book.id)).scalar()
+        books = []
+        if max_id:
+            start = random.randint(1, max_id)
+            books = Book.query.filter(Book.id >= start).order_by(Book.id).limit(8).all()
+            if len(books) < 8:
+                books += Book.query.filter(Book.id < start).order_by(Book.id).limit(8 - len(books)).all()
         return jsonify([{
             'id': book.id,
             'title': book.title,
@@ -1090,16 +2169,17 @@ def get_discounted_books():
             'original_price': book.price,
             'discount': 20,  # Örnek indirim yüzdesi
             'stock': book.stock,
-            'image_url': f'http://localhost:5000/uploads/{book.image_url}' if book.image_url else None,
+            'image_url': book_image_url(book),
+            **book_image_variants(book),
             'category': book.category,
-            'rating': 4.5,  # Örnek değer
-            'review_count': 128  # Örnek değer
+            'rating': book_rating(book),
+            'review_count': book.review_count
         } for book in books])
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-# Önceden tanımlanmış kategoriler
-BOOK_CATEGORIES = [
+# Boş veritabanına eklenen varsayılan kategoriler (geçiş 3); sonrası category tablosunda yönetilir
+DEFAULT_BOOK_CATEGORIES = (
     'Roman',
     'Öykü',
     'Şiir',
@@ -1120,12 +2200,92 @@ BOOK_CATEGORIES = [
     'Polisiye',
     'Korku',
     'Mizah'
-]
-
-# Kategorileri getiren endpoint
+)
+
+# Kategoriler (id, ad, kitap sayısı) worker başına bellekte tutulur. CATEGORY_CACHE_REFRESH saniyede
+# bir 'category' tablo sürümü okunur, sürüm değiştiyse liste yeniden yüklenir. Diğer worker'larda
+# yapılan değişiklikler en geç bu süre sonunda görünür; aynı worker'dakiler invalidate() ile hemen.
+app.config['CATEGORY_CACHE_REFRESH'] = int(os.environ.get('CATEGORY_CACHE_REFRESH', 5))
+
+class CategoryTable:
+    def __init__(self, refresh_interval):
+        self.refresh_interval = refresh_interval
+        # (sürüm, satırlar, id -> ad, ad -> id) tek atamayla değiştirilir
+        self._state = (None, (), {}, {})
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def _stale(self):
+        return self._checked_at is None or time.monotonic() - self._checked_at >= self.refresh_interval
+
+    def _load(self):
+        if self._stale():
+            with self._lock:
+                if self._stale():
+                    version = db.session.query(TableVersion.version).filter_by(name='category').scalar() or 0
+                    if version != self._state[0]:
+                        rows = tuple(db.session.query(
+                            Category.id, Category.name, Category.book_count).order_by(Category.id))
+                        self._state = (version, rows, {row.id: row.name for row in rows},
+                                       {row.name: row.id for row in rows})
+                    self._checked_at = time.monotonic()
+        return self._state
+
+    def version(self):
+        return self._load()[0]
+
+    def rows(self):
+        return self._load()[1]
+
+    def name(self, category_id):
+        if category_id is None:
+            return None
+        return self._load()[2].get(category_id)
+
+    def id_for(self, name):
+        return self._load()[3].get(name)
+
+    def invalidate(self):
+        self._checked_at = None
+
+category_table = CategoryTable(app.config['CATEGORY_CACHE_REFRESH'])
+
+# Formdan gelen kategori metnini ("Roman, Tarih") sıralı ve tekrarsız ad listesine çevir
+def split_categories(value):
+    names = []
+    for name in (value or '').split(','):
+        name = name.strip()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+def parse_category_list(value):
+    return [int(category_id) for category_id in value.split(',')] if value else []
+
+# Kategorilerin kitap sayısını tek atomik UPDATE ile değiştir
+def adjust_category_counts(category_ids, delta):
+    if not category_ids:
+        return
+    db.session.execute(
+        Category.__table__.update().where(Category.id.in_(category_ids)).values(
+            book_count=Category.book_count + delta)
+    )
+    bump_table_versions(db.session.connection(), ['category'])
+
+def category_etag():
+    path_hash = hashlib.sha1(request.full_path.encode()).hexdigest()[:16]
+    return f'{category_table.version()}-{path_hash}'
+
+# Kategorileri getiren endpoint - ?counts=1 ile kategori başına kitap sayısı da döner.
+# response_cache kullanılmaz: satırlar zaten worker içindeki category_table'da, yanıt veritabanına
+# gitmeden üretilir ve ETag'i 'category' sürümünden gelir. Önbellek sadece ek bir kopya olurdu.
 @app.route('/api/categories', methods=['GET'])
+@conditional_get(etag_func=category_etag)
 def get_categories():
-    return jsonify(BOOK_CATEGORIES)
+    rows = category_table.rows()
+    if request.args.get('counts', '').lower() in ('1', 'true'):
+        return jsonify([{'id': row.id, 'name': row.name, 'book_count': row.book_count} for row in rows])
+    return jsonify([row.name for row in rows])
 
 # Yorum modeli
 class Review(db.Model):
@@ -1135,9 +2295,15 @@ class Review(db.Model):
     rating = db.Column(db.Integer, nullable=False)  # 1-5 arası puan
     comment = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     user = db.relationship('User', backref='reviews')
     book = db.relationship('Book', backref='reviews')
 
+    __table_args__ = (
+        db.Index('uq_review_user_book', 'user_id', 'book_id', unique=True),
+        db.Index('ix_review_book_created_at', 'book_id', 'created_at'),
+    )
+
 # İstek listesi modeli
 class Wishlist(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -1147,32 +2313,51 @@ class Wishlist(db.Model):
     user = db.relationship('User', backref='wishlist_items')
     book = db.relationship('Book', backref='wishlist_items')
 
+    __table_args__ = (
+        db.Index('uq_wishlist_user_book', 'user_id', 'book_id', unique=True),
+    )
+
+# Kitabın puan toplamlarını tek atomik UPDATE ile değiştir (oku-değiştir-yaz yok)
+def adjust_book_rating(book_id, rating_delta, count_delta):
+    db.session.execute(
+        Book.__table__.update().where(Book.id == book_id).values(
+            rating_sum=Book.rating_sum + rating_delta,
+            review_count=Book.review_count + count_delta
+        )
+    )
+    bump_table_versions(db.session.connection(), ['book'])
+
 # Yorum ekle/güncelle
 @app.route('/api/books/<int:book_id>/reviews', methods=['POST'])
 @jwt_required()
 def add_review(book_id):
     try:
-        user_id = get_jwt_identity()
+        user_id = current_user.id
         data = request.get_json()
         
+        rating = int(data['rating'])
+        
         # Mevcut yorumu kontrol et
         review = Review.query.filter_by(user_id=user_id, book_id=book_id).first()
         
         if review:
             # Yorumu güncelle
-            review.rating = data['rating']
+            adjust_book_rating(book_id, rating - review.rating, 0)
+            review.rating = rating
             review.comment = data['comment']
         else:
             # Yeni yorum ekle
             review = Review(
                 user_id=user_id,
                 book_id=book_id,
-                rating=data['rating'],
+                rating=rating,
                 comment=data['comment']
             )
             db.session.add(review)
+            adjust_book_rating(book_id, rating, 1)
             
         db.session.commit()
+        response_cache.invalidate(f'reviews:{book_id}', 'books', f'book:{book_id}')
         return jsonify({"message": "Yorum başarıyla eklendi"})
         
     except Exception as e:
@@ -1181,9 +2366,12 @@ def add_review(book_id):
 
 # Kitabın yorumlarını getir
 @app.route('/api/books/<int:book_id>/reviews', methods=['GET'])
+@conditional_get('review', 'user')
+@response_cache.cached(tags=lambda book_id: [f'reviews:{book_id}', 'users'])
 def get_reviews(book_id):
     try:
-        reviews = Review.query.filter_by(book_id=book_id).all()
+        reviews = Review.query.options(joinedload(Review.user)).filter_by(
+            book_id=book_id).order_by(Review.created_at.desc()).all()
         return jsonify([{
             'id': review.id,
             'user': {
@@ -1203,7 +2391,7 @@ def get_reviews(book_id):
 @jwt_required()
 def toggle_wishlist(book_id):
     try:
-        user_id = get_jwt_identity()
+        user_id = current_user.id
         wishlist_item = Wishlist.query.filter_by(
             user_id=user_id, 
             book_id=book_id
@@ -1231,8 +2419,8 @@ def toggle_wishlist(book_id):
 @jwt_required()
 def get_wishlist():
     try:
-        user_id = get_jwt_identity()
-        wishlist = Wishlist.query.filter_by(user_id=user_id).all()
+        user_id = current_user.id
+        wishlist = Wishlist.query.options(joinedload(Wishlist.book)).filter_by(user_id=user_id).all()
         return jsonify([{
             'id': item.id,
             'book': {
@@ -1255,6 +2443,7 @@ def delete_publisher(publisher_id):
         publisher = Publisher.query.get_or_404(publisher_id)
         db.session.delete(publisher)
         db.session.commit()
+        response_cache.invalidate('publishers')
         return jsonify({"message": "Yayınevi başarıyla silindi"})
     except Exception as e:
         db.session.rollback()
@@ -1269,10 +2458,21 @@ def update_publisher(publisher_id):
         publisher = Publisher.query.get_or_404(publisher_id)
         data = request.get_json()
         
+        name_changed = data.get('name', publisher.name) != publisher.name
         publisher.name = data.get('name', publisher.name)
         publisher.description = data.get('description', publisher.description)
+        if name_changed:
+            # Yayınevi adı kitapların arama metnine dahil; diğer worker'ların indeksi updated_at'ten senkronlanır
+            result = db.session.execute(Book.__table__.update().where(
+                Book.publisher_id == publisher.id).values(updated_at=datetime.utcnow()))
+            if result.rowcount:
+                bump_table_versions(db.session.connection(), ['book'])
         
         db.session.commit()
+        response_cache.invalidate('publishers')
+        if name_changed and SEARCH_INDEX['index'] is not None:
+            for book in publisher.books:
+                index_book(book)
         return jsonify({
             'id': publisher.id,
             'name': publisher.name,
@@ -1289,43 +2489,90 @@ def update_publisher(publisher_id):
 def add_category():
     try:
         data = request.get_json()
-        category_name = data.get('name')
-        
-        if category_name not in BOOK_CATEGORIES:
-            BOOK_CATEGORIES.append(category_name)
-            return jsonify({"message": "Kategori başarıyla eklendi"})
-        return jsonify({"error": "Bu kategori zaten mevcut"}), 400
+        category_name = (data.get('name') or '').strip()
+        if not category_name or ',' in category_name:
+            return jsonify({"error": "Geçersiz kategori adı"}), 400
+
+        db.session.add(Category(name=category_name))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({"error": "Bu kategori zaten mevcut"}), 400
+        category_table.invalidate()
+        return jsonify({"message": "Kategori başarıyla eklendi"})
     except Exception as e:
+        db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
-# Kategori silme endpoint'i
+# Kategori silme endpoint'i - kitaplar silinmez, sadece bu kategoriden çıkarılır
 @app.route('/api/categories/<string:category_name>', methods=['DELETE'])
 @jwt_required()
 @admin_required()
 def delete_category(category_name):
     try:
-        if category_name in BOOK_CATEGORIES:
-            BOOK_CATEGORIES.remove(category_name)
-            return jsonify({"message": "Kategori başarıyla silindi"})
-        return jsonify({"error": "Kategori bulunamadı"}), 404
+        category = Category.query.filter_by(name=category_name).first()
+        if not category:
+            return jsonify({"error": "Kategori bulunamadı"}), 404
+
+        book_ids = [book_id for (book_id,) in db.session.query(BookCategory.book_id).filter_by(category_id=category.id)]
+        if book_ids:
+            # updated_at: arama indeksleri bu kitapları yeniden indekslesin
+            now = datetime.utcnow()
+            db.session.bulk_update_mappings(Book, [{
+                'id': book_id,
+                'category_list': ','.join(str(category_id) for category_id in parse_category_list(category_list)
+                                          if category_id != category.id) or None,
+                'updated_at': now
+            } for book_id, category_list in db.session.query(Book.id, Book.category_list).filter(Book.id.in_(
+                db.select(BookCategory.book_id).where(BookCategory.category_id == category.id)))])
+            db.session.execute(BookCategory.__table__.delete().where(BookCategory.category_id == category.id))
+            bump_table_versions(db.session.connection(), ['book'])
+        db.session.delete(category)
+        db.session.commit()
+        category_table.invalidate()
+        if book_ids:
+            response_cache.invalidate('books', *[f'book:{book_id}' for book_id in book_ids])
+        return jsonify({"message": "Kategori başarıyla silindi"})
     except Exception as e:
+        db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
-# Kategori güncelleme endpoint'i
+# Kategori güncelleme endpoint'i - kitaplar id ile bağlı olduğu için sadece ad değişir
 @app.route('/api/categories/<string:old_name>', methods=['PUT'])
 @jwt_required()
 @admin_required()
 def update_category(old_name):
     try:
         data = request.get_json()
-        new_name = data.get('name')
-        
-        if old_name in BOOK_CATEGORIES:
-            index = BOOK_CATEGORIES.index(old_name)
-            BOOK_CATEGORIES[index] = new_name
-            return jsonify({"message": "Kategori başarıyla güncellendi"})
-        return jsonify({"error": "Kategori bulunamadı"}), 404
+        new_name = (data.get('name') or '').strip()
+        if not new_name or ',' in new_name:
+            return jsonify({"error": "Geçersiz kategori adı"}), 400
+
+        category = Category.query.filter_by(name=old_name).first()
+        if not category:
+            return jsonify({"error": "Kategori bulunamadı"}), 404
+
+        # Kitap yanıtlarındaki kategori adı da değişir
+        book_ids = [book_id for (book_id,) in db.session.query(BookCategory.book_id).filter_by(category_id=category.id)]
+        category.name = new_name
+        if book_ids:
+            # updated_at: arama indeksleri bu kitapları yeniden indekslesin
+            db.session.execute(Book.__table__.update().where(Book.id.in_(
+                db.select(BookCategory.book_id).where(BookCategory.category_id == category.id)
+            )).values(updated_at=datetime.utcnow()))
+            bump_table_versions(db.session.connection(), ['book'])
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({"error": "Bu kategori zaten mevcut"}), 400
+        category_table.invalidate()
+        if book_ids:
+            response_cache.invalidate('books', *[f'book:{book_id}' for book_id in book_ids])
+        return jsonify({"message": "Kategori başarıyla güncellendi"})
     except Exception as e:
+        db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
 # Kullanıcının yorumlarını getir
@@ -1333,8 +2580,8 @@ def update_category(old_name):
 @jwt_required()
 def get_user_reviews():
     try:
-        user_id = get_jwt_identity()
-        reviews = Review.query.filter_by(user_id=user_id).all()
+        user_id = current_user.id
+        reviews = Review.query.options(joinedload(Review.book)).filter_by(user_id=user_id).all()
         return jsonify([{
             'id': review.id,
             'book': {
@@ -1355,24 +2602,267 @@ def get_user_reviews():
 @jwt_required()
 def delete_review(review_id):
     try:
-        user_id = get_jwt_identity()
+        user_id = current_user.id
         review = Review.query.get_or_404(review_id)
         
         if review.user_id != user_id:
             return jsonify({"error": "Bu yorumu silme yetkiniz yok"}), 403
             
         db.session.delete(review)
+        adjust_book_rating(review.book_id, -review.rating, -1)
         db.session.commit()
+        response_cache.invalidate(f'reviews:{review.book_id}', 'books', f'book:{review.book_id}')
         return jsonify({"message": "Yorum başarıyla silindi"})
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
+# Mevcut veritabanlarında eksik kolonları oluştur (create_all sadece yeni tabloları oluşturur)
+def upgrade_schema():
+    dialect = db.engine.dialect
+    preparer = dialect.identifier_preparer
+    inspector = db.inspect(db.engine)
+    added = []
+    for table in db.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = (f"ALTER TABLE {preparer.format_table(table)} "
+                   f"ADD COLUMN {preparer.format_column(column)} {column.type.compile(dialect=dialect)}")
+            if column.server_default is not None:
+                default = column.server_default.arg
+                if isinstance(default, str):
+                    ddl += f" DEFAULT '{default}'"
+                else:
+                    ddl += f" DEFAULT {default.compile(dialect=dialect)}"
+            with db.engine.begin() as conn:
+                conn.execute(db.text(ddl))
+            added.append((table.name, column.name))
+    return added
+
+# Modellerde tanımlı olup veritabanında olmayan indeksleri tabloyu kilitlemeden oluştur
+def create_missing_indexes():
+    created = []
+    for table in db.metadata.sorted_tables:
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if create_index_online(db.engine, index):
+                created.append(index.name)
+    return created
+
+def model_index(model, name):
+    return next(index for index in model.__table__.indexes if index.name == name)
+
+# Veri düzeltmesi veya yeni indeks gerektiren değişiklikler sürümlü geçiş olarak eklenir.
+# Sürüm numaraları değiştirilmez; yeni geçiş her zaman en büyük numaradan sonra gelir.
+schema_migrations = MigrationRunner(db)
+
+@schema_migrations.migration(1, 'sepet, istek listesi ve yorumlarda tekrarları birleştir, benzersiz indeksler')
+def merge_duplicate_rows():
+    # Sepet: aynı kitap için ilk satır kalır, adetler toplanır
+    db.session.execute(db.text(
+        "UPDATE cart_item SET quantity = (SELECT SUM(c.quantity) FROM cart_item c "
+        "WHERE c.user_id = cart_item.user_id AND c.book_id = cart_item.book_id) "
+        "WHERE id IN (SELECT MIN(id) FROM cart_item GROUP BY user_id, book_id HAVING COUNT(*) > 1)"))
+    db.session.execute(db.text(
+        "DELETE FROM cart_item WHERE id NOT IN (SELECT MIN(id) FROM cart_item GROUP BY user_id, book_id)"))
+    db.session.execute(db.text(
+        "DELETE FROM wishlist WHERE id NOT IN (SELECT MIN(id) FROM wishlist GROUP BY user_id, book_id)"))
+    # Yorum: kullanıcının kitaba yazdığı en son yorum kalır
+    book_ids = [book_id for (book_id,) in db.session.execute(db.text(
+        "SELECT DISTINCT book_id FROM review GROUP BY user_id, book_id HAVING COUNT(*) > 1"))]
+    db.session.execute(db.text(
+        "DELETE FROM review WHERE id NOT IN (SELECT MAX(id) FROM review GROUP BY user_id, book_id)"))
+    if book_ids:
+        bump_table_versions(db.session.connection(), ['review'])
+    db.session.commit()
+    if book_ids:
+        backfill_book_ratings()
+        response_cache.invalidate('books', *[f'reviews:{book_id}' for book_id in book_ids])
+    for model, name in ((CartItem, 'uq_cart_item_user_book'), (Wishlist, 'uq_wishlist_user_book'),
+                        (Review, 'uq_review_user_book')):
+        create_index_online(db.engine, model_index(model, name))
+
+@schema_migrations.migration(2, 'sipariş ve yorum sorguları için indeksler')
+def add_order_and_review_indexes():
+    for model, name in ((Review, 'ix_review_book_created_at'), (Order, 'ix_order_user_created_at'),
+                        (OrderItem, 'ix_order_item_order_id'), (OrderItem, 'ix_order_item_book_id')):
+        create_index_online(db.engine, model_index(model, name))
+
+@schema_migrations.migration(3, 'kategorileri category tablosuna taşı, kitapları book_category ile bağla')
+def move_categories_to_table():
+    # Eski şemada kategori adları book.category kolonunda virgülle ayrılmış metin olarak tutuluyordu ("Roman, Tarih")
+    legacy_column = 'category' in {column['name'] for column in db.inspect(db.engine).get_columns('book')}
+    legacy = []
+    if legacy_column:
+        legacy = db.session.execute(db.text("SELECT id, category FROM book WHERE category IS NOT NULL")).fetchall()
+    existing = {name for (name,) in db.session.query(Category.name)}
+    for name in list(DEFAULT_BOOK_CATEGORIES) + [name for _, value in legacy for name in split_categories(value)]:
+        if name not in existing:
+            db.session.add(Category(name=name))
+            existing.add(name)
+    db.session.flush()
+    category_ids = dict(db.session.query(Category.name, Category.id))
+    links = [
+        {'book_id': book_id, 'category_id': category_ids[name], 'position': position}
+        for book_id, value in legacy for position, name in enumerate(split_categories(value))
+    ]
+    if links:
+        db.session.execute(BookCategory.__table__.insert(), links)
+        db.session.execute(db.text("UPDATE book SET category_list = :category_list WHERE id = :id"), [
+            {'id': book_id, 'category_list': ','.join(str(category_ids[name]) for name in split_categories(value))}
+            for book_id, value in legacy if split_categories(value)
+        ])
+        bump_table_versions(db.session.connection(), ['book'])
+    if legacy_column:
+        db.session.execute(db.text("DROP INDEX IF EXISTS ix_book_category_created_at_id"))
+    db.session.commit()
+    if links:
+        response_cache.invalidate('books')
+    backfill_category_counts()
+
+# Kitap resimlerinin disk durumunu toplu olarak güncelle (tek dizin taraması)
+def reconcile_book_images():
+    present = {entry.name for entry in os.scandir(app.config['UPLOAD_FOLDER']) if entry.is_file()}
+    changes = []
+    for book_id, image_url, has_image, image_variants in db.session.query(
+            Book.id, Book.image_url, Book.has_image, Book.image_variants):
+        exists = bool(image_url) and image_url in present
+        # generate_variants en son 640 JPEG'i yazar
+        variants = exists and variant_name(image_url, 640, 'jpg') in present
+        if (has_image, image_variants) != (exists, variants):
+            changes.append({'id': book_id, 'has_image': exists, 'image_variants': variants})
+    db.session.bulk_update_mappings(Book, changes)
+    if changes:
+        bump_table_versions(db.session.connection(), ['book'])
+    db.session.commit()
+    if changes:
+        response_cache.invalidate('books', *[f"book:{change['id']}" for change in changes])
+    return len(changes)
+
+# Eski (zaman damgalı) yüklemeleri içerik adresli dosyalara taşı; aynı içerikli kopyalar tek dosyada birleşir
+def migrate_legacy_uploads():
+    folder = app.config['UPLOAD_FOLDER']
+    converted = {}
+
+    def convert(name):
+        if name not in converted:
+            with open(os.path.join(folder, name), 'rb') as f:
+                converted[name] = store_image_stream(folder, f)
+        return converted[name]
+
+    book_ids = []
+    for book in Book.query.filter(Book.image_url.isnot(None)):
+        if not is_content_addressed(book.image_url) and os.path.exists(os.path.join(folder, book.image_url)):
+            book.image_url = convert(book.image_url)
+            book.has_image = True
+            book.image_variants = True
+            book_ids.append(book.id)
+    for user in User.query.filter(User.avatar.isnot(None)):
+        if not is_content_addressed(user.avatar) and os.path.exists(os.path.join(folder, user.avatar)):
+            user.avatar = convert(user.avatar)
+    db.session.commit()
+    if book_ids:
+        response_cache.invalidate('books', *[f'book:{book_id}' for book_id in book_ids])
+
+    response_cache.invalidate('users')
+    for name in converted:
+        os.remove(os.path.join(folder, name))
+    return len(converted), len(set(converted.values()))
+
+@app.cli.command('migrate-uploads')
+def migrate_uploads_command():
+    """Eski yüklemeleri içerik adresli dosyalara taşır ve küçük boyutlarını üretir."""
+    converted, stored = migrate_legacy_uploads()
+    print(f"{converted} dosya taşındı, {stored} benzersiz dosya olarak saklandı")
+
+@app.cli.command('reconcile-images')
+def reconcile_images_command():
+    """Kitap resimlerinin has_image ve image_variants bilgisini uploads klasörüyle eşitler."""
+    changed = reconcile_book_images()
+    print(f"{changed} kitabın resim durumu güncellendi")
+
+# Puan toplamlarını yorum tablosundan yeniden hesapla
+def backfill_book_ratings():
+    rating_sum = db.select(func.coalesce(func.sum(Review.rating), 0)).where(
+        Review.book_id == Book.id).scalar_subquery()
+    review_count = db.select(func.count(Review.id)).where(
+        Review.book_id == Book.id).scalar_subquery()
+    db.session.execute(Book.__table__.update().values(rating_sum=rating_sum, review_count=review_count))
+    bump_table_versions(db.session.connection(), ['book'])
+    db.session.commit()
+    # Kitap detayları etiketle tek tek silinmez; ETag'leri değiştiği için önbellekte ıskalar
+    response_cache.invalidate('books')
+
+@app.cli.command('backfill-ratings')
+def backfill_ratings_command():
+    """Kitapların puan toplamı ve yorum sayısını yorumlardan yeniden hesaplar."""
+    backfill_book_ratings()
+    print("Kitap puanları güncellendi")
+
+# Kategori kitap sayılarını kitap tablosundan yeniden hesapla
+def backfill_category_counts():
+    book_count = db.select(func.count(BookCategory.book_id)).where(
+        BookCategory.category_id == Category.id).scalar_subquery()
+    db.session.execute(Category.__table__.update().values(book_count=book_count))
+    bump_table_versions(db.session.connection(), ['category'])
+    db.session.commit()
+    category_table.invalidate()
+
+@app.cli.command('backfill-category-counts')
+def backfill_category_counts_command():
+    """Kategorilerin kitap sayılarını kitaplardan yeniden hesaplar."""
+    backfill_category_counts()
+    print("Kategori kitap sayıları güncellendi")
+
+@app.cli.command('revoke-tokens')
+@click.argument('email')
+def revoke_tokens_command(email):
+    """Kullanıcının tüm token'larını iptal eder (rol değişikliğinden sonra da kullanılır)."""
+    user = User.query.filter_by(email=email).first()
+    if not user:
+        print("Kullanıcı bulunamadı")
+        return
+    revoke_user_tokens(user)
+    print(f"{email} kullanıcısının token'ları iptal edildi")
+
+# Şemayı güncelle: yeni tablolar ve kolonlar, veri doldurma, sürümlü geçişler, eksik indeksler
+def upgrade_database():
+    # Tabloları oluştur
+    db.create_all()
+    added = upgrade_schema()
+    for name in VERSIONED_TABLES:
+        if not db.session.get(TableVersion, name):
+            db.session.add(TableVersion(name=name, version=0))
+    db.session.commit()
+    # has_image / image_variants yeni eklendiyse mevcut kitaplar için doldur
+    if ('book', 'has_image') in added or ('book', 'image_variants') in added:
+        reconcile_book_images()
+    if ('book', 'review_count') in added:
+        backfill_book_ratings()
+    schema_migrations.run()
+    return create_missing_indexes()
+
+@app.cli.command('db-upgrade')
+def db_upgrade_command():
+    """Eksik tablo, kolon ve indeksleri oluşturur ve bekleyen geçişleri uygular."""
+    created = upgrade_database()
+    for name in created:
+        print(f"İndeks oluşturuldu: {name}")
+    print("Veritabanı güncel")
+
+@app.cli.command('db-status')
+def db_status_command():
+    """Bekleyen geçişleri listeler."""
+    pending = schema_migrations.pending()
+    for version, name in pending:
+        print(f"{version}: {name}")
+    print(f"{len(pending)} bekleyen geçiş")
+
 # Veritabanı başlatma
 def init_db():
     with app.app_context():
-        # Tabloları oluştur
-        db.create_all()
+        upgrade_database()
         
         # Admin kullanıcısı kontrol et ve oluştur
         admin = User.query.filter_by(email='admin@admin.com').first()
@@ -1380,16 +2870,16 @@ def init_db():
             admin = User(
                 name='Admin',
                 email='admin@admin.com',
-                password=generate_password_hash('admin123'),
+                password=password_hasher.hash('admin123'),
                 role='admin'
             )
             db.session.add(admin)
             try:
                 db.session.commit()
-                print("Admin kullanıcısı oluşturuldu!")
-            except Exception as e:
+                app.logger.info("Admin kullanıcısı oluşturuldu")
+            except Exception:
                 db.session.rollback()
-                print("Hata:", str(e))
+                app.logger.exception("Admin kullanıcısı oluşturulamadı")
 
 if __name__ == '__main__':
     init_db()
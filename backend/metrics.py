@@ -0,0 +1,324 @@
+import atexit
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _copy(self, value):
+        return value
+
+    def snapshot(self):
+        with self._lock:
+            samples = [[list(key), self._copy(value)] for key, value in self._values.items()]
+        return {'kind': self.kind, 'help': self.help, 'labelnames': list(self.labelnames), 'samples': samples}
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    # Başka bir yerde tutulan kümülatif sayacı yansıtır (örn. önbellek istatistikleri)
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+# Kovalar ayrı ayrı (kümülatif olmayan) sayılır; Prometheus çıktısında toplanır
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def _copy(self, value):
+        return [list(value[0]), value[1], value[2]]
+
+    def snapshot(self):
+        return dict(super().snapshot(), buckets=list(self.buckets))
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = {}
+        self.collectors = []
+
+    def _register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metrik zaten tanımlı: {metric.name}")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=()):
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    # Toplama anında çağrılır; başka nesnelerde tutulan değerleri metriklere aktarır
+    def collector(self, fn):
+        self.collectors.append(fn)
+        return fn
+
+    def snapshot(self):
+        for collect in self.collectors:
+            collect()
+        return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+    # Süreç metriklerini belirli aralıklarla ortak klasöre yazar (gunicorn worker'ları için)
+    def start_flushing(self, store, interval=5):
+        def flush():
+            while True:
+                time.sleep(interval)
+                store.write(os.getpid(), self.snapshot())
+
+        threading.Thread(target=flush, daemon=True, name='metrics-flush').start()
+        atexit.register(lambda: store.write(os.getpid(), self.snapshot()))
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+# Her süreç kendi dosyasına (<pid>.json) yazar. Ölen worker'ların sayaçları archive.json'da
+# toplanır ki toplamlar geriye gitmesin; gauge'lar sadece yaşayan süreçlerden okunur.
+class MultiProcessStore:
+    ARCHIVE = 'archive.json'
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _write(self, name, snapshot):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, self._path(name))
+
+    def _read(self, name):
+        try:
+            with open(self._path(name)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write(self, pid, snapshot):
+        self._write(f'{pid}.json', snapshot)
+
+    def snapshots(self):
+        result = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith('.json'):
+                continue
+            snapshot = self._read(entry.name)
+            if snapshot is None:
+                continue
+            if entry.name != self.ARCHIVE and not _pid_alive(int(entry.name[:-5])):
+                snapshot = without_gauges(snapshot)
+            result.append(snapshot)
+        return result
+
+    # gunicorn child_exit kancasından çağrılır (tek süreç: master)
+    def mark_dead(self, pid):
+        snapshot = self._read(f'{pid}.json')
+        if snapshot is None:
+            return
+        archive = self._read(self.ARCHIVE) or {}
+        self._write(self.ARCHIVE, to_snapshot(merge_snapshots([archive, without_gauges(snapshot)])))
+        os.remove(self._path(f'{pid}.json'))
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(('.json', '.tmp')):
+                os.remove(entry.path)
+
+
+def without_gauges(snapshot):
+    return {name: metric for name, metric in snapshot.items() if metric['kind'] != 'gauge'}
+
+
+# Süreç anlık görüntülerini toplar: sayaç ve histogramlar toplanır, gauge'lar da toplanır
+# (örn. tüm worker'larda kullanımdaki bağlantı sayısı)
+def merge_snapshots(snapshots):
+    merged = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.get(name)
+            if target is None:
+                target = merged[name] = dict(metric, samples={})
+            samples = target['samples']
+            for labels, value in metric['samples']:
+                key = tuple(labels)
+                current = samples.get(key)
+                if metric['kind'] == 'histogram':
+                    if current is None:
+                        samples[key] = [list(value[0]), value[1], value[2]]
+                    else:
+                        current[0] = [a + b for a, b in zip(current[0], value[0])]
+                        current[1] += value[1]
+                        current[2] += value[2]
+                else:
+                    samples[key] = (current or 0) + value
+    return merged
+
+
+def to_snapshot(merged):
+    return {name: dict(metric, samples=[[list(key), value] for key, value in metric['samples'].items()])
+            for name, metric in merged.items()}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+# Prometheus metin biçimi (text/plain; version=0.0.4)
+def render(merged):
+    lines = []
+    for name in sorted(merged):
+        metric = merged[name]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['kind']}")
+        names = metric['labelnames']
+        for key in sorted(metric['samples']):
+            value = metric['samples'][key]
+            if metric['kind'] != 'histogram':
+                lines.append(f'{name}{_labels(names, key)} {_number(value)}')
+                continue
+            counts, total, count = value
+            cumulative = 0
+            for bound, bucket_count in zip(list(metric['buckets']) + [math.inf], counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_labels(names, key, [('le', _number(bound))])} {cumulative}")
+            lines.append(f'{name}_sum{_labels(names, key)} {_number(total)}')
+            lines.append(f'{name}_count{_labels(names, key)} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+def collect(registry, store=None):
+    snapshot = registry.snapshot()
+    if store is None:
+        return render(merge_snapshots([snapshot]))
+    store.write(os.getpid(), snapshot)
+    return render(merge_snapshots(store.snapshots()))
+
+
+# İstek bilgisi olmayan sorgular (arka plan thread'leri, CLI) "background" olarak etiketlenir
+def current_endpoint():
+    if not has_request_context():
+        return 'background'
+    return request.endpoint or 'unmatched'
+
+
+# Endpoint başına istek sayısı, süre histogramı ve istek başına SQL ifadesi sayısı
+def instrument_app(app, registry):
+    requests_total = registry.counter(
+        'http_requests_total', 'HTTP istek sayısı', ('endpoint', 'method', 'status'))
+    duration = registry.histogram(
+        'http_request_duration_seconds', 'HTTP istek süresi (saniye)', ('endpoint', 'method'))
+    statements_per_request = registry.histogram(
+        'db_statements_per_request', 'İstek başına SQL ifadesi sayısı', ('endpoint',),
+        buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100))
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        g.db_statements = 0
+
+    @app.after_request
+    def record_request_metrics(response):
+        if 'metrics_started' in g:
+            endpoint = current_endpoint()
+            requests_total.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+            duration.observe(time.perf_counter() - g.metrics_started, endpoint=endpoint, method=request.method)
+            statements_per_request.observe(g.db_statements, endpoint=endpoint)
+        return response
+
+
+# SQL ifadelerinin sayısı ve süresi (endpoint etiketiyle)
+def instrument_engine(engine, registry):
+    statements = registry.counter('db_statements_total', 'Çalışan SQL ifadesi sayısı', ('endpoint',))
+    seconds = registry.counter('db_statement_seconds_total', 'SQL ifadelerinde geçen süre (saniye)', ('endpoint',))
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+        context.metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        endpoint = current_endpoint()
+        statements.inc(endpoint=endpoint)
+        seconds.inc(time.perf_counter() - context.metrics_started, endpoint=endpoint)
+        if endpoint != 'background' and 'db_statements' in g:
+            g.db_statements += 1
@@ -0,0 +1,94 @@
+import logging
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, text
+from sqlalchemy.schema import CreateIndex
+
+logger = logging.getLogger(__name__)
+
+# Uygulanan geçişler bu tabloda tutulur (modellerin metadata'sından ayrı)
+migration_metadata = MetaData()
+schema_migration = Table(
+    'schema_migration', migration_metadata,
+    Column('version', Integer, primary_key=True),
+    Column('name', String(200), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+
+# İndeks durumu: None (yok), True (kullanılabilir), False (yarım kalmış CONCURRENTLY, geçersiz)
+def index_state(connection, name):
+    if connection.dialect.name == 'postgresql':
+        row = connection.execute(text(
+            "SELECT i.indisvalid FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+            "WHERE c.relname = :name"), {'name': name}).first()
+        return None if row is None else bool(row[0])
+    if connection.dialect.name == 'sqlite':
+        row = connection.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = :name"), {'name': name}).first()
+        return None if row is None else True
+    inspector = inspect(connection)
+    for table_name in inspector.get_table_names():
+        if any(index['name'] == name for index in inspector.get_indexes(table_name)):
+            return True
+    return None
+
+
+# İndeksi tabloyu kilitlemeden oluştur. Postgres'te CREATE INDEX CONCURRENTLY transaction
+# dışında çalışmak zorunda; yarıda kalmış (geçersiz) bir indeks önce kaldırılır.
+def create_index_online(engine, index):
+    postgres = engine.dialect.name == 'postgresql'
+    with engine.connect() as connection:
+        if postgres:
+            connection = connection.execution_options(isolation_level='AUTOCOMMIT')
+        state = index_state(connection, index.name)
+        if state:
+            return False
+        ddl = str(CreateIndex(index).compile(dialect=engine.dialect))
+        if postgres:
+            if state is False:
+                name = engine.dialect.identifier_preparer.quote(index.name)
+                connection.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS {name}'))
+            ddl = ddl.replace(' INDEX ', ' INDEX CONCURRENTLY ', 1)
+            connection.execute(text(ddl))
+        else:
+            with connection.begin():
+                connection.execute(text(ddl))
+    return True
+
+
+# Sürümlü şema geçişleri: her geçiş bir kez ve sürüm sırasıyla çalışır.
+# Geçiş fonksiyonu kendi işini commit eder; kaydı ancak başarılı olursa yazılır.
+class MigrationRunner:
+    def __init__(self, db):
+        self.db = db
+        self.migrations = {}
+
+    def migration(self, version, name):
+        def decorator(fn):
+            if version in self.migrations:
+                raise ValueError(f'Geçiş sürümü tekrar kullanıldı: {version}')
+            self.migrations[version] = (name, fn)
+            return fn
+        return decorator
+
+    def applied(self):
+        migration_metadata.create_all(bind=self.db.engine, checkfirst=True)
+        with self.db.engine.connect() as connection:
+            return {row.version for row in connection.execute(schema_migration.select())}
+
+    def pending(self):
+        applied = self.applied()
+        return [(version, self.migrations[version][0])
+                for version in sorted(self.migrations) if version not in applied]
+
+    def run(self):
+        done = []
+        for version, name in self.pending():
+            logger.info("Geçiş %s uygulanıyor: %s", version, name)
+            self.migrations[version][1]()
+            with self.db.engine.begin() as connection:
+                connection.execute(schema_migration.insert().values(
+                    version=version, name=name, applied_at=datetime.utcnow()))
+            done.append(version)
+        return done
@@ -0,0 +1,67 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+def normalize_method(method):
+    # "pbkdf2:sha256" -> "pbkdf2:sha256:260000" (hash'lerin başında saklanan biçim)
+    parts = method.split(':')
+    if parts[0] == 'pbkdf2' and len(parts) == 2:
+        return f'{method}:{DEFAULT_PBKDF2_ITERATIONS}'
+    return method
+
+
+# Şifre hash'leme sınırlı bir thread havuzunda yapılır. hashlib.pbkdf2_hmac GIL'i bıraktığı için
+# hash'ler paralel çalışır; havuz ve kuyruk doluysa istek beklemek yerine PasswordHasherBusy alır.
+class PasswordHasher:
+    def __init__(self, method='pbkdf2:sha256', max_workers=4, max_pending=64, timeout=30):
+        self.method = normalize_method(method)
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='password')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self.rehashed = 0
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+        try:
+            future = self._pool.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    # Kuyrukta timeout süresinden fazla bekleyen iş iptal edilir; aşırı yük kuyruk doluyken
+    # olduğu gibi PasswordHasherBusy ile bildirilir
+    def _wait(self, future):
+        try:
+            return future.result(self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise PasswordHasherBusy()
+
+    def hash(self, password):
+        return self._wait(self._run(generate_password_hash, password, self.method))
+
+    def verify(self, pwhash, password):
+        return self._wait(self._run(check_password_hash, pwhash, password))
+
+    def needs_rehash(self, pwhash):
+        return pwhash.split('$', 1)[0] != self.method
+
+    # Başarılı girişten sonra eski parametrelerle saklanmış hash'i arka planda yeniler.
+    # save(yeni_hash) havuz thread'inde çağrılır; havuz doluysa bir sonraki girişe bırakılır.
+    def rehash_later(self, password, save):
+        def rehash():
+            save(generate_password_hash(password, self.method))
+            self.rehashed += 1
+        try:
+            self._run(rehash)
+        except PasswordHasherBusy:
+            pass
@@ -0,0 +1,268 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+PROFILE_ID_RE = re.compile(r'^[\w-]+$')
+
+# Profil dosya türleri: uzantı ve indirme tipi
+PROFILE_FILES = {
+    'speedscope': ('.speedscope.json', 'application/json'),
+    'folded': ('.folded', 'text/plain'),
+    'pstats': ('.pstats', 'application/octet-stream'),
+    'txt': ('.txt', 'text/plain'),
+}
+
+
+# İstek thread'inin yığınını ayrı bir thread'den belirli aralıklarla okur.
+# Örnekler (geçen süre, kökten yaprağa çerçeveler) olarak tutulur.
+class StackSampler:
+    def __init__(self, thread_id, interval=0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name='profile-sampler')
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+                frame = frame.f_back
+            self.samples.append((now - last, tuple(reversed(stack))))
+            last = now
+
+    def start(self):
+        # GIL varsayılan olarak 5 ms'de bir el değiştirir; örnekleyici aralığına düşürülmezse
+        # kısa isteklerde çok az örnek alınır. Profil bitince eski değer geri yüklenir.
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self.interval, self._switch_interval))
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        sys.setswitchinterval(self._switch_interval)
+
+
+def speedscope_document(name, samples):
+    frames = []
+    frame_index = {}
+    stacks = []
+    for _, stack in samples:
+        indices = []
+        for frame in stack:
+            if frame not in frame_index:
+                frame_index[frame] = len(frames)
+                frames.append({'name': frame[0], 'file': frame[1], 'line': frame[2]})
+            indices.append(frame_index[frame])
+        stacks.append(indices)
+    weights = [elapsed for elapsed, _ in samples]
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': name,
+        'exporter': 'kitap-market',
+        'activeProfileIndex': 0,
+        'shared': {'frames': frames},
+        'profiles': [{
+            'type': 'sampled', 'name': name, 'unit': 'seconds',
+            'startValue': 0, 'endValue': sum(weights), 'samples': stacks, 'weights': weights,
+        }],
+    }
+
+
+# flamegraph.pl / inferno girdisi: "kök;...;yaprak mikrosaniye"
+def folded_stacks(samples):
+    totals = Counter()
+    for elapsed, stack in samples:
+        key = ';'.join(f'{name} ({os.path.basename(filename)}:{line})' for name, filename, line in stack)
+        totals[key] += elapsed
+    return ''.join(f'{stack} {max(int(total * 1e6), 1)}\n' for stack, total in totals.most_common())
+
+
+# İsteğe bağlı istek profili. Admin'in gönderdiği başlıkla (authorize() True dönmeli) ya da
+# sample_rate oranında rastgele seçilen istekler profillenir; çalışan SQL ifadeleri de kaydedilir.
+# Aynı anda süreç başına tek istek profillenir. Kapalıyken maliyet istek başına bir başlık kontrolü.
+class RequestProfiler:
+    def __init__(self, directory, sample_rate=0.0, interval=0.001, max_profiles=200,
+                 header='X-Profile', default_mode='sample'):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.max_profiles = max_profiles
+        self.header = header
+        self.default_mode = default_mode
+        self.authorize = lambda: False
+        self._busy = threading.Lock()
+        self.active = False
+
+    def init_app(self, app, authorize):
+        self.authorize = authorize
+        os.makedirs(self.directory, exist_ok=True)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._abort)
+
+    def instrument_engine(self, engine):
+        @event.listens_for(engine, 'before_cursor_execute')
+        def start_statement(conn, cursor, statement, parameters, context, executemany):
+            if self.active:
+                context.profile_started = time.perf_counter()
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def record_statement(conn, cursor, statement, parameters, context, executemany):
+            if not self.active or not has_request_context():
+                return
+            profile = g.get('profile')
+            if profile is not None and hasattr(context, 'profile_started'):
+                profile['sql'].append({
+                    'statement': statement,
+                    'duration_ms': round((time.perf_counter() - context.profile_started) * 1000, 3),
+                    'executemany': executemany,
+                })
+
+    def _requested_mode(self):
+        if self.header in request.headers:
+            mode = request.headers[self.header].lower()
+            mode = self.default_mode if mode in ('1', 'true') else mode
+            if mode in ('sample', 'cprofile') and self.authorize():
+                return mode
+            return None
+        if self.sample_rate and random.random() < self.sample_rate:
+            return self.default_mode
+        return None
+
+    def _start(self):
+        if not self.sample_rate and self.header not in request.headers:
+            return
+        mode = self._requested_mode()
+        if mode is None or not self._busy.acquire(blocking=False):
+            return
+        profile = {'mode': mode, 'sql': [], 'started': time.perf_counter()}
+        if mode == 'cprofile':
+            profile['profiler'] = cProfile.Profile()
+            profile['profiler'].enable()
+        else:
+            profile['sampler'] = StackSampler(threading.get_ident(), self.interval)
+            profile['sampler'].start()
+        g.profile = profile
+        self.active = True
+
+    def _stop(self, profile):
+        if 'profiler' in profile:
+            profile['profiler'].disable()
+        else:
+            profile['sampler'].stop()
+        profile['duration'] = time.perf_counter() - profile['started']
+        g.profile = None
+        self.active = False
+        self._busy.release()
+
+    def _finish(self, response):
+        profile = g.get('profile')
+        if profile is None:
+            return response
+        self._stop(profile)
+        profile_id = f"{datetime.utcnow():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}"
+        meta = {
+            'id': profile_id,
+            'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+            'mode': profile['mode'],
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'request_id': g.get('request_id'),
+            'duration_ms': round(profile['duration'] * 1000, 2),
+            'sql_count': len(profile['sql']),
+            'sql_ms': round(sum(item['duration_ms'] for item in profile['sql']), 3),
+            'sql': profile['sql'],
+        }
+        response.headers['X-Profile-Id'] = profile_id
+        # Yazma maliyeti sadece profillenen isteğe eklenir (ölçülen süreye dahil değil)
+        self._write(meta, profile)
+        return response
+
+    def _abort(self, error=None):
+        profile = g.get('profile')
+        if profile is not None:
+            self._stop(profile)
+
+    def _path(self, profile_id, suffix):
+        return os.path.join(self.directory, profile_id + suffix)
+
+    def _write(self, meta, profile):
+        profile_id = meta['id']
+        name = f"{meta['method']} {meta['path']}"
+        if 'profiler' in profile:
+            profile['profiler'].dump_stats(self._path(profile_id, '.pstats'))
+            text = io.StringIO()
+            pstats.Stats(profile['profiler'], stream=text).sort_stats('cumulative').print_stats(40)
+            with open(self._path(profile_id, '.txt'), 'w') as f:
+                f.write(text.getvalue())
+            meta['files'] = ['pstats', 'txt']
+        else:
+            samples = profile['sampler'].samples
+            with open(self._path(profile_id, '.speedscope.json'), 'w') as f:
+                json.dump(speedscope_document(name, samples), f)
+            with open(self._path(profile_id, '.folded'), 'w') as f:
+                f.write(folded_stacks(samples))
+            meta['files'] = ['speedscope', 'folded']
+            meta['samples'] = len(samples)
+        with open(self._path(profile_id, '.meta.json'), 'w') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        self._prune()
+
+    def _prune(self):
+        ids = sorted(name[:-len('.meta.json')] for name in os.listdir(self.directory) if name.endswith('.meta.json'))
+        for profile_id in ids[:max(len(ids) - self.max_profiles, 0)]:
+            for suffix in ['.meta.json'] + [suffix for suffix, _ in PROFILE_FILES.values()]:
+                try:
+                    os.remove(self._path(profile_id, suffix))
+                except FileNotFoundError:
+                    pass
+
+    def get(self, profile_id):
+        if not PROFILE_ID_RE.match(profile_id):
+            return None
+        try:
+            with open(self._path(profile_id, '.meta.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    # En yeni profiller önce; SQL listesi sadece tekil profilde döner
+    def list(self, limit=50):
+        ids = sorted((name[:-len('.meta.json')] for name in os.listdir(self.directory)
+                      if name.endswith('.meta.json')), reverse=True)
+        profiles = []
+        for profile_id in ids[:limit]:
+            meta = self.get(profile_id)
+            if meta is not None:
+                meta.pop('sql', None)
+                profiles.append(meta)
+        return profiles
+
+    def file_path(self, profile_id, kind):
+        if kind not in PROFILE_FILES or self.get(profile_id) is None:
+            return None, None
+        suffix, mimetype = PROFILE_FILES[kind]
+        path = self._path(profile_id, suffix)
+        return (path, mimetype) if os.path.exists(path) else (None, None)
@@ -0,0 +1,293 @@
+import bisect
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+
+# Türkçe harfleri ASCII karşılıklarına indir (arama "kasik" ile "kaşık"ı bulabilsin).
+# Sözlüklü str.translate ASCII dışı metinde yavaş olduğu için harf harf replace kullanılır.
+TURKISH_FOLD = (
+    ('ı', 'i'), ('ş', 's'), ('ğ', 'g'), ('ü', 'u'), ('ö', 'o'), ('ç', 'c'),
+    ('â', 'a'), ('î', 'i'), ('û', 'u'),
+)
+
+TOKEN_RE = re.compile(r'\w+')
+
+# Alan ağırlıkları - başlıktaki eşleşme açıklamadakinden daha değerli
+FIELD_WEIGHTS = {
+    'title': 3.0,
+    'author': 2.0,
+    'publisher': 1.5,
+    'category': 1.0,
+    'description': 1.0,
+}
+
+# BM25 parametreleri
+K1 = 1.2
+B = 0.75
+
+# Bir önek sorgusunun genişletilebileceği en fazla terim sayısı
+MAX_PREFIX_TERMS = 64
+
+# En seyrek sorgu kelimesinin aday sayısı bundan azsa tüm adaylar puanlanır; fazlaysa etkiye
+# göre sıralı listelerden ilk limit sonuç bulununca durulur (Threshold Algorithm). Kelimeler
+# birlikte seyrek geçiyorsa bu erken durmaz; aday sayısının TOP_K_BUDGET katı kitap okunduktan
+# sonra tüm adayların puanlanmasına geçilir.
+EXHAUSTIVE_LIMIT = 2000
+TOP_K_BUDGET = 0.5
+
+
+def fold(text):
+    # Python'un lower() fonksiyonu Türkçe I/İ harflerini yanlış küçültür, önce elle çevir
+    text = text.replace('I', 'ı').replace('İ', 'i').lower()
+    if text.isascii():
+        return text
+    for letter, ascii_letter in TURKISH_FOLD:
+        if letter in text:
+            text = text.replace(letter, ascii_letter)
+    if text.isascii():
+        return text
+    text = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(fold(text)) if text else []
+
+
+def field_frequencies(fields):
+    frequencies = {}
+    length = 0.0
+    for field, weight in FIELD_WEIGHTS.items():
+        tokens = tokenize(fields.get(field))
+        for token in tokens:
+            frequencies[token] = frequencies.get(token, 0.0) + weight
+        length += weight * len(tokens)
+    return frequencies, length
+
+
+# BM25 puanı idf(terim) * etki(kitap, terim) olarak ayrılır. Etki (terim frekansı ve doküman uzunluğu
+# bileşeni) kitap eklenirken hesaplanır; ortalama doküman uzunluğu bulk_load'da sabitlenir, artımlı
+# eklemeler bu ortalamayı kullanır. Her terim için kitaplar etkiye göre azalan sırada da tutulur
+# (ilk sorguda oluşturulur, sonra artımlı güncellenir); yaygın terimlerde tüm eşleşmeler puanlanmaz.
+class BookSearchIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = defaultdict(dict)  # terim -> {kitap_id: etki}
+        self._ranked = {}                   # terim -> [(-etki, kitap_id)] artan sırada
+        self._doc_terms = {}                # kitap_id -> terimler
+        self._doc_lengths = {}              # kitap_id -> ağırlıklı doküman uzunluğu
+        self._terms = []                    # önek araması için sıralı terim listesi
+        self._total_length = 0.0
+        self._avg_length = None
+
+    def __len__(self):
+        return len(self._doc_lengths)
+
+    def ids(self):
+        with self._lock:
+            return set(self._doc_lengths)
+
+    def _impact(self, frequency, length):
+        return frequency * (K1 + 1) / (frequency + K1 * (1 - B + B * length / self._avg_length))
+
+    # Boş indekse toplu yükleme: terim listesi bir kez sıralanır, ortalama uzunluk tam hesaplanır
+    def bulk_load(self, items):
+        documents = [(book_id, *field_frequencies(fields)) for book_id, fields in items]
+        with self._lock:
+            if self._doc_lengths:
+                raise ValueError("bulk_load sadece boş indekse yapılabilir")
+            total_length = sum(length for _, _, length in documents)
+            self._avg_length = (total_length / len(documents) if documents else 0.0) or 1.0
+            postings = self._postings
+            k1_1 = K1 + 1
+            for book_id, frequencies, length in documents:
+                norm = K1 * (1 - B + B * length / self._avg_length)
+                for term, frequency in frequencies.items():
+                    postings[term][book_id] = frequency * k1_1 / (frequency + norm)
+                self._doc_terms[book_id] = tuple(frequencies)
+                self._doc_lengths[book_id] = length
+            self._total_length = total_length
+            self._terms = sorted(postings)
+            # Sıralı listeler sadece erken durmanın kullanıldığı yaygın terimler için gerekir
+            for term, term_postings in postings.items():
+                if len(term_postings) > EXHAUSTIVE_LIMIT:
+                    self._ranked_postings(term)
+
+    def add(self, book_id, fields):
+        frequencies, length = field_frequencies(fields)
+        with self._lock:
+            self._remove(book_id)
+            if self._avg_length is None:
+                self._avg_length = length or 1.0
+            for term, frequency in frequencies.items():
+                postings = self._postings[term]
+                if not postings:
+                    bisect.insort(self._terms, term)
+                impact = self._impact(frequency, length)
+                postings[book_id] = impact
+                ranked = self._ranked.get(term)
+                if ranked is not None:
+                    bisect.insort(ranked, (-impact, book_id))
+            self._doc_terms[book_id] = tuple(frequencies)
+            self._doc_lengths[book_id] = length
+            self._total_length += length
+
+    def remove(self, book_id):
+        with self._lock:
+            self._remove(book_id)
+
+    def _remove(self, book_id):
+        terms = self._doc_terms.pop(book_id, None)
+        if terms is None:
+            return
+        self._total_length -= self._doc_lengths.pop(book_id)
+        for term in terms:
+            postings = self._postings[term]
+            impact = postings.pop(book_id, None)
+            ranked = self._ranked.get(term)
+            if ranked is not None and impact is not None:
+                position = bisect.bisect_left(ranked, (-impact, book_id))
+                if position < len(ranked) and ranked[position][1] == book_id:
+                    del ranked[position]
+            if not postings:
+                del self._postings[term]
+                self._ranked.pop(term, None)
+                index = bisect.bisect_left(self._terms, term)
+                if index < len(self._terms) and self._terms[index] == term:
+                    del self._terms[index]
+
+    def _expand_prefix(self, prefix):
+        start = bisect.bisect_left(self._terms, prefix)
+        end = bisect.bisect_left(self._terms, prefix + '\uffff')
+        terms = self._terms[start:end]
+        if len(terms) > MAX_PREFIX_TERMS:
+            # Çok genel öneklerde en yaygın terimleri kullan
+            terms = heapq.nlargest(MAX_PREFIX_TERMS, terms, key=lambda t: len(self._postings[t]))
+        return terms
+
+    def _idf(self, term):
+        df = len(self._postings.get(term, ()))
+        n = len(self._doc_lengths)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def _ranked_postings(self, term):
+        ranked = self._ranked.get(term)
+        if ranked is None:
+            ranked = self._ranked[term] = sorted((-impact, book_id) for book_id, impact in self._postings[term].items())
+        return ranked
+
+    # Kitabın bir sorgu kelimesindeki puanı: eşleşen terimlerden en iyisi (önek genişlemesi)
+    def _token_score(self, book_id, idfs):
+        best = 0.0
+        if len(idfs) <= 4:
+            for term, idf in idfs.items():
+                impact = self._postings[term].get(book_id)
+                if impact is not None and idf * impact > best:
+                    best = idf * impact
+        else:
+            for term in self._doc_terms[book_id]:
+                idf = idfs.get(term)
+                if idf is not None and idf * self._postings[term][book_id] > best:
+                    best = idf * self._postings[term][book_id]
+        return best
+
+    # Tüm kelimelerin puanları toplamı; kelimelerden biri eşleşmiyorsa None
+    def _score(self, book_id, token_idfs):
+        total = 0.0
+        for idfs in token_idfs:
+            best = self._token_score(book_id, idfs)
+            if not best:
+                return None
+            total += best
+        return total
+
+    def _search_exhaustive(self, token_idfs, limit):
+        # En seyrek kelimeden başla, diğer kelimeleri sadece kalan adaylar için puanla
+        token_idfs = sorted(token_idfs, key=lambda idfs: sum(len(self._postings[t]) for t in idfs))
+        totals = {}
+        for term, idf in token_idfs[0].items():
+            for book_id, impact in self._postings[term].items():
+                if idf * impact > totals.get(book_id, 0.0):
+                    totals[book_id] = idf * impact
+        for idfs in token_idfs[1:]:
+            next_totals = {}
+            for book_id, total in totals.items():
+                best = self._token_score(book_id, idfs)
+                if best:
+                    next_totals[book_id] = total + best
+            totals = next_totals
+            if not totals:
+                return []
+        return heapq.nsmallest(limit, totals.items(), key=lambda item: (-item[1], item[0]))
+
+    # Her kelimenin terim listeleri etkiye göre azalan sırada birlikte okunur. Görülmemiş bir kitabın
+    # alabileceği en yüksek puan (her kelimedeki sıradaki en iyi değerin toplamı) elimizdeki limit'inci
+    # sonuçtan yüksek değilse durulur. budget kitap okunduğunda bitmediyse None döner.
+    def _search_top_k(self, token_idfs, limit, budget):
+        frontiers = []
+        lists = []
+        for idfs in token_idfs:
+            heap = []
+            for term, idf in idfs.items():
+                ranked = self._ranked_postings(term)
+                lists.append((idf, ranked))
+                heap.append((ranked[0][0] * idf, len(lists) - 1, 0))
+            heapq.heapify(heap)
+            frontiers.append(heap)
+
+        seen = set()
+        top = []  # (puan, -kitap_id), en kötü sonuç başta
+        reads = 0
+        while all(frontiers):
+            if reads >= budget:
+                return None
+            reads += 1
+            # Sıradaki değeri en yüksek olan kelimeden bir kitap oku
+            heap = min(frontiers, key=lambda heap: heap[0][0])
+            _, list_index, position = heapq.heappop(heap)
+            idf, ranked = lists[list_index]
+            book_id = ranked[position][1]
+            if position + 1 < len(ranked):
+                heapq.heappush(heap, (ranked[position + 1][0] * idf, list_index, position + 1))
+            if book_id not in seen:
+                seen.add(book_id)
+                score = self._score(book_id, token_idfs)
+                if score is not None:
+                    if len(top) < limit:
+                        heapq.heappush(top, (score, -book_id))
+                    elif (score, -book_id) > top[0]:
+                        heapq.heapreplace(top, (score, -book_id))
+            # Bir kelimenin listeleri bittiyse görülmemiş kitaplar o kelimeyi içermiyor demektir
+            if len(top) == limit and (not all(frontiers) or top[0][0] >= -sum(h[0][0] for h in frontiers)):
+                break
+        return [(-negative_id, score) for score, negative_id in sorted(top, reverse=True)]
+
+    # Tüm sorgu kelimelerini içeren kitapları BM25 skoruna göre sıralı döndürür.
+    # prefix=True ise son kelime önek olarak kabul edilir (otomatik tamamlama için).
+    def search(self, query, limit=20, prefix=True):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        with self._lock:
+            if not self._doc_lengths:
+                return []
+            token_idfs = []
+            for position, token in enumerate(tokens):
+                if prefix and position == len(tokens) - 1:
+                    terms = self._expand_prefix(token)
+                else:
+                    terms = [token] if token in self._postings else []
+                if not terms:
+                    return []
+                token_idfs.append({term: self._idf(term) for term in terms})
+
+            candidates = min(sum(len(self._postings[t]) for t in idfs) for idfs in token_idfs)
+            if candidates > EXHAUSTIVE_LIMIT:
+                ranked = self._search_top_k(token_idfs, limit, candidates * TOP_K_BUDGET)
+                if ranked is not None:
+                    return ranked
+            return self._search_exhaustive(token_idfs, limit)
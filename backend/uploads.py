@@ -0,0 +1,86 @@
+import tempfile
+from functools import wraps
+
+from flask import Request, jsonify, request
+from werkzeug.exceptions import RequestEntityTooLarge
+
+# Bu boyuta kadar dosya bellekte, sonrası geçici dosyada tutulur
+SPOOL_SIZE = 512 * 1024
+
+
+class UploadRejected(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+# Multipart ayrıştırıcının yazdığı dosya. İlk baytlardan tür kontrolü yapar ve sınır aşılınca
+# hemen hata verir; geçersiz bir yüklemenin geri kalanı okunur ama hiçbir yere yazılmaz.
+class SniffingUpload:
+    def __init__(self, max_size, sniff, sniff_bytes):
+        self._file = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE, mode='w+b')
+        self._head = b''
+        self.max_size = max_size
+        self.sniff = sniff
+        self.sniff_bytes = sniff_bytes
+        self.kind = None
+        self.size = 0
+
+    def _check_head(self):
+        self.kind = self.sniff(self._head)
+        if self.kind is None:
+            raise UploadRejected("Geçersiz resim dosyası", 415)
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise UploadRejected("Dosya çok büyük", 413)
+        if self.kind is None:
+            self._head += data[:self.sniff_bytes - len(self._head)]
+            if len(self._head) >= self.sniff_bytes:
+                self._check_head()
+        return self._file.write(data)
+
+    def seek(self, *args):
+        # Ayrıştırıcı dosya bittiğinde başa sarar; kısa dosyalar burada kontrol edilir
+        if self.kind is None:
+            self._check_head()
+        return self._file.seek(*args)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+    def __iter__(self):
+        return iter(self._file)
+
+
+class StreamingUploadRequest(Request):
+    upload_policy = None  # (dosya başına en fazla bayt, izin verilen uzantılar, sniff, sniff_bytes)
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.upload_policy is None or not filename:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        max_size, allowed_extensions, sniff, sniff_bytes = self.upload_policy
+        # Uzantı kontrolü dosyanın ilk baytı okunmadan yapılır
+        if '.' not in filename or filename.rsplit('.', 1)[1].lower() not in allowed_extensions:
+            raise UploadRejected("Geçersiz dosya tipi", 400)
+        return SniffingUpload(max_size, sniff, sniff_bytes)
+
+
+# Dosya yüklenen endpoint'ler için: gövde view'dan önce, verilen sınırlarla ayrıştırılır.
+# app.request_class = StreamingUploadRequest olmalıdır.
+def streamed_upload(max_size, allowed_extensions, sniff, sniff_bytes):
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            request.upload_policy = (max_size, allowed_extensions, sniff, sniff_bytes)
+            try:
+                request.files
+            except UploadRejected as e:
+                return jsonify({"error": e.message}), e.status
+            except RequestEntityTooLarge:
+                return jsonify({"error": "Dosya çok büyük"}), 413
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,13 @@
+# Arka plan iş worker'ı: python worker.py
+# Web sürecinden (gunicorn main:app) ayrı çalışır; birden fazla kopya aynı anda çalıştırılabilir.
+# Resim işleri için UPLOAD_FOLDER web süreciyle ortak olmalı, değilse worker başlamaz.
+import sys
+
+from main import app, check_shared_uploads, init_db, run_job_worker
+
+if __name__ == '__main__':
+    init_db()
+    with app.app_context():
+        if not check_shared_uploads():
+            sys.exit(1)
+    run_job_worker()
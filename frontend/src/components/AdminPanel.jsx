@@ -63,6 +63,7 @@ const AdminPanel = () => {
   const [books, setBooks] = useState([]);
   const [users, setUsers] = useState([]);
   const [orders, setOrders] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [editDialog, setEditDialog] = useState(false);
   const [selectedBook, setSelectedBook] = useState(null);
   const [addDialog, setAddDialog] = useState(false);
@@ -140,21 +141,24 @@ const AdminPanel = () => {
     }
   };
 
-  const fetchData = async () => {
+  // Admin listeleri sayfalıdır; cursor verilirse sonraki sayfa mevcut listeye eklenir
+  const fetchData = async (cursor = null) => {
     try {
       let response;
+      const params = cursor ? { cursor } : {};
+      const merge = (prev, page) => (cursor ? [...prev, ...page] : page);
       switch (tab) {
         case 0:
-          response = await axios.get('/api/admin/books');
-          setBooks(response.data);
+          response = await axios.get('/api/admin/books', { params });
+          setBooks(prev => merge(prev, response.data));
           break;
         case 1:
-          response = await axios.get('/api/admin/users');
-          setUsers(response.data);
+          response = await axios.get('/api/admin/users', { params });
+          setUsers(prev => merge(prev, response.data));
           break;
         case 2:
-          response = await axios.get('/api/admin/orders');
-          setOrders(response.data);
+          response = await axios.get('/api/admin/orders', { params });
+          setOrders(prev => merge(prev, response.data));
           break;
         case 3:
           await fetchPublishers();
@@ -165,6 +169,7 @@ const AdminPanel = () => {
         default:
           break;
       }
+      setNextCursor(response?.headers['x-next-cursor'] || null);
     } catch (error) {
       console.error('Veri alınamadı:', error);
     }
@@ -587,6 +592,14 @@ const AdminPanel = () => {
 
       {renderTabContent()}
 
+      {nextCursor && (
+        <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+          <Button variant="outlined" onClick={() => fetchData(nextCursor)}>
+            Daha Fazla Göster
+          </Button>
+        </Box>
+      )}
+
       <Dialog open={addDialog} onClose={() => setAddDialog(false)}>
         <DialogTitle>Yeni Kitap Ekle</DialogTitle>
         <DialogContent>
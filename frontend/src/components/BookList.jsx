@@ -55,8 +55,9 @@ const BookList = () => {
   const isMobile = useMediaQuery(theme.breakpoints.down('sm'));
   const navigate = useNavigate();
 
+  const [nextCursor, setNextCursor] = useState(null);
+
   useEffect(() => {
-    fetchBooks();
     fetchCategories();
   }, []);
 
@@ -69,11 +70,19 @@ const BookList = () => {
     }
   };
 
-  const fetchBooks = async () => {
+  // Filtreleme ve sayfalama sunucu tarafında yapılır
+  const fetchBooks = async (cursor = null) => {
     try {
-      const response = await axios.get('/api/books');
-      setBooks(response.data);
-      setFilteredBooks(response.data);
+      const params = new URLSearchParams();
+      selectedCategories.forEach(category => params.append('category', category));
+      if (cursor) {
+        params.append('cursor', cursor);
+      }
+      const response = await axios.get('/api/books', { params });
+      const page = response.data;
+      setBooks(prev => (cursor ? [...prev, ...page] : page));
+      setFilteredBooks(prev => (cursor ? [...prev, ...page] : page));
+      setNextCursor(response.headers['x-next-cursor'] || null);
       setLoading(false);
     } catch (error) {
       console.error('Kitaplar yüklenemedi:', error);
@@ -81,18 +90,28 @@ const BookList = () => {
     }
   };
 
+  // Arama sunucudaki indeks üzerinden yapılır; yazarken her tuşta istek atmamak için bekle
+  const searchBooks = async (query) => {
+    try {
+      const response = await axios.get('/api/books/search', { params: { q: query } });
+      setFilteredBooks(response.data);
+      setNextCursor(null);
+      setLoading(false);
+    } catch (error) {
+      console.error('Arama yapılamadı:', error);
+      setLoading(false);
+    }
+  };
+
   useEffect(() => {
-    if (selectedCategories.length === 0) {
-      setFilteredBooks(books);
-    } else {
-      const filtered = books.filter(book => 
-        selectedCategories.some(category => 
-          book.category?.toLowerCase().includes(category.toLowerCase())
-        )
-      );
-      setFilteredBooks(filtered);
+    const query = searchTerm.trim();
+    if (!query) {
+      fetchBooks();
+      return undefined;
     }
-  }, [selectedCategories, books]);
+    const timer = setTimeout(() => searchBooks(query), 250);
+    return () => clearTimeout(timer);
+  }, [selectedCategories, searchTerm]);
 
   const handleAddToCart = async (bookId) => {
     try {
@@ -242,7 +261,9 @@ const BookList = () => {
                     <CardMedia
                       component="img"
                       height="260"
-                      image={book.image_url || '/placeholder.jpg'}
+                      image={book.thumbnail_url || book.image_url || '/placeholder.jpg'}
+                      srcSet={book.image_srcset || undefined}
+                      sizes="(max-width: 600px) 100vw, 320px"
                       alt={book.title}
                       sx={{ objectFit: 'contain', p: 2 }}
                     />
@@ -270,9 +291,9 @@ const BookList = () => {
                         {book.author}
                       </Typography>
                       <Box sx={{ display: 'flex', alignItems: 'center', mb: 1 }}>
-                        <Rating value={4.5} precision={0.5} size="small" readOnly />
+                        <Rating value={book.rating} precision={0.5} size="small" readOnly />
                         <Typography variant="caption" sx={{ ml: 1 }}>
-                          (128)
+                          ({book.review_count})
                         </Typography>
                       </Box>
                       <Box sx={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center' }}>
@@ -306,6 +327,13 @@ const BookList = () => {
               ))
             )}
           </Grid>
+          {nextCursor && (
+            <Box sx={{ display: 'flex', justifyContent: 'center', mt: 3 }}>
+              <Button variant="outlined" onClick={() => fetchBooks(nextCursor)}>
+                Daha Fazla Göster
+              </Button>
+            </Box>
+          )}
         </Grid>
       </Grid>
 